@@ -1,7 +1,20 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class GameDataConfig(AppConfig):
     name = 'apps.game_data'
     module = 'apps.game_data'
     label = 'game_data'
+
+    def ready(self):
+        # Also connects the registry's invalidation signals. It's built
+        # on first use, not here, as nothing should query this early.
+        from apps.game_data import registry
+
+        # A migrated database, eg. the test runner's, has other pieces.
+        post_migrate.connect(
+            lambda **kwargs: registry.clear_registry(),
+            sender=self,
+            weak=False
+        )
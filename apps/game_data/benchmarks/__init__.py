@@ -0,0 +1,3 @@
+"""
+Benchmarks for measuring ingest and query performance.
+"""
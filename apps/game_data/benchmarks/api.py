@@ -0,0 +1,109 @@
+"""
+Read API latency and query count as stored games grow.
+"""
+from random import Random
+from statistics import median
+from time import perf_counter
+from uuid import UUID
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from apps.game_data.benchmarks.base import Benchmark
+from apps.game_data.benchmarks.synthetic import piece_document
+from apps.game_data.ingest.bulk import BulkGameWriter
+from apps.game_data.ingest.records import GameRecord
+from apps.game_data.models import meta as meta_models
+from apps.game_data.registry import get_registry
+from apps.game_data.serializers.meta import GamePieceSerializer
+from apps.game_data.views import GameDetailView
+
+PLAYERS_PER_GAME = 8
+
+
+class GameDetailBenchmark(Benchmark):
+    """
+    Stores one game per entry in `rounds`, each player with that many
+    turns, full boards and a spell per round so far, then times fetching
+    each through the game detail endpoint.
+
+    Metrics are named `<metric>_<rounds>`.
+    """
+
+    name = 'game-detail'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rounds', default='5,15,30',
+            help='Comma separated turns per player, one game for each.'
+        )
+        parser.add_argument('--repeats', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def measure(self, rounds, repeats, seed, **options):
+        serializer = GamePieceSerializer(data=piece_document(), many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        self.random = Random(seed)
+        view = GameDetailView.as_view()
+        factory = APIRequestFactory()
+
+        results = {}
+        for turn_count in sorted(int(count) for count in rounds.split(',')):
+            record = self.game(turn_count)
+            BulkGameWriter().write(record)
+            get_registry()
+
+            def fetch():
+                response = view(
+                    factory.get(f'/api/games/{record.uuid}/'),
+                    uuid=record.uuid
+                )
+                return response.render()
+
+            with CaptureQueriesContext(connection) as queries:
+                response = fetch()
+            timings = []
+            for _ in range(repeats):
+                start = perf_counter()
+                fetch()
+                timings.append(perf_counter() - start)
+
+            results[f'latency_ms_{turn_count}'] = median(timings) * 1000
+            results[f'queries_{turn_count}'] = len(queries)
+            results[f'kb_{turn_count}'] = len(response.content) / 1024
+        return results
+
+    def game(self, turn_count):
+        """A GameRecord with every board filled."""
+        choice = self.random.choice
+        characters = list(
+            meta_models.SBBCharacter.objects.values_list('pk', flat=True))
+        spells = list(meta_models.SBBSpell.objects.values_list('pk', flat=True))
+        treasures = list(
+            meta_models.SBBTreasure.objects.values_list('pk', flat=True))
+        heroes = list(
+            meta_models.SBBHero.objects.values_list('template_id', flat=True))
+
+        record = GameRecord(UUID(int=self.random.getrandbits(128)))
+        for index in range(PLAYERS_PER_GAME):
+            account_id = f'{self.random.getrandbits(64):016X}'
+            record.add_player(account_id)
+            record.placements[account_id] = index + 1
+            hero = choice(heroes)
+            for turn_num in range(1, turn_count + 1):
+                record.set_summary(
+                    account_id, turn_num, 40, f'{turn_num // 3 + 2}.0', hero)
+                record.set_board(
+                    account_id,
+                    turn_num,
+                    characters=[
+                        (choice(characters), self.random.randint(1, 60),
+                         self.random.randint(1, 60), False, position)
+                        for position in range(1, 8)
+                    ],
+                    spells=[choice(spells) for _ in range(turn_num)],
+                    treasures=[choice(treasures) for _ in range(3)]
+                )
+        return record
@@ -0,0 +1,63 @@
+"""
+Shared plumbing for benchmark suites.
+"""
+from contextlib import contextmanager
+import os
+import resource
+import tempfile
+
+from django.db import connections
+
+
+@contextmanager
+def scratch_database(using='default'):
+    """
+    Run against a freshly migrated throwaway database, the same way the
+    test runner does, so the real one is never touched.
+    """
+    connection = connections[using]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if connection.vendor == 'sqlite':
+            # On disk rather than the test runner's in-memory default,
+            # so we pay for journaling and fsyncs like a real run does.
+            connection.settings_dict['TEST']['NAME'] = os.path.join(
+                tmp_dir, 'benchmark.sqlite3')
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False)
+        try:
+            yield connection
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile, eg. `percentile(latencies, 0.99)`."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process so far."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class Benchmark:
+    """
+    A benchmark suite. Subclasses set `name`, add their options and
+    return a dict of metrics from `measure`.
+    """
+
+    name = None
+
+    def add_arguments(self, parser):
+        pass
+
+    def run(self, **options):
+        with scratch_database():
+            return self.measure(**options)
+
+    def measure(self, **options):
+        raise NotImplementedError
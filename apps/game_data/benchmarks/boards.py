@@ -0,0 +1,114 @@
+"""
+How much storing boards as snapshots saves over one row per character.
+"""
+from django.db import connection
+from django.test import override_settings
+
+from apps.game_data.benchmarks.base import Benchmark
+from apps.game_data.benchmarks.synthetic import (
+    MetaRollupGenerator,
+    piece_document
+)
+from apps.game_data.export import export_rows
+from apps.game_data.ingest.pipeline import RollupIngestor
+from apps.game_data.models import (
+    composition as composition_models,
+    game as game_models,
+    meta as meta_models,
+    stats as stats_models
+)
+from apps.game_data.serializers.meta import GamePieceSerializer
+
+BOARD_TABLES = (
+    game_models.SBBGameTurn,
+    game_models.SBBGameCharacter,
+    game_models.SBBBoard,
+    game_models.SBBBoardCharacter,
+)
+
+
+def table_sizes():
+    """
+    table -> bytes its pages and indexes take up, from SQLite's dbstat.
+    Empty for other databases.
+    """
+    if connection.vendor != 'sqlite':
+        return {}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT m.tbl_name, SUM(s.pgsize) FROM dbstat s '
+            'JOIN sqlite_master m ON m.name = s.name GROUP BY m.tbl_name'
+        )
+        return dict(cursor.fetchall())
+
+
+def clear_games():
+    for model in (
+        stats_models.SBBHeroStats,
+        composition_models.SBBCharacterPosting,
+        composition_models.SBBTurnNumberPosting,
+        game_models.SBBCombatRound,
+        game_models.SBBGameCharacter,
+        game_models.SBBGameSpell,
+        game_models.SBBGameTurn,
+        game_models.SBBBoard,
+        game_models.SBBGameParticipant,
+        game_models.SBBGame,
+        meta_models.SBBPlayer,
+    ):
+        model.objects.all().delete()
+
+
+class BoardStorageBenchmark(Benchmark):
+    """
+    Ingests the same `days` of `MetaRollupGenerator` roll-ups with
+    boards stored as rows, then as snapshots, and compares how many
+    character rows and how much space each takes. Both have to export
+    the same boards.
+    """
+
+    name = 'board-storage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30)
+        parser.add_argument('--games-per-day', type=int, default=50)
+        parser.add_argument('--povs', type=int, default=2)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def measure(self, days, games_per_day, povs, seed, **options):
+        serializer = GamePieceSerializer(data=piece_document(), many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        members = list(
+            MetaRollupGenerator(seed=seed, povs=povs).members(
+                days * games_per_day))
+
+        results = {'games': days * games_per_day}
+        exported = {}
+        for mode, snapshots in (('rows', False), ('snapshots', True)):
+            clear_games()
+            with override_settings(SBB_BOARD_SNAPSHOTS=snapshots):
+                RollupIngestor(batch_size=50).ingest_members(members)
+            exported[mode] = sorted(export_rows('boards'))
+
+            sizes = table_sizes()
+            results.update({
+                f'{mode}_character_rows':
+                    game_models.SBBGameCharacter.objects.count()
+                    + game_models.SBBBoardCharacter.objects.count(),
+                f'{mode}_boards': game_models.SBBBoard.objects.count(),
+                f'{mode}_board_kb': sum(
+                    sizes.get(model._meta.db_table, 0)
+                    for model in BOARD_TABLES) / 1024,
+                f'{mode}_db_kb': sum(sizes.values()) / 1024,
+            })
+
+        if exported['rows'] != exported['snapshots']:
+            raise AssertionError('Snapshots exported different boards.')
+        results['turns'] = game_models.SBBGameTurn.objects.count()
+        for metric in ('character_rows', 'board_kb', 'db_kb'):
+            before = results[f'rows_{metric}']
+            after = results[f'snapshots_{metric}']
+            results[f'{metric}_saved_pct'] = (
+                100 * (before - after) / before if before else 0)
+        return results
@@ -0,0 +1,160 @@
+"""
+Composition searches through the posting lists against joining the
+character table once per unit.
+"""
+from random import Random
+from statistics import median
+from time import perf_counter
+from uuid import UUID
+
+from django.db import connection, transaction
+
+from apps.game_data import composition
+from apps.game_data.benchmarks.base import Benchmark
+from apps.game_data.benchmarks.synthetic import piece_document
+from apps.game_data.models import (
+    game as game_models,
+    meta as meta_models
+)
+from apps.game_data.serializers.meta import GamePieceSerializer
+
+PLAYERS_PER_GAME = 8
+TURNS_PER_PLAYER = 15
+BOARD_SIZE = 7
+GOLDEN_CHANCE = 0.15
+# Searches for this many characters at once.
+SEARCH_SIZES = (1, 2, 3)
+
+
+def join_turns(characters, golden=False, turns=None):
+    """`composition.find_turns` the ORM way, one join per character."""
+    queryset = game_models.SBBGameTurn.objects.all()
+    for pk in composition.character_pks(characters):
+        lookups = {'sbbgamecharacter__base_character_id': pk}
+        if golden:
+            lookups['sbbgamecharacter__golden'] = True
+        queryset = queryset.filter(**lookups)
+    if turns is not None:
+        queryset = queryset.filter(turn_num__in=list(turns))
+    return list(
+        queryset.order_by('pk').distinct().values_list('pk', flat=True))
+
+
+class CompositionBenchmark(Benchmark):
+    """
+    Stores `boards` random boards, builds the index from them, then
+    times the same searches through `find_turns` and `join_turns`.
+
+    Characters are drawn with skewed odds, the way a meta makes some
+    units far more common than others, and searches pick from the
+    common ones so they match plenty of boards.
+    """
+
+    name = 'composition'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--boards', type=int, default=200000)
+        parser.add_argument('--searches', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def measure(self, boards, searches, seed, **options):
+        serializer = GamePieceSerializer(data=piece_document(), many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        self.random = Random(seed)
+        characters = list(
+            meta_models.SBBCharacter.objects.values_list(
+                'pk', 'template_id'))
+        self.random.shuffle(characters)
+        # Zipf-ish: the nth character turns up about 1/n as often.
+        self.weights = [1 / rank for rank in range(1, len(characters) + 1)]
+        self.fill(boards, [pk for pk, _ in characters])
+
+        start = perf_counter()
+        composition.rebuild()
+        results = {
+            'boards': game_models.SBBGameTurn.objects.count(),
+            'characters': game_models.SBBGameCharacter.objects.count(),
+            'rebuild_s': perf_counter() - start,
+        }
+
+        common = [template_id for _, template_id in characters[:12]]
+        kinds = {
+            'any': {},
+            'golden': {'golden': True},
+            'turns': {'turns': range(8, 12)},
+        }
+        for size in SEARCH_SIZES:
+            for kind, search_options in kinds.items():
+                index_times = []
+                join_times = []
+                matches = 0
+                for _ in range(searches):
+                    search = self.random.sample(common, size)
+                    start = perf_counter()
+                    found = composition.find_turns(search, **search_options)
+                    index_times.append(perf_counter() - start)
+                    start = perf_counter()
+                    joined = join_turns(search, **search_options)
+                    join_times.append(perf_counter() - start)
+                    if found != joined:
+                        raise AssertionError(
+                            f'find_turns disagrees with the joins for '
+                            f'{search} {search_options}.')
+                    matches = matches + len(found)
+                label = f'{size}_{kind}'
+                results[f'index_ms_{label}'] = median(index_times) * 1000
+                results[f'join_ms_{label}'] = median(join_times) * 1000
+                results[f'matches_{label}'] = matches // searches
+        return results
+
+    def fill(self, boards, characters):
+        games = -(-boards // (PLAYERS_PER_GAME * TURNS_PER_PLAYER))
+        with transaction.atomic():
+            stored = game_models.SBBGame.objects.bulk_create([
+                game_models.SBBGame(uuid=UUID(int=self.random.getrandbits(128)))
+                for _ in range(games)
+            ])
+            players = meta_models.SBBPlayer.objects.bulk_create([
+                meta_models.SBBPlayer(
+                    account_id=f'{self.random.getrandbits(64):016X}')
+                for _ in range(games * PLAYERS_PER_GAME)
+            ])
+            participants = game_models.SBBGameParticipant.objects.bulk_create(
+                [
+                    game_models.SBBGameParticipant(
+                        match=stored[index // PLAYERS_PER_GAME], player=player)
+                    for index, player in enumerate(players)
+                ],
+                batch_size=500
+            )
+            turns = game_models.SBBGameTurn.objects.bulk_create(
+                [
+                    game_models.SBBGameTurn(
+                        participant=participant, turn_num=turn_num)
+                    for participant in participants
+                    for turn_num in range(1, TURNS_PER_PLAYER + 1)
+                ][:boards],
+                batch_size=500
+            )
+
+            # Plain executemany, as in the matchups benchmark.
+            table = game_models.SBBGameCharacter._meta.db_table
+            rows = []
+            for turn in turns:
+                board = set()
+                while len(board) < BOARD_SIZE:
+                    board.update(self.random.choices(
+                        characters, self.weights, k=BOARD_SIZE - len(board)))
+                for position, pk in enumerate(board, 1):
+                    rows.append((
+                        pk, turn.pk, 1, 1,
+                        self.random.random() < GOLDEN_CHANCE, position
+                    ))
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f'INSERT INTO {table} (base_character_id, game_turn_id, '
+                    f'attack, health, golden, position) '
+                    f'VALUES (%s, %s, %s, %s, %s, %s)',
+                    rows
+                )
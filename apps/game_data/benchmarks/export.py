@@ -0,0 +1,124 @@
+"""
+Export throughput on a large synthetic database.
+"""
+from random import Random
+from time import perf_counter
+from uuid import UUID
+
+from django.db import transaction
+
+from apps.game_data.benchmarks.base import Benchmark, peak_rss_kb
+from apps.game_data.benchmarks.synthetic import piece_document
+from apps.game_data.export import EXPORTS, FORMATS, export
+from apps.game_data.models import (
+    game as game_models,
+    meta as meta_models
+)
+from apps.game_data.serializers.meta import GamePieceSerializer
+
+PLAYERS_PER_GAME = 8
+
+
+class ExportBenchmark(Benchmark):
+    """
+    Fills the tables with `games` games of `turns` turns per player and
+    full boards, then streams each export in each format to nowhere.
+
+    Metrics are named `<metric>_<kind>_<format>`. `rss_growth_kb` is how
+    far the exports pushed peak memory past what filling the tables took,
+    which should be next to nothing.
+    """
+
+    name = 'export'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--games', type=int, default=2500,
+            help='Games to store. The default makes ~2.1M board rows.'
+        )
+        parser.add_argument('--turns', type=int, default=15)
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def measure(self, games, turns, chunk_size, seed, **options):
+        serializer = GamePieceSerializer(data=piece_document(), many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        self.random = Random(seed)
+        self.fill(games, turns)
+
+        results = {
+            'turn_rows': game_models.SBBGameTurn.objects.count(),
+            'board_rows': game_models.SBBGameCharacter.objects.count(),
+        }
+        rss_before = peak_rss_kb()
+        for kind in EXPORTS:
+            for file_format in FORMATS:
+                rows = 0
+                size = 0
+                start = perf_counter()
+                for chunk in export(kind, file_format, chunk_size=chunk_size):
+                    rows = rows + chunk.count('\n')
+                    size = size + len(chunk)
+                elapsed = perf_counter() - start
+                results[f'rows_per_sec_{kind}_{file_format}'] = rows / elapsed
+                results[f'mb_per_sec_{kind}_{file_format}'] = (
+                    size / elapsed / 2 ** 20)
+        results['rss_growth_kb'] = peak_rss_kb() - rss_before
+        return results
+
+    def fill(self, games, turns, chunk=100):
+        """Insert `games` games, `chunk` at a time."""
+        characters = list(
+            meta_models.SBBCharacter.objects.values_list('pk', flat=True))
+        heroes = list(meta_models.SBBHero.objects.values_list('pk', flat=True))
+        for first in range(0, games, chunk):
+            count = min(chunk, games - first)
+            with transaction.atomic():
+                stored = game_models.SBBGame.objects.bulk_create([
+                    game_models.SBBGame(
+                        uuid=UUID(int=self.random.getrandbits(128)))
+                    for _ in range(count)
+                ])
+                players = meta_models.SBBPlayer.objects.bulk_create([
+                    meta_models.SBBPlayer(
+                        account_id=f'{self.random.getrandbits(64):016X}')
+                    for _ in range(count * PLAYERS_PER_GAME)
+                ])
+                participants = game_models.SBBGameParticipant.objects.bulk_create(
+                    [
+                        game_models.SBBGameParticipant(
+                            match=game, player=player,
+                            placement=index % PLAYERS_PER_GAME + 1)
+                        for index, (game, player) in enumerate(zip(
+                            (game for game in stored
+                             for _ in range(PLAYERS_PER_GAME)),
+                            players
+                        ))
+                    ],
+                    batch_size=500
+                )
+                stored_turns = game_models.SBBGameTurn.objects.bulk_create(
+                    [
+                        game_models.SBBGameTurn(
+                            participant=participant, turn_num=turn_num,
+                            hero_id=self.random.choice(heroes), hp=40,
+                            level=turn_num // 3 + 2, exp=turn_num % 3)
+                        for participant in participants
+                        for turn_num in range(1, turns + 1)
+                    ],
+                    batch_size=500
+                )
+                game_models.SBBGameCharacter.objects.bulk_create(
+                    [
+                        game_models.SBBGameCharacter(
+                            game_turn=turn,
+                            base_character_id=self.random.choice(characters),
+                            attack=self.random.randint(0, 60),
+                            health=self.random.randint(1, 60),
+                            golden=False, position=position)
+                        for turn in stored_turns
+                        for position in range(1, 8)
+                    ],
+                    batch_size=500
+                )
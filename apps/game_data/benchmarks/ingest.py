@@ -0,0 +1,122 @@
+"""
+End-to-end roll-up ingest throughput.
+"""
+from statistics import median
+from time import perf_counter
+import os
+import tempfile
+
+from apps.game_data.benchmarks.base import (
+    Benchmark,
+    peak_rss_kb,
+    percentile,
+    scratch_database
+)
+from apps.game_data.benchmarks.synthetic import (
+    RollupGenerator,
+    piece_document,
+    write_rollup
+)
+from apps.game_data.ingest.dbprofile import PROFILES, ingest_profile
+from apps.game_data.ingest.instrument import IngestProfiler
+from apps.game_data.ingest.pipeline import RollupIngestor
+from apps.game_data.ingest.tarball import iter_rollup_members
+from apps.game_data.serializers.meta import GamePieceSerializer
+
+
+class IngestBenchmark(Benchmark):
+    """
+    Loads a synthetic roll-up from a local tarball through the same
+    streaming + RollupIngestor path `load_bucket` uses.
+    """
+
+    name = 'ingest'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--games', type=int, default=200)
+        parser.add_argument(
+            '--povs', type=int, default=2,
+            help='JSONs per game, as if that many players ran the tracker.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--merge-window', type=int, default=256)
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument(
+            '--validator', choices=RollupIngestor.VALIDATORS, default='fast')
+        self.add_profile_argument(parser)
+
+    def add_profile_argument(self, parser):
+        parser.add_argument(
+            '--db-profile', choices=PROFILES, default='default')
+
+    def measure(self, games, povs, seed, merge_window, batch_size,
+                db_profile, validator='fast', **options):
+        serializer = GamePieceSerializer(data=piece_document(), many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'rollup.tar.gz')
+            write_rollup(path, RollupGenerator(seed, povs).members(games))
+            with ingest_profile(db_profile):
+                return self.measure_file(
+                    path,
+                    merge_window=merge_window,
+                    batch_size=batch_size,
+                    validator=validator
+                )
+
+    def measure_file(self, path, **ingestor_options):
+        with IngestProfiler() as profiler, open(path, 'rb') as file_stream:
+            ingestor = RollupIngestor(profiler=profiler, **ingestor_options)
+            start = perf_counter()
+            ingestor.ingest_members(iter_rollup_members(file_stream))
+            elapsed = perf_counter() - start
+
+        # Per game: every stage of every POV, plus its write.
+        latencies = [seconds for seconds, *_ in profiler.finished] or [0.0]
+        game_count = len(profiler.finished)
+        return {
+            'games': game_count,
+            'members': ingestor.recorded + len(ingestor.failures),
+            'failures': len(ingestor.failures),
+            'seconds': elapsed,
+            'games_per_sec': game_count / elapsed,
+            'queries_per_game': profiler.query_count / (game_count or 1),
+            'peak_rss_kb': peak_rss_kb(),
+            'latency_p50_ms': percentile(latencies, 0.5) * 1000,
+            'latency_p99_ms': percentile(latencies, 0.99) * 1000,
+        }
+
+
+class DBProfileBenchmark(IngestBenchmark):
+    """
+    The ingest suite run under each database profile in turn, each time
+    on its own scratch database, and the medians compared side by side.
+    """
+
+    name = 'db-profiles'
+
+    def add_profile_argument(self, parser):
+        parser.add_argument(
+            '--rounds', type=int, default=3,
+            help='Runs per profile, alternating between them.'
+        )
+
+    def run(self, rounds, **options):
+        measured = {profile: [] for profile in PROFILES}
+        for _ in range(rounds):
+            for profile in PROFILES:
+                with scratch_database():
+                    measured[profile].append(
+                        self.measure(db_profile=profile, **options))
+
+        results = {}
+        for profile, runs in measured.items():
+            for metric in ('games_per_sec', 'queries_per_game',
+                           'latency_p50_ms', 'latency_p99_ms'):
+                results[f'{metric}_{profile}'] = median(
+                    run[metric] for run in runs)
+        results['speedup'] = (
+            results['games_per_sec_ingest'] / results['games_per_sec_default'])
+        return results
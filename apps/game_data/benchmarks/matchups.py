@@ -0,0 +1,127 @@
+"""
+Matchup matrix cost over a large combat table.
+"""
+from random import Random
+from statistics import median
+from time import perf_counter
+from uuid import UUID
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from apps.game_data.benchmarks.base import Benchmark
+from apps.game_data.benchmarks.synthetic import piece_document
+from apps.game_data.matchups import MatchupMatrix, get_matchups
+from apps.game_data.models import (
+    game as game_models,
+    meta as meta_models
+)
+from apps.game_data.serializers.meta import GamePieceSerializer
+
+PLAYERS_PER_GAME = 8
+TURNS_PER_PLAYER = 8
+# Pairings per turn, so `rounds` needs rounds / this many turns.
+OPPONENTS_PER_TURN = 50
+
+
+class MatchupBenchmark(Benchmark):
+    """
+    Stores `rounds` combat rounds between random heroes, then times
+    computing the matchup matrix from scratch and fetching it cached.
+
+    Turns are paired far more often than real games would, so the turn
+    tables stay small; the matrix only reads the combat table.
+    """
+
+    name = 'matchups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=1000000)
+        parser.add_argument('--repeats', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def measure(self, rounds, repeats, seed, **options):
+        serializer = GamePieceSerializer(data=piece_document(), many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        self.random = Random(seed)
+        self.fill(rounds)
+
+        timings = []
+        for _ in range(repeats):
+            start = perf_counter()
+            matrix = MatchupMatrix.from_db()
+            timings.append(perf_counter() - start)
+
+        cache.clear()
+        get_matchups()
+        cached = []
+        for _ in range(repeats):
+            start = perf_counter()
+            get_matchups()
+            cached.append(perf_counter() - start)
+
+        return {
+            'rounds': game_models.SBBCombatRound.objects.count(),
+            'heroes': len(matrix.heroes),
+            'compute_ms': median(timings) * 1000,
+            'cached_ms': median(cached) * 1000,
+        }
+
+    def fill(self, rounds):
+        turns_needed = max(2, -(-rounds // OPPONENTS_PER_TURN))
+        games = -(-turns_needed // (PLAYERS_PER_GAME * TURNS_PER_PLAYER))
+        heroes = list(meta_models.SBBHero.objects.values_list('pk', flat=True))
+
+        with transaction.atomic():
+            stored = game_models.SBBGame.objects.bulk_create([
+                game_models.SBBGame(uuid=UUID(int=self.random.getrandbits(128)))
+                for _ in range(games)
+            ])
+            players = meta_models.SBBPlayer.objects.bulk_create([
+                meta_models.SBBPlayer(
+                    account_id=f'{self.random.getrandbits(64):016X}')
+                for _ in range(games * PLAYERS_PER_GAME)
+            ])
+            participants = game_models.SBBGameParticipant.objects.bulk_create(
+                [
+                    game_models.SBBGameParticipant(
+                        match=stored[index // PLAYERS_PER_GAME], player=player)
+                    for index, player in enumerate(players)
+                ],
+                batch_size=500
+            )
+            turns = game_models.SBBGameTurn.objects.bulk_create(
+                [
+                    game_models.SBBGameTurn(
+                        participant=participant, turn_num=turn_num,
+                        hero_id=self.random.choice(heroes))
+                    for participant in participants
+                    for turn_num in range(1, TURNS_PER_PLAYER + 1)
+                ],
+                batch_size=500
+            )
+
+            # Plain executemany: a million model instances would take
+            # longer to build than the matrix takes to compute.
+            table = game_models.SBBCombatRound._meta.db_table
+            rows = []
+            for index in range(rounds):
+                offset = index // len(turns) + 1
+                turn = turns[index % len(turns)]
+                opponent_turn = turns[(index % len(turns) + offset) % len(turns)]
+                win = self.random.uniform(0, 100)
+                tie = self.random.uniform(0, 100 - win)
+                rows.append((
+                    turn.pk, opponent_turn.pk, turn.hero_id,
+                    opponent_turn.hero_id, win, tie, 100 - win - tie,
+                    self.random.uniform(0, 20), self.random.uniform(0, 20)
+                ))
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f'INSERT INTO {table} (turn_id, opponent_turn_id, '
+                    f'hero_id, opponent_hero_id, win_percent, tie_percent, '
+                    f'loss_percent, win_damage, loss_damage) '
+                    f'VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)',
+                    rows
+                )
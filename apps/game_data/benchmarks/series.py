@@ -0,0 +1,84 @@
+"""
+Loading HP curves from the packed series against one row per turn.
+"""
+from statistics import median
+from time import perf_counter
+
+from apps.game_data import series
+from apps.game_data.benchmarks.base import Benchmark
+from apps.game_data.benchmarks.synthetic import (
+    MetaRollupGenerator,
+    piece_document
+)
+from apps.game_data.ingest.pipeline import RollupIngestor
+from apps.game_data.models import game as game_models
+from apps.game_data.serializers.meta import GamePieceSerializer
+
+
+def turn_curves(field):
+    """`SBBGameParticipant.objects.series_matrix` from the turn rows."""
+    by_participant = {
+        pk: {} for pk in game_models.SBBGameParticipant.objects
+        .values_list('pk', flat=True).iterator()
+    }
+    for participant_id, turn_num, value in (
+        game_models.SBBGameTurn.objects
+        .values_list('participant_id', 'turn_num', field).iterator()
+    ):
+        by_participant[participant_id][turn_num] = value
+    pks = list(by_participant)
+    return (pks, *series.matrix(
+        series.merged(b'', by_participant[pk]) for pk in pks))
+
+
+class SeriesBenchmark(Benchmark):
+    """
+    Ingests `days` of `MetaRollupGenerator` roll-ups, then times loading
+    every participant's HP curve through `series_matrix` and through the
+    turn table. Both have to come out the same.
+    """
+
+    name = 'series'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30)
+        parser.add_argument('--games-per-day', type=int, default=50)
+        parser.add_argument('--repeats', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def measure(self, days, games_per_day, repeats, seed, **options):
+        serializer = GamePieceSerializer(data=piece_document(), many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        RollupIngestor(batch_size=50).ingest_members(
+            MetaRollupGenerator(seed=seed, povs=1).members(
+                days * games_per_day))
+
+        participants = game_models.SBBGameParticipant.objects
+        results = {
+            'participants': participants.count(),
+            'turns': game_models.SBBGameTurn.objects.count(),
+        }
+        loaded = {}
+        for label, load in (
+            ('series', lambda: participants.series_matrix('hp')),
+            ('turns', lambda: turn_curves('hp')),
+        ):
+            times = []
+            for _ in range(repeats):
+                start = perf_counter()
+                loaded[label] = load()
+                times.append(perf_counter() - start)
+            results[f'{label}_ms'] = median(times) * 1000
+
+        pks, rows, width = loaded['series']
+        by_pk = dict(zip(pks, range(0, len(rows), width or 1)))
+        turn_pks, turn_rows, turn_width = loaded['turns']
+        if width != turn_width or any(
+            rows[by_pk[pk]:by_pk[pk] + width]
+            != turn_rows[index * width:(index + 1) * width]
+            for index, pk in enumerate(turn_pks)
+        ):
+            raise AssertionError('The series disagree with the turns.')
+        results['width'] = width
+        return results
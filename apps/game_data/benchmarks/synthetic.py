@@ -0,0 +1,178 @@
+"""
+Deterministic synthetic roll-ups, built from the sample JSON files.
+"""
+from io import BytesIO
+from pathlib import Path
+from random import Random
+from uuid import UUID
+import json
+import os
+import tarfile
+
+SAMPLES_DIR = Path(__file__).resolve().parent.parent / 'tests' / 'json_samples'
+
+
+def load_sample(file_name):
+    with open(os.path.join(SAMPLES_DIR, file_name), 'r') as json_file:
+        return json.load(json_file)
+
+
+def piece_document():
+    """
+    meta_sample.json plus the golden characters it leaves out.
+    The live template-ids.json lists every golden unit one id after its
+    base unit, and game JSONs reference them.
+    """
+    json_data = load_sample('meta_sample.json')
+    for key, value in list(json_data.items()):
+        if value['Id'].startswith('SBB_CHARACTER_'):
+            json_data[str(int(key) + 1)] = {
+                'Id': f"GOLDEN_{value['Id']}", 'Name': value['Name']}
+    return json_data
+
+
+def pov_of(json_data, account_id, placement):
+    """The same game's JSON as seen from another player's tracker."""
+    new_data = json.loads(json.dumps(json_data))
+    new_data['player-id'] = account_id
+    new_data['placement'] = placement
+    new_data['combat-info'] = [
+        combat for combat in new_data['combat-info'] if account_id in combat]
+    return new_data
+
+
+class RollupGenerator:
+    """
+    Makes games shaped like full_sample.json with fresh match and account
+    ids, and boards, spells, treasures and heroes drawn from the template
+    ids in meta_sample.json. The same seed always gives the same games.
+    """
+
+    def __init__(self, seed=0, povs=1):
+        self.random = Random(seed)
+        self.povs = povs
+        self.template = load_sample('full_sample.json')
+
+        pieces = load_sample('meta_sample.json')
+        by_type = {}
+        for key, value in pieces.items():
+            piece_type = value['Id'].split('_')[1]
+            by_type.setdefault(piece_type, []).append(int(key))
+        self.characters = sorted(by_type['CHARACTER'])
+        self.heroes = sorted(by_type['HERO'])
+        self.spells = sorted(by_type['SPELL'])
+        self.treasures = sorted(by_type['TREASURE'])
+
+    def account_id(self):
+        return f'{self.random.getrandbits(64):016X}'
+
+    def game(self):
+        """One game, from the same POV as the template."""
+        choice = self.random.choice
+        as_text = json.dumps(self.template)
+        for player in self.template['players']:
+            as_text = as_text.replace(player['player-id'], self.account_id())
+        json_data = json.loads(as_text)
+
+        json_data['match-id'] = str(UUID(int=self.random.getrandbits(128)))
+        json_data['placement'] = self.random.randint(1, 8)
+        json_data['possibly-mythic'] = self.random.random() < 0.1
+
+        for player in json_data['players']:
+            hero = str(choice(self.heroes))
+            player['heroes'] = [hero] * len(player['heroes'])
+
+        for combat in json_data['combat-info']:
+            for key, board in combat.items():
+                if key in ('round', 'sim-results'):
+                    continue
+                for character in board['characters']:
+                    self.character(character, combat['round'])
+                board['spells'] = [
+                    str(choice(self.spells)) for _ in board['spells']]
+                board['treasures'] = [
+                    str(choice(self.treasures)) for _ in board['treasures']]
+
+        return json_data
+
+    def character(self, character, turn):
+        """Fill in one board character for `turn`."""
+        template_id = self.random.choice(self.characters)
+        if character['golden']:
+            template_id = template_id + 1
+        character['id'] = str(template_id)
+        character['attack'] = self.random.randint(0, 60)
+        character['health'] = self.random.randint(1, 60)
+
+    def members(self, games):
+        """
+        Yield `(name, content)` tar members for `games` games, with each
+        game seen by up to `povs` of the players it fought.
+        """
+        for index in range(games):
+            json_data = self.game()
+            opponents = [
+                player['player-id'] for player in json_data['players']
+                if player['player-id'] != json_data['player-id']
+                and any(player['player-id'] in combat
+                        for combat in json_data['combat-info'])
+            ]
+            for pov in range(min(self.povs, len(opponents) + 1)):
+                if pov:
+                    member_data = pov_of(
+                        json_data,
+                        opponents[pov - 1],
+                        self.random.randint(1, 8)
+                    )
+                else:
+                    member_data = json_data
+                yield (
+                    f'{index}-{pov}.json',
+                    json.dumps(member_data).encode()
+                )
+
+
+class MetaRollupGenerator(RollupGenerator):
+    """
+    A `RollupGenerator` whose boards repeat like real ones do. Early on
+    everyone buys from the same few popular, cheap characters and they
+    sit at their base stats, picking up buffs only from turn
+    `BUFFS_FROM`. So early boards turn up again and again.
+    """
+
+    BUFFS_FROM = 4
+
+    def __init__(self, seed=0, povs=1):
+        super().__init__(seed, povs)
+        self.stats = {
+            template_id: (self.random.randint(1, 6), self.random.randint(1, 6))
+            for template_id in self.characters
+        }
+        # Zipf-ish: the nth character turns up about 1/n as often.
+        self.popular = self.characters[:]
+        self.random.shuffle(self.popular)
+        self.weights = [1 / rank for rank in range(1, len(self.popular) + 1)]
+
+    def character(self, character, turn):
+        # The shop offers more of the pool as the game goes on.
+        offered = 6 * turn
+        template_id, = self.random.choices(
+            self.popular[:offered], self.weights[:offered])
+        attack, health = self.stats[template_id]
+        buffs = 2 * max(0, turn - self.BUFFS_FROM + 1)
+        attack = attack + self.random.randint(0, buffs)
+        health = health + self.random.randint(0, buffs)
+        if character['golden']:
+            template_id, attack, health = template_id + 1, attack * 2, health * 2
+        character['id'] = str(template_id)
+        character['attack'] = attack
+        character['health'] = health
+
+
+def write_rollup(path, members):
+    """Write `(name, content)` pairs to a gzipped tarball at `path`."""
+    with tarfile.open(path, mode='w:gz') as tarball:
+        for name, content in members:
+            tarblock = tarfile.TarInfo(name=name)
+            tarblock.size = len(content)
+            tarball.addfile(tarblock, BytesIO(content))
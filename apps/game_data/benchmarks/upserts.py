@@ -0,0 +1,146 @@
+"""
+Lookup and upsert cost on the hot ingest keys as the tables grow.
+"""
+from random import Random
+from statistics import median
+from time import perf_counter
+from uuid import UUID
+
+from django.db import transaction
+
+from apps.game_data.benchmarks.base import Benchmark
+from apps.game_data.ingest.bulk import get_or_create_many
+from apps.game_data.models import (
+    game as game_models,
+    meta as meta_models
+)
+
+PLAYERS_PER_GAME = 8
+TURNS_PER_PLAYER = 15
+
+
+class UpsertBenchmark(Benchmark):
+    """
+    Fills the player, participant and turn tables up to each of `sizes`
+    turn rows, and at each size times what ingest does per game: resolving
+    a lobby's players and participants, and upserting its turns, both for
+    a game that's already stored and for a new one.
+
+    Metrics are named `<metric>_<turn rows>`, so runs at the same sizes
+    can be compared.
+    """
+
+    name = 'upserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='10000,100000,1000000',
+            help='Comma separated turn table sizes to measure at.'
+        )
+        parser.add_argument('--repeats', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def measure(self, sizes, repeats, seed, **options):
+        self.random = Random(seed)
+        self.games = []
+        results = {}
+        for size in sorted(int(size) for size in sizes.split(',')):
+            self.grow(size)
+            for metric, values in self.sample(repeats).items():
+                results[f'{metric}_{size}'] = median(values) * 1000
+        return results
+
+    def account_ids(self):
+        """A lobby drawn from a pool that grows with the tables."""
+        pool = max(PLAYERS_PER_GAME, len(self.games) * 2)
+        return [
+            f'{index:016X}'
+            for index in self.random.sample(range(pool), PLAYERS_PER_GAME)
+        ]
+
+    def new_game(self):
+        return game_models.SBBGame(
+            uuid=UUID(int=self.random.getrandbits(128)))
+
+    def grow(self, size, chunk=500):
+        """Insert whole games until there are `size` turns."""
+        games_needed = size // (PLAYERS_PER_GAME * TURNS_PER_PLAYER)
+        while len(self.games) < games_needed:
+            count = min(chunk, games_needed - len(self.games))
+            with transaction.atomic():
+                games = game_models.SBBGame.objects.bulk_create(
+                    [self.new_game() for _ in range(count)])
+                participants = []
+                for game in games:
+                    players = meta_models.SBBPlayer.objects.resolve_many(
+                        self.account_ids())
+                    participants.extend(
+                        game_models.SBBGameParticipant(match=game, player=player)
+                        for player in players.values()
+                    )
+                participants = game_models.SBBGameParticipant.objects.bulk_create(
+                    participants, batch_size=chunk)
+                game_models.SBBGameTurn.objects.bulk_create(
+                    [
+                        game_models.SBBGameTurn(
+                            participant=participant, turn_num=turn_num)
+                        for participant in participants
+                        for turn_num in range(1, TURNS_PER_PLAYER + 1)
+                    ],
+                    batch_size=chunk
+                )
+            self.games.extend(games)
+
+    def sample(self, repeats):
+        timings = {
+            'resolve_players_ms': [],
+            'resolve_participants_ms': [],
+            'upsert_stored_turns_ms': [],
+            'upsert_new_turns_ms': [],
+        }
+        for _ in range(repeats):
+            with transaction.atomic():
+                self.time(timings, 'resolve_players_ms',
+                          self.resolve_players)
+                game = self.random.choice(self.games)
+                self.time(timings, 'resolve_participants_ms',
+                          self.resolve_participants, game)
+                self.time(timings, 'upsert_stored_turns_ms',
+                          self.upsert_turns, game)
+
+                new_game = self.new_game()
+                new_game.save()
+                self.resolve_participants(new_game)
+                self.time(timings, 'upsert_new_turns_ms',
+                          self.upsert_turns, new_game)
+                # Keep the tables at the size being measured.
+                transaction.set_rollback(True)
+        return timings
+
+    @staticmethod
+    def time(timings, metric, func, *args):
+        start = perf_counter()
+        func(*args)
+        timings[metric].append(perf_counter() - start)
+
+    def resolve_players(self):
+        return meta_models.SBBPlayer.objects.resolve_many(self.account_ids())
+
+    def resolve_participants(self, game):
+        return game_models.SBBGameParticipant.objects.resolve_many(
+            game, self.resolve_players())
+
+    def upsert_turns(self, game):
+        participants = game_models.SBBGameParticipant.objects.filter(
+            match=game).values_list('pk', flat=True)
+        return get_or_create_many(
+            game_models.SBBGameTurn.objects.filter(participant__match=game),
+            [
+                (participant, turn_num)
+                for participant in participants
+                for turn_num in range(1, TURNS_PER_PLAYER + 1)
+            ],
+            key=lambda obj: (obj.participant_id, obj.turn_num),
+            build=lambda key: game_models.SBBGameTurn(
+                participant_id=key[0], turn_num=key[1])
+        )
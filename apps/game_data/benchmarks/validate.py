@@ -0,0 +1,95 @@
+"""
+Validation cost per roll-up JSON: new serializers, one reused serializer
+and the fast path.
+"""
+from time import perf_counter
+import json
+
+from apps.game_data.benchmarks.base import Benchmark
+from apps.game_data.benchmarks.synthetic import RollupGenerator, piece_document
+from apps.game_data.ingest.fastpath import RollupValidator
+from apps.game_data.ingest.records import GameRecord
+from apps.game_data.serializers.game import GameTarSerializer
+from apps.game_data.serializers.meta import GamePieceSerializer
+from apps.game_data.serializers.utils import nested_serializers
+
+
+def drf_validate(json_data):
+    serializer = GameTarSerializer(data=json_data)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
+def fast_validate(json_data):
+    return RollupValidator().validate(json_data)
+
+
+class ReusedSerializer:
+    """One `GameTarSerializer`, reset for every document."""
+
+    def __init__(self):
+        self.serializer = GameTarSerializer()
+
+    def __call__(self, json_data):
+        serializer = self.serializer.reset(data=json_data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+
+def setup_seconds(documents, make_ready):
+    """Time to get a serializer, fields and all, ready for each document."""
+    start = perf_counter()
+    for json_data in documents:
+        list(nested_serializers(make_ready(json_data)))
+    return perf_counter() - start
+
+
+class ValidatorBenchmark(Benchmark):
+    """
+    Takes synthetic roll-up JSONs from parsed to `GameRecord` with each
+    validator, without writing anything. Documents are parsed up front
+    so only validation is timed.
+
+    `setup_us_*` is what it costs per document to get a serializer
+    ready, before any validating.
+    """
+
+    name = 'validators'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--games', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def measure(self, games, seed, **options):
+        serializer = GamePieceSerializer(data=piece_document(), many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        contents = [
+            content for _, content in RollupGenerator(seed).members(games)]
+        validators = {
+            'drf': drf_validate,
+            'drf_reused': ReusedSerializer(),
+            'fast': fast_validate,
+        }
+        results = {'games': len(contents)}
+        for name, validate in validators.items():
+            # The serializers pop keys out of what they're given.
+            documents = [json.loads(content) for content in contents]
+            start = perf_counter()
+            for json_data in documents:
+                GameRecord.from_validated_data(validate(json_data))
+            elapsed = perf_counter() - start
+            results[f'docs_per_sec_{name}'] = len(documents) / elapsed
+            results[f'ms_per_doc_{name}'] = elapsed * 1000 / len(documents)
+        results['speedup'] = (
+            results['docs_per_sec_fast'] / results['docs_per_sec_drf'])
+
+        reused = GameTarSerializer()
+        for name, make_ready in (
+            ('drf', lambda json_data: GameTarSerializer(data=json_data)),
+            ('drf_reused', lambda json_data: reused.reset(data=json_data)),
+        ):
+            results[f'setup_us_{name}'] = (
+                setup_seconds(documents, make_ready) * 1e6 / len(documents))
+        return results
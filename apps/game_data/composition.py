@@ -0,0 +1,302 @@
+"""
+Finding turns by what was on the board, through the composition index.
+"""
+from functools import reduce
+from operator import and_, or_
+
+from django.db import transaction
+
+from apps.game_data.models import game as game_models
+from apps.game_data.models.composition import (
+    BLOCK_BITS,
+    SBBCharacterPosting,
+    SBBTurnNumberPosting
+)
+from apps.game_data.registry import refresh_registry
+
+BLOCK_MASK = (1 << BLOCK_BITS) - 1
+
+
+def to_bytes(bits):
+    return bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+
+
+def from_bytes(data):
+    return int.from_bytes(data, 'little')
+
+
+def offsets(bits):
+    """Positions of the set bits in `bits`, lowest first."""
+    found = []
+    position = -1
+    # Scanning the binary string beats shifting a big int one bit at a
+    # time by a long way.
+    digits = bin(bits)[:1:-1]
+    while True:
+        position = digits.find('1', position + 1)
+        if position == -1:
+            return found
+        found.append(position)
+
+
+def add_turn(postings, key, turn_id, index=0, width=1):
+    """Set `turn_id`'s bit in `postings[key][index]`."""
+    bitmaps = postings.setdefault(key, [0] * width)
+    bitmaps[index] |= 1 << (turn_id & BLOCK_MASK)
+
+
+def postings_for(turns, characters):
+    """
+    `(character postings, turn number postings)` as dicts of lists of
+    int bitmaps, from `(turn pk, turn_num)` and `(turn pk, character pk,
+    golden)` rows.
+    """
+    by_character = {}
+    by_turn_num = {}
+    for turn_id, turn_num in turns:
+        add_turn(by_turn_num, (turn_num, turn_id >> BLOCK_BITS), turn_id)
+    for turn_id, character_id, golden in characters:
+        key = (character_id, turn_id >> BLOCK_BITS)
+        add_turn(by_character, key, turn_id, width=2)
+        if golden:
+            add_turn(by_character, key, turn_id, index=1, width=2)
+    return by_character, by_turn_num
+
+
+def stored_postings(model, key_fields, bit_fields, queryset=None):
+    """key -> list of int bitmaps, for every row of `model`."""
+    queryset = model.objects.all() if queryset is None else queryset
+    keys = len(key_fields)
+    return {
+        row[:keys]: [from_bytes(data) for data in row[keys:]]
+        for row in queryset.values_list(*key_fields, *bit_fields).iterator()
+    }
+
+
+def merge_postings(postings, key_fields, bit_fields, cleared, added):
+    """
+    Clear the `cleared` bits from each of `postings` and set the ones for
+    its key in `added`, popping them. Returns `(changed, emptied pks)`.
+    """
+    changed = []
+    emptied = []
+    for posting in postings:
+        key = tuple(getattr(posting, field) for field in key_fields)
+        kept = ~cleared.get(posting.block, 0)
+        old = [from_bytes(getattr(posting, field)) for field in bit_fields]
+        new = [
+            bits & kept | extra
+            for bits, extra in zip(old, added.pop(key, [0] * len(old)))
+        ]
+        if new == old:
+            continue
+        if not new[0]:
+            emptied.append(posting.pk)
+            continue
+        for field, bits in zip(bit_fields, new):
+            setattr(posting, field, to_bytes(bits))
+        changed.append(posting)
+    return changed, emptied
+
+
+def sync_postings(model, key_fields, bit_fields, cleared, added):
+    """
+    Clear the `cleared` bits, block -> bitmap, from `model`'s rows for
+    those blocks, then set `added`, key -> list of bitmaps. Only rows
+    that come out different are written.
+
+    Many games share a block, so other writers may be changing the same
+    rows. They're locked before being read, and a row another writer
+    inserted first gets merged into rather than failing the insert.
+    """
+    added = dict(added)
+    blocks = set(cleared) | {key[-1] for key in added}
+    with transaction.atomic(savepoint=False):
+        changed, emptied = merge_postings(
+            model.objects.filter(block__in=blocks)
+            .select_for_update().order_by(*key_fields),
+            key_fields, bit_fields, cleared, added
+        )
+        if added:
+            model.objects.bulk_create([
+                model(
+                    **dict(zip(key_fields, key)),
+                    **{field: to_bytes(bits)
+                       for field, bits in zip(bit_fields, bitmaps)}
+                )
+                for key, bitmaps in added.items()
+            ], batch_size=500, ignore_conflicts=True)
+            # Rows just inserted merge to themselves and are left alone.
+            raced, _ = merge_postings(
+                [
+                    posting for posting in
+                    model.objects.filter(block__in={key[-1] for key in added})
+                    .select_for_update().order_by(*key_fields)
+                    if tuple(getattr(posting, field) for field in key_fields)
+                    in added
+                ],
+                key_fields, bit_fields, cleared, added
+            )
+            changed.extend(raced)
+        if changed:
+            model.objects.bulk_update(changed, bit_fields, batch_size=500)
+        if emptied:
+            model.objects.filter(pk__in=emptied).delete()
+
+
+CHARACTER_KEY = ('character_id', 'block')
+CHARACTER_BITS = ('turns', 'golden_turns')
+TURN_NUMBER_KEY = ('turn_num', 'block')
+TURN_NUMBER_BITS = ('turns',)
+
+
+def refresh(games):
+    """
+    Bring the index in line with every board stored for `games`. A
+    handful of queries however many games there are, so the ingest
+    pipeline runs it once per batch. Call it inside the writing
+    transaction.
+    """
+    turns = list(
+        game_models.SBBGameTurn.objects
+        .filter(participant__match__in=games)
+        .values_list('pk', 'turn_num')
+    )
+    if not turns:
+        return
+    cleared = {}
+    for turn_id, _ in turns:
+        block = turn_id >> BLOCK_BITS
+        cleared[block] = cleared.get(block, 0) | 1 << (turn_id & BLOCK_MASK)
+
+    by_character, by_turn_num = postings_for(
+        turns,
+        game_models.SBBBoard.objects.character_rows(
+            game_models.SBBGameTurn.objects.filter(
+                participant__match__in=games),
+            'base_character_id', 'golden'
+        )
+    )
+    sync_postings(
+        SBBCharacterPosting, CHARACTER_KEY, CHARACTER_BITS, cleared,
+        by_character)
+    sync_postings(
+        SBBTurnNumberPosting, TURN_NUMBER_KEY, TURN_NUMBER_BITS, cleared,
+        by_turn_num)
+
+
+def computed():
+    """`postings_for` every stored turn and board."""
+    return postings_for(
+        game_models.SBBGameTurn.objects
+        .values_list('pk', 'turn_num').order_by().iterator(),
+        game_models.SBBBoard.objects.character_rows(
+            None, 'base_character_id', 'golden').iterator()
+    )
+
+
+def stored():
+    """The index as stored, laid out like `computed()`."""
+    return (
+        stored_postings(SBBCharacterPosting, CHARACTER_KEY, CHARACTER_BITS),
+        stored_postings(
+            SBBTurnNumberPosting, TURN_NUMBER_KEY, TURN_NUMBER_BITS)
+    )
+
+
+def mismatches():
+    """
+    `(model, key, stored, computed)` for every posting where the index
+    and the stored boards disagree.
+    """
+    found = []
+    models = (SBBCharacterPosting, SBBTurnNumberPosting)
+    for model, have, want in zip(models, stored(), computed()):
+        for key in sorted(have.keys() | want.keys()):
+            pair = (have.get(key), want.get(key))
+            if pair[0] != pair[1]:
+                found.append((model, key, *pair))
+    return found
+
+
+def rebuild():
+    """Replace the whole index with one worked out from every board."""
+    by_character, by_turn_num = computed()
+    with transaction.atomic():
+        SBBCharacterPosting.objects.all().delete()
+        SBBTurnNumberPosting.objects.all().delete()
+        sync_postings(
+            SBBCharacterPosting, CHARACTER_KEY, CHARACTER_BITS, {},
+            by_character)
+        sync_postings(
+            SBBTurnNumberPosting, TURN_NUMBER_KEY, TURN_NUMBER_BITS, {},
+            by_turn_num)
+
+
+def character_pks(characters):
+    """
+    Character template ids -> pks. None if any of them isn't a known
+    character, as then nothing can match.
+    """
+    registry = refresh_registry()
+    pks = set()
+    for template_id in characters:
+        piece = registry.get('CHARACTER', template_id)
+        if piece is None:
+            return None
+        pks.add(piece.pk)
+    return pks
+
+
+def find_turns(characters, golden=False, turns=None):
+    """
+    Sorted pks of every `SBBGameTurn` whose board held all of
+    `characters`, template ids. With `golden`, only golden copies count.
+    `turns` narrows it to turn numbers in any collection of them, eg.
+    `range(5, 9)`.
+
+    Reads each character's postings and ANDs them block by block, so
+    the cost follows how often the characters turn up rather than the
+    size of the character table. Games written other than through
+    `RollupIngestor` only show up once `refresh`ed or rebuilt.
+    """
+    characters = set(characters)
+    if not characters:
+        raise ValueError('Need at least one character to look for.')
+    pks = character_pks(characters)
+    if pks is None:
+        return []
+
+    field = 'golden_turns' if golden else 'turns'
+    by_block = {}
+    for block, data in (
+        SBBCharacterPosting.objects
+        .filter(character_id__in=pks)
+        .values_list('block', field)
+    ):
+        by_block.setdefault(block, []).append(from_bytes(data))
+    # A block missing any one of the characters can't match.
+    matched = {
+        block: reduce(and_, bitmaps)
+        for block, bitmaps in by_block.items() if len(bitmaps) == len(pks)
+    }
+    matched = {block: bits for block, bits in matched.items() if bits}
+
+    if turns is not None and matched:
+        numbered = {}
+        for block, data in (
+            SBBTurnNumberPosting.objects
+            .filter(block__in=matched, turn_num__in=list(turns))
+            .values_list('block', 'turns')
+        ):
+            numbered.setdefault(block, []).append(from_bytes(data))
+        matched = {
+            block: bits & reduce(or_, numbered[block])
+            for block, bits in matched.items() if block in numbered
+        }
+
+    return [
+        block << BLOCK_BITS | offset
+        for block in sorted(matched)
+        for offset in offsets(matched[block])
+    ]
@@ -0,0 +1,145 @@
+"""
+Streaming turns and boards out as flat NDJSON or CSV rows.
+
+Rows are read with `QuerySet.iterator`, so neither the export command
+nor the export endpoint holds more than a chunk of them at once,
+however big the database.
+"""
+from itertools import chain
+import csv
+import json
+
+from apps.game_data.models import game as game_models
+
+CHUNK_SIZE = 2000
+
+# kind: (model, path to the game, ((column, path), ...))
+EXPORTS = {
+    'turns': (
+        game_models.SBBGameTurn,
+        'participant__match',
+        (
+            ('match-id', 'participant__match__uuid'),
+            ('player-id', 'participant__player__account_id'),
+            ('turn', 'turn_num'),
+            ('hero', 'hero__template_id'),
+            ('hp', 'hp'),
+            ('level', 'level'),
+            ('exp', 'exp'),
+        ),
+    ),
+    'boards': (
+        game_models.SBBGameCharacter,
+        'game_turn__participant__match',
+        (
+            ('match-id', 'game_turn__participant__match__uuid'),
+            ('player-id', 'game_turn__participant__player__account_id'),
+            ('turn', 'game_turn__turn_num'),
+            ('character', 'base_character__template_id'),
+            ('attack', 'attack'),
+            ('health', 'health'),
+            ('golden', 'golden'),
+            ('position', 'position'),
+        ),
+    ),
+}
+
+
+# kind: (queryset, path to the game, paths to the same columns as EXPORTS)
+# for rows kept elsewhere, here boards stored as snapshots.
+SNAPSHOT_EXPORTS = {
+    'boards': (
+        game_models.SBBGameTurn.objects.filter(board__isnull=False),
+        'participant__match',
+        (
+            'participant__match__uuid',
+            'participant__player__account_id',
+            'turn_num',
+            'board__characters__base_character__template_id',
+            'board__characters__attack',
+            'board__characters__health',
+            'board__characters__golden',
+            'board__characters__position',
+        ),
+    ),
+}
+
+
+def export_columns(kind):
+    return [column for column, _ in EXPORTS[kind][2]]
+
+
+def export_rows(kind, games=None, chunk_size=CHUNK_SIZE):
+    """
+    Every row of `kind` as a tuple, in primary key order, optionally
+    only for `games` (a queryset of SBBGame). Boards stored as snapshots
+    follow the rest, in turn order.
+    """
+    model_cls, game_path, columns = EXPORTS[kind]
+    sources = [(
+        model_cls.objects.order_by('pk'),
+        game_path,
+        [path for _, path in columns]
+    )]
+    if kind in SNAPSHOT_EXPORTS:
+        queryset, game_path, paths = SNAPSHOT_EXPORTS[kind]
+        sources.append((
+            queryset.order_by('pk', 'board__characters__position'),
+            game_path,
+            paths
+        ))
+
+    rows = []
+    for queryset, game_path, paths in sources:
+        queryset = queryset.values_list(*paths)
+        if games is not None:
+            queryset = queryset.filter(**{f'{game_path}__in': games})
+        rows.append(queryset.iterator(chunk_size=chunk_size))
+    return chain.from_iterable(rows)
+
+
+def ndjson_lines(columns, rows):
+    encode = json.JSONEncoder(default=str, separators=(',', ':')).encode
+    for row in rows:
+        yield encode(dict(zip(columns, row))) + '\n'
+
+
+class Echo:
+    """File-like object that hands back what's written, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(columns, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+# format: (line writer, content type)
+FORMATS = {
+    'ndjson': (ndjson_lines, 'application/x-ndjson'),
+    'csv': (csv_lines, 'text/csv'),
+}
+
+
+def joined(lines, size):
+    """Lines joined `size` at a time, so whoever writes them out does so
+    in a few big pieces rather than many small ones."""
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) == size:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def export(kind, file_format, games=None, chunk_size=CHUNK_SIZE):
+    """The export of `kind` in `file_format`, as a stream of text."""
+    lines = FORMATS[file_format][0](
+        export_columns(kind), export_rows(kind, games, chunk_size))
+    return joined(lines, chunk_size)
@@ -0,0 +1,74 @@
+"""
+Filtering and paging for the game list API.
+"""
+from django.db.models import Q
+from rest_framework import filters, pagination
+
+from apps.game_data.models import game as game_models
+from apps.game_data.registry import refresh_registry
+from apps.game_data.serializers.api import GameFilterSerializer
+
+
+def piece_pk(piece_type, template_id):
+    """A piece's primary key from the registry, or None if there's no such piece."""
+    # Stamp checked, so an unknown id in a query string never costs more
+    # than the one query.
+    piece = refresh_registry().get(piece_type, template_id)
+    return None if piece is None else piece.pk
+
+
+def filter_games(queryset, player=None, hero=None, placement=None,
+                 character=None):
+    """
+    Narrow `queryset` to games with a participant matching every one of
+    the given filters: their account id, a hero they played, where they
+    placed, and a character (by template id) that was ever on their
+    board. Each filter is answered from an index ending in the game or
+    participant, see the Meta of the game models.
+    """
+    participants = game_models.SBBGameParticipant.objects.all()
+    if player is not None:
+        participants = participants.filter(player__account_id=player)
+    if placement is not None:
+        participants = participants.filter(placement=placement)
+    if hero is not None:
+        hero_pk = piece_pk('HERO', hero)
+        if hero_pk is None:
+            return queryset.none()
+        participants = participants.filter(sbbgameturn__hero_id=hero_pk)
+    if character is not None:
+        character_pk = piece_pk('CHARACTER', character)
+        if character_pk is None:
+            return queryset.none()
+        # Held on a board stored either as rows or as a snapshot.
+        participants = participants.filter(
+            Q(sbbgameturn__in=game_models.SBBGameCharacter.objects.filter(
+                base_character_id=character_pk).values('game_turn_id'))
+            | Q(sbbgameturn__board__in=game_models.SBBBoardCharacter.objects
+                .filter(base_character_id=character_pk).values('board_id'))
+        )
+
+    if participants.query.where:
+        queryset = queryset.filter(pk__in=participants.values('match_id'))
+    return queryset
+
+
+class GameFilterBackend(filters.BaseFilterBackend):
+    """Takes `player`, `hero`, `placement` and `character` query params."""
+
+    def filter_queryset(self, request, queryset, view):
+        serializer = GameFilterSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return filter_games(queryset, **serializer.validated_data)
+
+
+class GameCursorPagination(pagination.CursorPagination):
+    """
+    Newest first, paging on the primary key so a deep page costs the
+    same as the first.
+    """
+
+    ordering = '-id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
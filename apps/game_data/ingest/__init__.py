@@ -0,0 +1,3 @@
+"""
+Code for turning daily roll-up tarballs into game records.
+"""
@@ -0,0 +1,362 @@
+"""
+Writing whole games with bulk statements.
+"""
+from django.conf import settings
+from django.db import connection, transaction
+
+from apps.game_data.ingest.diff import (
+    CHARACTER_FIELDS,
+    SPELL_FIELDS,
+    TREASURE_FIELDS,
+    RowSync
+)
+from apps.game_data.ingest.records import OUTCOME_FIELDS
+from apps.game_data.registry import pieces_added
+from apps.game_data.series import SERIES_FIELDS
+from apps.game_data.models import (
+    game as game_models,
+    meta as meta_models,
+    stats as stats_models
+)
+
+
+def get_or_create_many(queryset, keys, key, build):
+    """
+    Bulk version of `get_or_create`.
+
+    Returns `({key: instance}, created_keys)` for every one of `keys`, with
+    rows that don't exist yet inserted in one statement. `key` maps a stored
+    instance to its lookup key and `build` makes an unsaved instance for a
+    missing key.
+    """
+    found = {key(obj): obj for obj in queryset}
+    missing = [item for item in dict.fromkeys(keys) if item not in found]
+    if missing:
+        # Leans on the table's unique constraint: rows someone else got to
+        # first are skipped rather than duplicated or raised on.
+        queryset.model.objects.bulk_create(
+            [build(item) for item in missing], ignore_conflicts=True)
+        # Which leaves no primary keys on what we built, so re-read.
+        found = {key(obj): obj for obj in queryset.all()}
+    return found, set(missing)
+
+
+def rows_by_turn(queryset, turn_field):
+    """Group board rows by the turn they belong to."""
+    grouped = {}
+    for obj in queryset:
+        grouped.setdefault(getattr(obj, turn_field), []).append(obj)
+    return grouped
+
+
+def lock_for_writing():
+    """
+    Take SQLite's write lock at the start of the current transaction.
+
+    A transaction that has already read can't wait for the lock when it
+    comes to write, it fails with "database is locked" straight away. With
+    several ingest processes that happens constantly, so grab the lock
+    first and let writers queue on the busy timeout instead.
+    """
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            # Never matches a row, but still opens a write transaction.
+            cursor.execute(
+                f'UPDATE {game_models.SBBGame._meta.db_table} '
+                f'SET id = id WHERE 0'
+            )
+
+
+class BulkGameWriter:
+    """
+    Persists a `GameRecord` with a fixed handful of statements per game.
+
+    Gives the same rows as `GameTarSerializer.save()`, but each table is
+    read and written once per game rather than once per player/turn/piece.
+    Boards are written as snapshots rather than rows with
+    SBB_BOARD_SNAPSHOTS on.
+    """
+
+    def write(self, record, players=None):
+        """
+        Store `record`. Pass `players`, an account_id -> SBBPlayer mapping
+        covering the record's players, if they've already been resolved.
+        """
+        with transaction.atomic():
+            lock_for_writing()
+            game, new = game_models.SBBGame.objects.get_or_create(
+                uuid=record.uuid)
+            players = self.write_players(record, players)
+            hero_stats = stats_models.SBBHeroStats.objects
+            before = set() if new else hero_stats.contributions(game)
+            participants = self.write_participants(game, record, players)
+            turns, created = self.write_turns(game, record, participants)
+            self.write_summaries(record, participants, turns)
+            if new:
+                # Every turn a new game has is one just written.
+                after = {
+                    (turn.participant_id, turn.hero_id,
+                     participants[account_id].placement)
+                    for (account_id, _), turn in turns.items()
+                    if turn.hero_id is not None
+                }
+            else:
+                after = hero_stats.contributions(game)
+            hero_stats.apply_change(before, after)
+            self.write_boards(record, turns, created)
+            self.write_combats(record, turns, created)
+        return game
+
+    def write_players(self, record, players=None):
+        """Returns account_id -> SBBPlayer."""
+        if players is None:
+            players = meta_models.SBBPlayer.objects.resolve_many(
+                record.account_ids)
+        for account_id, mythic in record.mythic.items():
+            player = players[account_id]
+            if player.possibly_mythic != mythic:
+                meta_models.SBBPlayer.objects.filter(
+                    pk=player.pk).update(possibly_mythic=mythic)
+                player.possibly_mythic = mythic
+        return players
+
+    def write_participants(self, game, record, players):
+        """
+        Returns account_id -> SBBGameParticipant. Placements are written
+        along with the series, by `write_summaries`.
+        """
+        return game_models.SBBGameParticipant.objects.resolve_many(
+            game,
+            {account_id: players[account_id]
+             for account_id in record.account_ids}
+        )
+
+    def write_summaries(self, record, participants, turns):
+        """
+        Set placements and pack the summarised `turns` into each
+        participant's series, updating every participant that changed in
+        one statement.
+        """
+        changed = {}
+        for account_id, placement in record.placements.items():
+            participant = participants[account_id]
+            if participant.placement != placement:
+                participant.placement = placement
+                changed[participant.pk] = participant
+
+        by_participant = {}
+        for account_id, turn_num in record.summaries:
+            by_participant.setdefault(account_id, []).append(
+                turns[(account_id, turn_num)])
+        for account_id, summarised in by_participant.items():
+            participant = participants[account_id]
+            if participant.set_series(summarised):
+                changed[participant.pk] = participant
+
+        if changed:
+            game_models.SBBGameParticipant.objects.bulk_update(
+                changed.values(), ['placement', *SERIES_FIELDS.values()])
+
+    def write_heroes(self, record):
+        """Returns template_id -> SBBHero for every hero in the summaries."""
+        template_ids = [summary[3] for summary in record.summaries.values()]
+        heroes, created = get_or_create_many(
+            meta_models.SBBHero.objects.filter(template_id__in=template_ids),
+            template_ids,
+            key=lambda obj: obj.template_id,
+            build=lambda template_id: meta_models.SBBHero(
+                template_id=template_id)
+        )
+        if created:
+            pieces_added()
+        return heroes
+
+    def write_turns(self, game, record, participants):
+        """
+        Returns `({(account_id, turn_num): SBBGameTurn}, created_keys)`,
+        with summary data (hero, hp, xp) applied to every turn.
+        """
+        heroes = self.write_heroes(record)
+        summaries = {}
+        for (account_id, turn_num), summary in record.summaries.items():
+            hp, level, exp, hero = summary
+            summaries[(participants[account_id].pk, turn_num)] = {
+                'hero_id': heroes[hero].pk,
+                'hp': hp,
+                'level': level,
+                'exp': exp
+            }
+
+        keys = [
+            (participants[account_id].pk, turn_num)
+            for account_id, turn_num
+            in list(record.summaries) + list(record.boards)
+        ]
+        by_participant, new_keys = get_or_create_many(
+            game_models.SBBGameTurn.objects.filter(participant__match=game),
+            keys,
+            key=lambda obj: (obj.participant_id, obj.turn_num),
+            build=lambda key: game_models.SBBGameTurn(
+                participant_id=key[0],
+                turn_num=key[1],
+                **summaries.get(key, {})
+            )
+        )
+
+        changed = []
+        new_heroes = []
+        for key, values in summaries.items():
+            if key in new_keys:
+                continue
+            turn_obj = by_participant[key]
+            if any(getattr(turn_obj, attr) != value
+                   for attr, value in values.items()):
+                if turn_obj.hero_id != values['hero_id']:
+                    new_heroes.append(turn_obj.pk)
+                for attr, value in values.items():
+                    setattr(turn_obj, attr, value)
+                changed.append(turn_obj)
+        if changed:
+            game_models.SBBGameTurn.objects.bulk_update(
+                changed, ['hero_id', 'hp', 'level', 'exp'])
+        if new_heroes:
+            game_models.SBBCombatRound.objects.refresh_heroes(new_heroes)
+
+        turns = {
+            (account_id, turn_num): by_participant[
+                (participants[account_id].pk, turn_num)]
+            for account_id, turn_num
+            in list(record.summaries) + list(record.boards)
+        }
+        created = {
+            (account_id, turn_num) for account_id, turn_num in turns
+            if (participants[account_id].pk, turn_num) in new_keys
+        }
+        return turns, created
+
+    def write_boards(self, record, turns, created):
+        """
+        Bring characters, spells and treasures in line with every board,
+        only writing the rows that differ from what's stored.
+        """
+        snapshots = settings.SBB_BOARD_SNAPSHOTS
+        treasure_model = game_models.SBBGameTurn.treasures.through
+        characters = RowSync(game_models.SBBGameCharacter, CHARACTER_FIELDS)
+        spells = RowSync(game_models.SBBGameSpell, SPELL_FIELDS)
+        treasures = RowSync(treasure_model, TREASURE_FIELDS)
+
+        # Only turns that were already there can have rows to compare with.
+        stored = [
+            turns[key].pk for key in record.boards if key not in created]
+        stored_characters = rows_by_turn(
+            game_models.SBBGameCharacter.objects.filter(
+                game_turn_id__in=stored),
+            'game_turn_id'
+        )
+        stored_spells = rows_by_turn(
+            game_models.SBBGameSpell.objects.filter(game_turn_id__in=stored),
+            'game_turn_id'
+        )
+        stored_treasures = rows_by_turn(
+            treasure_model.objects.filter(sbbgameturn_id__in=stored),
+            'sbbgameturn_id'
+        )
+
+        # key -> the board's character rows if it's to be a snapshot,
+        # None if it's kept as rows.
+        boards = {}
+        for key, board in record.boards.items():
+            turn_id = turns[key].pk
+
+            if board['characters'] is not None:
+                boards[key] = board['characters'] if snapshots else None
+                characters.add(
+                    stored_characters.get(turn_id, []),
+                    # Rows make way for a snapshot.
+                    [] if snapshots else board['characters'],
+                    game_turn_id=turn_id
+                )
+            if board['spells'] is not None:
+                spells.add(
+                    stored_spells.get(turn_id, []),
+                    [(spell, index)
+                     for index, spell in enumerate(board['spells'])],
+                    game_turn_id=turn_id
+                )
+            treasures.add(
+                stored_treasures.get(turn_id, []),
+                [(treasure,) for treasure in dict.fromkeys(board['treasures'])],
+                sbbgameturn_id=turn_id
+            )
+
+        characters.save()
+        spells.save()
+        treasures.save()
+        self.write_snapshots(turns, boards)
+
+    def write_snapshots(self, turns, boards):
+        """
+        Point every turn in `boards`, key -> character rows or None, at
+        the stored snapshot of its board, or at nothing for None.
+        """
+        snapshots = game_models.SBBBoard.objects.resolve_many(
+            rows for rows in boards.values() if rows)
+        changed = []
+        for key, rows in boards.items():
+            board_id = None
+            if rows:
+                board_id = snapshots[
+                    game_models.SBBBoard.objects.digest(rows)].pk
+            turn = turns[key]
+            if turn.board_id != board_id:
+                turn.board_id = board_id
+                changed.append(turn)
+        if changed:
+            game_models.SBBGameTurn.objects.bulk_update(changed, ['board_id'])
+
+    def write_combats(self, record, turns, created):
+        """
+        Pair up the turns that fought each round, setting or updating the
+        outcome where the record has one.
+        """
+        combats = {}
+        for (first, second, turn_num), outcome in record.combats.items():
+            combats[(turns[(first, turn_num)], turns[(second, turn_num)])] = \
+                outcome
+
+        stored = {}
+        if any((first, turn_num) not in created
+               for first, _, turn_num in record.combats):
+            stored = {
+                (combat.turn_id, combat.opponent_turn_id): combat
+                for combat in game_models.SBBCombatRound.objects.filter(
+                    turn_id__in=[turn.pk for turn, _ in combats])
+            }
+
+        added = []
+        changed = []
+        for (turn, opponent_turn), outcome in combats.items():
+            values = {
+                'hero_id': turn.hero_id,
+                'opponent_hero_id': opponent_turn.hero_id,
+            }
+            if outcome is not None:
+                values.update(zip(OUTCOME_FIELDS, outcome))
+
+            combat = stored.get((turn.pk, opponent_turn.pk))
+            if combat is None:
+                added.append(game_models.SBBCombatRound(
+                    turn_id=turn.pk, opponent_turn_id=opponent_turn.pk,
+                    **values))
+            elif any(getattr(combat, field) != value
+                     for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(combat, field, value)
+                changed.append(combat)
+
+        if added:
+            game_models.SBBCombatRound.objects.bulk_create(
+                added, ignore_conflicts=True)
+        if changed:
+            game_models.SBBCombatRound.objects.bulk_update(
+                changed, ('hero_id', 'opponent_hero_id', *OUTCOME_FIELDS))
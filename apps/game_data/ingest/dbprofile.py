@@ -0,0 +1,80 @@
+"""
+Database settings tuned for bulk loading, applied only while it runs.
+"""
+from contextlib import contextmanager
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# SQLite pragmas for a bulk load, in the order they're applied.
+#  - WAL only fsyncs at checkpoints rather than on every commit, and with
+#    synchronous=NORMAL a crash can lose the last commits but never
+#    corrupt the file. The ingest ledger picks up from there.
+#  - 256MB of page cache (negative means KiB) and memory-mapped reads.
+INGEST_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('cache_size', -256 * 1024),
+    ('mmap_size', 256 * 1024 * 1024),
+    ('temp_store', 'MEMORY'),
+)
+
+PROFILES = ('default', 'ingest')
+
+# SQLite refuses to change these inside a transaction.
+OUTSIDE_TRANSACTION = ('journal_mode', 'synchronous', 'temp_store')
+
+
+def pragma(connection, name, value=None):
+    """Read a pragma, or set it and return what SQLite reports back."""
+    with connection.cursor() as cursor:
+        if value is None:
+            cursor.execute(f'PRAGMA {name}')
+        else:
+            cursor.execute(f'PRAGMA {name} = {value}')
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def apply_pragmas(connection, pragmas):
+    for name, value in pragmas:
+        if name == 'journal_mode' and connection.is_in_memory_db():
+            # In-memory databases have no journal to speak of.
+            continue
+        if name in OUTSIDE_TRANSACTION and connection.in_atomic_block:
+            continue
+        pragma(connection, name, value)
+
+
+@contextmanager
+def ingest_profile(profile='ingest', using='default'):
+    """
+    Run the block with the database tuned for `profile`, then put back
+    what was there before. 'default' leaves everything alone, as do
+    backends other than SQLite.
+
+    Connections opened inside the block, including those of forked
+    ingest workers, get the same settings. Enter it outside of any
+    transaction, or journaling, sync and temp storage can't be changed.
+    """
+    connection = connections[using]
+    if profile == 'default' or connection.vendor != 'sqlite':
+        yield
+        return
+
+    previous = [
+        (name, pragma(connection, name)) for name, _ in INGEST_PRAGMAS]
+
+    def tune(sender, connection, **kwargs):
+        if connection.alias == using:
+            apply_pragmas(connection, INGEST_PRAGMAS)
+
+    apply_pragmas(connection, INGEST_PRAGMAS)
+    connection_created.connect(tune, weak=False)
+    try:
+        yield
+    finally:
+        connection_created.disconnect(tune)
+        # Closed inside the block, eg. before forking workers.
+        connection.ensure_connection()
+        apply_pragmas(connection, previous)
@@ -0,0 +1,89 @@
+"""
+Working out the fewest row writes to bring stored data up to date.
+"""
+
+# What stored board rows are compared on, in the order boards list them.
+CHARACTER_FIELDS = (
+    'base_character_id', 'attack', 'health', 'golden', 'position')
+SPELL_FIELDS = ('base_spell_id', 'order')
+TREASURE_FIELDS = ('sbbtreasure_id',)
+
+
+def diff_rows(existing, incoming, key):
+    """
+    Match stored rows against incoming values.
+
+    `existing` is a list of model instances, `incoming` a list of value
+    tuples and `key` maps an instance to the tuple it stores. Rows that
+    already hold an incoming value are left alone, leftover rows are
+    reused for leftover values, and the rest are inserted or deleted.
+
+    Returns `(updates, creates, deletes)`: a list of `(instance, values)`
+    pairs, a list of values and a list of instances.
+    """
+    unmatched = {}
+    for obj in existing:
+        unmatched.setdefault(key(obj), []).append(obj)
+
+    new_values = []
+    for values in incoming:
+        matches = unmatched.get(values)
+        if matches:
+            matches.pop()
+        else:
+            new_values.append(values)
+
+    leftovers = sorted(
+        (obj for objs in unmatched.values() for obj in objs),
+        key=lambda obj: obj.pk
+    )
+    updates = list(zip(leftovers, new_values))
+    return (
+        updates,
+        new_values[len(updates):],
+        leftovers[len(updates):]
+    )
+
+
+class RowSync:
+    """
+    Collects the differences between stored and incoming rows of one
+    table, a group (eg. a turn's board) at a time, then writes them all
+    with one delete, one bulk update and one bulk insert at most.
+
+    `fields` names the attributes that make up an incoming values tuple.
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+        self.updates = []
+        self.creates = []
+        self.deletes = []
+
+    def key(self, obj):
+        return tuple(getattr(obj, field) for field in self.fields)
+
+    def add(self, existing, incoming, **common):
+        """
+        Diff one group. `common` holds the field values shared by every
+        row in it, used for rows that need inserting.
+        """
+        updates, creates, deletes = diff_rows(existing, incoming, self.key)
+        for obj, values in updates:
+            for field, value in zip(self.fields, values):
+                setattr(obj, field, value)
+            self.updates.append(obj)
+        self.creates.extend(
+            self.model(**common, **dict(zip(self.fields, values)))
+            for values in creates
+        )
+        self.deletes.extend(obj.pk for obj in deletes)
+
+    def save(self):
+        if self.deletes:
+            self.model.objects.filter(pk__in=self.deletes).delete()
+        if self.updates:
+            self.model.objects.bulk_update(self.updates, self.fields)
+        if self.creates:
+            self.model.objects.bulk_create(self.creates)
@@ -0,0 +1,210 @@
+"""
+Fetching daily roll-ups from the bucket, through an on-disk cache.
+"""
+from contextlib import contextmanager
+from datetime import timedelta
+import hashlib
+import os
+import tempfile
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import requests
+
+# Statuses worth asking again for, the bucket's API gateway throws these.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# What the bucket answers for a day with no roll-up.
+MISSING_STATUSES = (403, 404)
+
+
+def date_range(start, end):
+    """Every date from `start` to `end`, both included."""
+    for offset in range((end - start).days + 1):
+        yield start + timedelta(days=offset)
+
+
+def rollup_session(pool_size=8, retries=3, backoff_factor=0.5):
+    """
+    A session with a connection pool big enough for `pool_size` threads,
+    retrying failed connections and server errors.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=('GET',),
+        # Hand back the last response rather than raise, callers check it.
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry
+    )
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class RollupCache:
+    """
+    Compressed roll-up tarballs stored by the sha256 of their content,
+    plus an index from roll-up date to hash. Days that happen to hold the
+    same bytes share one file.
+
+        <directory>/objects/ab/abcdef...tar.gz
+        <directory>/dates/2022-05-01
+    """
+
+    def __init__(self, directory):
+        self.directory = str(directory)
+        os.makedirs(os.path.join(self.directory, 'objects'), exist_ok=True)
+        os.makedirs(os.path.join(self.directory, 'dates'), exist_ok=True)
+
+    def object_path(self, content_hash):
+        return os.path.join(
+            self.directory, 'objects', content_hash[:2],
+            f'{content_hash}.tar.gz'
+        )
+
+    def index_path(self, date):
+        return os.path.join(self.directory, 'dates', str(date))
+
+    def get(self, date):
+        """Path of the cached tarball for `date`, or None."""
+        try:
+            with open(self.index_path(date), 'r') as index_file:
+                content_hash = index_file.read().strip()
+        except FileNotFoundError:
+            return None
+        path = self.object_path(content_hash)
+        return path if os.path.exists(path) else None
+
+    def put(self, date, chunks):
+        """Store the tarball for `date` from an iterable of byte chunks."""
+        entry = CacheEntry(self, date)
+        try:
+            for chunk in chunks:
+                entry.write(chunk)
+        except BaseException:
+            entry.discard()
+            raise
+        return entry.commit()
+
+    def write_index(self, date, content_hash):
+        index_path = self.index_path(date)
+        with open(f'{index_path}.part', 'w') as index_file:
+            index_file.write(content_hash)
+        os.replace(f'{index_path}.part', index_path)
+
+
+class CacheEntry:
+    """
+    A tarball on its way into a `RollupCache`. Written under a temporary
+    name so a dead download never looks like a cached one, until
+    `commit()` files it under its hash.
+    """
+
+    def __init__(self, cache, date):
+        self.cache = cache
+        self.date = date
+        self.content_hash = hashlib.sha256()
+        self.part_file = tempfile.NamedTemporaryFile(
+            dir=cache.directory, suffix='.part', delete=False)
+
+    def write(self, chunk):
+        self.content_hash.update(chunk)
+        self.part_file.write(chunk)
+
+    def discard(self):
+        self.part_file.close()
+        os.remove(self.part_file.name)
+
+    def commit(self):
+        """Returns the cached tarball's path."""
+        self.part_file.close()
+        content_hash = self.content_hash.hexdigest()
+        path = self.cache.object_path(content_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(self.part_file.name, path)
+        self.cache.write_index(self.date, content_hash)
+        return path
+
+
+class TeeStream:
+    """
+    A read-only file object over an iterable of byte chunks, handing each
+    chunk to `write` as it's read.
+    """
+
+    def __init__(self, chunks, write):
+        self.chunks = iter(chunks)
+        self.write = write
+        self.buffer = bytearray()
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            self.write(chunk)
+            self.buffer.extend(chunk)
+        if size < 0:
+            size = len(self.buffer)
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+
+@contextmanager
+def open_rollup(session, url_root, date, cache, chunk_size=1 << 16):
+    """
+    The roll-up tarball for `date` as a stream to read, None if the bucket
+    has no roll-up that day.
+
+    Read from `cache` if it's there. Otherwise it's streamed straight from
+    the response, so games can be handled while the download is still
+    going, and copied into `cache` on the way. The copy is only kept if
+    the block finishes without raising.
+    """
+    path = cache.get(date)
+    if path is not None:
+        with open(path, 'rb') as file_stream:
+            yield file_stream
+        return
+
+    with session.get(f'{url_root}/{date}.tar.gz', stream=True) as response:
+        if response.status_code in MISSING_STATUSES:
+            yield None
+            return
+        response.raise_for_status()
+        entry = CacheEntry(cache, date)
+        try:
+            stream = TeeStream(response.iter_content(chunk_size), entry.write)
+            yield stream
+            # Whatever the tarball reader left unread, eg. the gzip
+            # trailer, still belongs in the cache.
+            while stream.read(chunk_size):
+                pass
+        except BaseException:
+            entry.discard()
+            raise
+        entry.commit()
+
+
+def fetch_rollup(session, url_root, date, cache, chunk_size=1 << 16):
+    """
+    Path to the roll-up tarball for `date`, downloading it into `cache`
+    unless it's already there. None if the bucket has no roll-up that day.
+    """
+    path = cache.get(date)
+    if path is not None:
+        return path
+
+    with session.get(f'{url_root}/{date}.tar.gz', stream=True) as response:
+        if response.status_code in MISSING_STATUSES:
+            return None
+        response.raise_for_status()
+        return cache.put(date, response.iter_content(chunk_size))
@@ -0,0 +1,363 @@
+"""
+A lean stand-in for `GameTarSerializer` validation, for the ingest path.
+
+Building and running the nested serializer tree costs a lot per JSON,
+most of it spent deep-copying fields and in per-field `run_validation`.
+`validate_rollup` applies the same rules with plain function calls and
+returns data shaped like `GameTarSerializer.validated_data`, so
+`GameRecord.from_validated_data` works on either.
+
+The serializers stay the reference. Anything this module turns down is
+meant to be run through them again, both to get their error messages
+and so they have the final say.
+"""
+from collections.abc import Mapping
+import math
+import re
+import uuid
+
+from rest_framework.fields import BooleanField, FloatField, IntegerField
+
+from apps.game_data.models import meta as meta_models
+
+# Stands in for a key that's missing altogether, as opposed to null.
+MISSING = object()
+
+# Same as the DRF fields'.
+RE_DECIMAL = re.compile(r'\.0*\s*$')
+MAX_INT_STRING_LENGTH = IntegerField.MAX_STRING_LENGTH
+MAX_FLOAT_STRING_LENGTH = FloatField.MAX_STRING_LENGTH
+TRUE_VALUES = BooleanField.TRUE_VALUES
+FALSE_VALUES = BooleanField.FALSE_VALUES
+XP_FRACTIONS = ('0', '1', '2')
+COMBAT_KEYS = {'round', 'sim_results', 'main_player'}
+SIM_PERCENTS = ('win_percent', 'tie_percent', 'loss_percent')
+SIM_DAMAGES = ('win_dmg', 'loss_dmg')
+
+
+class Rejected(ValueError):
+    """The document breaks a rule the serializers would have caught."""
+
+
+class Unsupported(Exception):
+    """
+    The document uses something only the serializers handle, eg. a
+    `match` or `participant` primary key that needs looking up.
+    """
+
+
+def required(value, name):
+    if value is MISSING:
+        raise Rejected(f'{name}: This field is required.')
+    if value is None:
+        raise Rejected(f'{name}: This field may not be null.')
+    return value
+
+
+def dashless(data, name):
+    """What `JSONDashConvertMixin` hands on to the serializer."""
+    if not isinstance(data, dict):
+        raise Rejected(f'{name}: Expected a dictionary of items.')
+    return {
+        (key.replace('-', '_') if '-' in key else key): value
+        for key, value in data.items()
+    }
+
+
+def char_value(value, name, max_length=None):
+    """`serializers.CharField`, trimming whitespace and not allowing blanks."""
+    if value == '' or str(value).strip() == '':
+        raise Rejected(f'{name}: This field may not be blank.')
+    required(value, name)
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise Rejected(f'{name}: Not a valid string.')
+    value = str(value).strip()
+    if max_length is not None and len(value) > max_length:
+        raise Rejected(f'{name}: Longer than {max_length} characters.')
+    if '\x00' in value:
+        raise Rejected(f'{name}: Null characters are not allowed.')
+    if any(0xD800 <= ord(character) <= 0xDFFF for character in value):
+        raise Rejected(f'{name}: Surrogate characters are not allowed.')
+    return value
+
+
+def int_value(value, name, min_value=None, max_value=None):
+    """`serializers.IntegerField`."""
+    required(value, name)
+    if isinstance(value, str) and len(value) > MAX_INT_STRING_LENGTH:
+        raise Rejected(f'{name}: String value too large.')
+    try:
+        value = int(RE_DECIMAL.sub('', str(value)))
+    except (ValueError, TypeError):
+        raise Rejected(f'{name}: A valid integer is required.')
+    if min_value is not None and value < min_value:
+        raise Rejected(f'{name}: Less than {min_value}.')
+    if max_value is not None and value > max_value:
+        raise Rejected(f'{name}: Greater than {max_value}.')
+    return value
+
+
+def float_value(value, name, min_value=None, max_value=None):
+    """`serializers.FloatField`."""
+    required(value, name)
+    if isinstance(value, str) and len(value) > MAX_FLOAT_STRING_LENGTH:
+        raise Rejected(f'{name}: String value too large.')
+    try:
+        value = float(value)
+    except (ValueError, TypeError):
+        raise Rejected(f'{name}: A valid number is required.')
+    if min_value is not None and value < min_value:
+        raise Rejected(f'{name}: Less than {min_value}.')
+    if max_value is not None and value > max_value:
+        raise Rejected(f'{name}: Greater than {max_value}.')
+    return value
+
+
+def bool_value(value, name):
+    """`serializers.BooleanField`."""
+    required(value, name)
+    try:
+        if value in TRUE_VALUES:
+            return True
+        if value in FALSE_VALUES:
+            return False
+    except TypeError:
+        pass
+    raise Rejected(f'{name}: Must be a valid boolean.')
+
+
+def uuid_value(value, name):
+    """`serializers.UUIDField`."""
+    required(value, name)
+    try:
+        if isinstance(value, int):
+            return uuid.UUID(int=value)
+        if isinstance(value, str):
+            return uuid.UUID(hex=value)
+    except ValueError:
+        pass
+    raise Rejected(f'{name}: Must be a valid UUID.')
+
+
+def xp_value(value, name):
+    """The `xps` CharField, along with `XPStringValidator`."""
+    value = char_value(value, name, max_length=8)
+    if value.count('.') != 1:
+        raise Rejected(f'{name}: XP {value} not of the form <level>.<xp>.')
+    level, fraction = value.split('.')
+    try:
+        int(level)
+    except ValueError:
+        raise Rejected(f'{name}: Level token {level} not an integer.')
+    if fraction not in XP_FRACTIONS:
+        raise Rejected(
+            f'{name}: XP fraction token {fraction} not a valid partial XP value.')
+    return value
+
+
+def list_value(value, name):
+    """A nested `many=True` serializer."""
+    required(value, name)
+    if not isinstance(value, list):
+        raise Rejected(f'{name}: Expected a list of items.')
+    return value
+
+
+def index_map_value(value, name):
+    """`IDKeyListField(zero_biased=False)`: {'1': a, '2': b} -> [a, b]"""
+    required(value, name)
+    if not isinstance(value, Mapping):
+        raise Rejected(f'{name}: Expected a Mapping.')
+    try:
+        indexes = [int(key) for key in value]
+    except (TypeError, ValueError):
+        raise Rejected(f'{name}: Keys must be indices.')
+    if sorted(indexes) != list(range(1, len(indexes) + 1)):
+        raise Rejected(f'{name}: Data keys must form complete list of indices.')
+
+    items = [None] * len(indexes)
+    for index, item in zip(indexes, value.values()):
+        items[index - 1] = item
+    return items
+
+
+def piece_value(pieces, value, name):
+    """`TemplateIDRelatedField`, given the piece cache to look in."""
+    try:
+        template_id = int(value)
+    except (TypeError, ValueError):
+        raise Rejected(f'{name}: Invalid value.')
+    try:
+        return pieces[template_id]
+    except KeyError:
+        raise Rejected(f'{name}: No piece with template_id={value}.')
+
+
+def many_pieces_value(pieces, value, name):
+    """`TemplateIDRelatedField(many=True)`."""
+    required(value, name)
+    if isinstance(value, str) or not hasattr(value, '__iter__'):
+        raise Rejected(f'{name}: Expected a list of items.')
+    return [piece_value(pieces, item, name) for item in value]
+
+
+class RollupValidator:
+    """
+    Checks a parsed roll-up JSON against the rules `GameTarSerializer`
+    and its nested serializers apply, without building any of them.
+
+    Game pieces come out of the process-wide piece cache, same as
+    `TemplateIDRelatedField`.
+    """
+
+    def __init__(self):
+        self.characters = meta_models.SBBCharacter.objects.by_template_id()
+        self.spells = meta_models.SBBSpell.objects.by_template_id()
+        self.treasures = meta_models.SBBTreasure.objects.by_template_id()
+
+    def validate(self, document):
+        """
+        Return `document` as validated data, or raise `Rejected` or
+        `Unsupported`. `document` itself is left as it was.
+        """
+        data = dashless(document, 'document')
+        return {
+            'uuid': uuid_value(data.get('match_id', MISSING), 'match_id'),
+            'placement': int_value(
+                data.get('placement', MISSING), 'placement', 1, 8),
+            'player_id': char_value(
+                data.get('player_id', MISSING), 'player_id'),
+            'possibly_mythic': bool_value(
+                data.get('possibly_mythic', MISSING), 'possibly_mythic'),
+            'players': [
+                self.player(item)
+                for item in list_value(data.get('players', MISSING), 'players')
+            ],
+            'combat_info': [
+                self.combat(item, document)
+                for item in list_value(
+                    data.get('combat_info', MISSING), 'combat_info')
+            ],
+        }
+
+    def player(self, value):
+        """`PlayerGameRecordSerializer`"""
+        required(value, 'players')
+        data = dashless(value, 'players')
+        if 'match' in data:
+            raise Unsupported('players: match')
+        return {
+            'player_id': char_value(
+                data.get('player_id', MISSING), 'player_id'),
+            'healths': [
+                int_value(item, 'healths')
+                for item in index_map_value(
+                    data.get('healths', MISSING), 'healths')
+            ],
+            'xps': [
+                xp_value(item, 'xps')
+                for item in index_map_value(data.get('xps', MISSING), 'xps')
+            ],
+            'heroes': [
+                char_value(item, 'heroes', max_length=16)
+                for item in list_value(data.get('heroes', MISSING), 'heroes')
+            ],
+        }
+
+    def combat(self, value, document):
+        """
+        `CombatMatchSerializer`. The main player's board is keyed by the
+        document's raw `player-id`, and whatever key is left over is the
+        opponent's.
+        """
+        required(value, 'combat_info')
+        if not isinstance(value, dict):
+            raise Rejected('combat_info: Expected a dictionary of items.')
+        # Same steps as the serializer, on a copy rather than in place.
+        data = dict(value)
+        try:
+            main_player_id = document['player-id']
+            data['main_player'] = data.pop(main_player_id)
+            turn_num = data['round']
+        except (KeyError, TypeError):
+            raise Rejected('combat_info: Missing the main player or round.')
+        if 'sim-results' in data:
+            data['sim_results'] = data.pop('sim-results')
+
+        leftover_keys = set(data) - COMBAT_KEYS
+        if not leftover_keys:
+            raise Rejected('combat_info: Missing the opponent.')
+        if len(leftover_keys) > 1:
+            # The serializer picks one at random.
+            raise Unsupported('combat_info: More than one opponent.')
+        opponent_id = leftover_keys.pop()
+        data['opponent'] = data.pop(opponent_id)
+
+        combat = {
+            'main_player': self.board(data['main_player'], turn_num),
+            'opponent': self.board(data['opponent'], turn_num),
+            'main_player_id': main_player_id,
+            'opponent_id': opponent_id,
+        }
+        if 'sim_results' in data:
+            combat['sim_results'] = self.sim_results(data['sim_results'])
+        return combat
+
+    def sim_results(self, value):
+        """`SimResultsSerializer`, which may be null."""
+        if value is None:
+            return None
+        data = dashless(value, 'sim_results')
+        sim_results = {
+            name: float_value(data.get(name, MISSING), name, 0, 100)
+            for name in SIM_PERCENTS
+        }
+        for name in SIM_DAMAGES:
+            sim_results[name] = float_value(data.get(name, MISSING), name, 0)
+        if not all(math.isfinite(value) for value in sim_results.values()):
+            raise Rejected('sim_results: Must all be finite numbers.')
+        return sim_results
+
+    def board(self, value, turn_num):
+        """`CombatSerializer`"""
+        required(value, 'board')
+        if not isinstance(value, Mapping):
+            raise Rejected('board: Expected a dictionary of items.')
+        if 'participant' in value:
+            raise Unsupported('board: participant')
+        return {
+            'characters': [
+                self.character(item)
+                for item in list_value(
+                    value.get('characters', MISSING), 'characters')
+            ],
+            'spells': many_pieces_value(
+                self.spells, value.get('spells', MISSING), 'spells'),
+            'treasures': many_pieces_value(
+                self.treasures, value.get('treasures', MISSING), 'treasures'),
+            'round': turn_num,
+        }
+
+    def character(self, value):
+        """`GameCharacterSerializer`"""
+        required(value, 'characters')
+        if not isinstance(value, dict):
+            raise Rejected('characters: Expected a dictionary of items.')
+        template_id = value.get('id', MISSING)
+        if template_id == '':
+            # Related fields take blanks as null.
+            template_id = None
+        return {
+            'base_character': piece_value(
+                self.characters, required(template_id, 'id'), 'id'),
+            'attack': int_value(value.get('attack', MISSING), 'attack'),
+            'health': int_value(value.get('health', MISSING), 'health'),
+            'golden': bool_value(value.get('golden', MISSING), 'golden'),
+            'position': int_value(
+                value.get('position', MISSING), 'position', 1, 7),
+        }
+
+
+def validate_rollup(document):
+    """Shortcut for `RollupValidator().validate(document)`."""
+    return RollupValidator().validate(document)
@@ -0,0 +1,191 @@
+"""
+Measuring what ingest spends its time on.
+"""
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from time import perf_counter
+import json
+import re
+
+from django.db import connections
+
+from apps.game_data.ingest.tarball import member_match_id
+
+STAGES = ('decompress', 'json', 'validate', 'save')
+
+# Upper bounds of the queries-per-game histogram buckets.
+QUERY_BUCKETS = (10, 20, 30, 50, 100, 200, 500, 1000)
+
+# Bulk statements differ only in how many rows of placeholders they carry.
+PLACEHOLDER_ROWS = re.compile(
+    r'(\(%s(?:, %s)*\)|SELECT %s(?:, %s)*)'
+    r'(?:(?:, | UNION ALL )(?:\(%s(?:, %s)*\)|SELECT %s(?:, %s)*))+'
+)
+PLACEHOLDER_LIST = re.compile(r'%s(?:, %s)+')
+
+
+def normalize_sql(sql):
+    """Collapse placeholder lists so repeats of a statement group together."""
+    sql = PLACEHOLDER_ROWS.sub(r'\1 ...', sql)
+    return PLACEHOLDER_LIST.sub('%s, ...', sql)
+
+
+class IngestProfiler:
+    """
+    Records wall time per ingest stage (decompress, json, validate, save)
+    and the SQL run by each game, then summarizes the run.
+
+    Timings are kept per game, so POVs merged into one game share a record
+    listing all of their member names. If `trace_file` is given, a line of
+    JSON is written to it as each game finishes.
+
+    Use as a context manager around the run: it installs a DB execute
+    wrapper to see every query.
+    """
+
+    def __init__(self, trace_file=None, slowest=10, top_sql=10,
+                 using='default'):
+        self.trace_file = trace_file
+        self.slowest = slowest
+        self.top_sql = top_sql
+        self.connection = connections[using]
+
+        # game key -> in-progress record
+        self.games = {}
+        self.current = None
+        # (seconds, queries, key, members) for every finished game
+        self.finished = []
+        self.failures = 0
+        self.stage_totals = defaultdict(float)
+        self.query_count = 0
+        self.query_time = 0.0
+        self.sql_counts = Counter()
+        self.sql_times = defaultdict(float)
+
+    def __enter__(self):
+        self.wrapper = self.connection.execute_wrapper(self)
+        self.wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        for key in list(self.games):
+            self.finish(key)
+        self.wrapper.__exit__(*exc_info)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = perf_counter() - start
+            self.query_count = self.query_count + 1
+            self.query_time = self.query_time + elapsed
+            normalized = normalize_sql(sql)
+            self.sql_counts[normalized] += 1
+            self.sql_times[normalized] += elapsed
+            if self.current is not None:
+                self.current['queries'] += 1
+                self.current['query_time'] += elapsed
+
+    def game(self, key):
+        if key not in self.games:
+            self.games[key] = {
+                'game': str(key),
+                'members': [],
+                'stages': dict.fromkeys(STAGES, 0.0),
+                'queries': 0,
+                'query_time': 0.0,
+                'errors': []
+            }
+        return self.games[key]
+
+    @staticmethod
+    def key_for(name, content):
+        """Members are grouped by match, or by name if that's unreadable."""
+        return member_match_id(content) or name
+
+    def timed_members(self, members):
+        """Wrap a `(name, content)` iterator, booking time spent in it."""
+        members = iter(members)
+        while True:
+            start = perf_counter()
+            try:
+                name, content = next(members)
+            except StopIteration:
+                return
+            elapsed = perf_counter() - start
+
+            game = self.game(self.key_for(name, content))
+            game['members'].append(name)
+            game['stages']['decompress'] += elapsed
+            self.stage_totals['decompress'] += elapsed
+            yield name, content
+
+    @contextmanager
+    def stage(self, key, stage):
+        """Book wall time and queries inside the block to `key`'s game."""
+        previous = self.current
+        self.current = self.game(key)
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - start
+            self.current['stages'][stage] += elapsed
+            self.stage_totals[stage] += elapsed
+            self.current = previous
+
+    def fail(self, key, error):
+        self.failures = self.failures + 1
+        self.game(key)['errors'].append(str(error))
+
+    def finish(self, key):
+        """The game is done with, trace it and keep only its totals."""
+        game = self.games.pop(key, None)
+        if game is None:
+            return
+        seconds = sum(game['stages'].values())
+        self.finished.append(
+            (seconds, game['queries'], game['game'], game['members']))
+        if self.trace_file is not None:
+            game['seconds'] = seconds
+            self.trace_file.write(json.dumps(game) + '\n')
+
+    def summary(self):
+        histogram = dict.fromkeys(
+            [f'<{bound}' for bound in QUERY_BUCKETS]
+            + [f'>={QUERY_BUCKETS[-1]}'],
+            0
+        )
+        for _, queries, _, _ in self.finished:
+            bucket = next(
+                (f'<{bound}' for bound in QUERY_BUCKETS if queries < bound),
+                f'>={QUERY_BUCKETS[-1]}'
+            )
+            histogram[bucket] += 1
+
+        slowest = sorted(self.finished, reverse=True)[:self.slowest]
+        return {
+            'games': len(self.finished),
+            'failures': self.failures,
+            'stages': dict(self.stage_totals),
+            'queries': {'count': self.query_count, 'time': self.query_time},
+            'slowest_games': [
+                {
+                    'game': game,
+                    'members': members,
+                    'seconds': seconds,
+                    'queries': queries
+                }
+                for seconds, queries, game, members in slowest
+            ],
+            'queries_per_game': histogram,
+            'top_sql': [
+                {
+                    'sql': sql,
+                    'count': count,
+                    'time': self.sql_times[sql]
+                }
+                for sql, count in self.sql_counts.most_common(self.top_sql)
+            ],
+        }
@@ -0,0 +1,55 @@
+"""
+Remembering which roll-up members have already been stored.
+"""
+import hashlib
+
+from apps.game_data.models.ingest import IngestedMember
+
+
+class IngestLedger:
+    """
+    Tracks the members of one roll-up, by name and content hash, whose
+    games have been committed.
+
+    `check` tells the ingestor whether a member can be skipped, and
+    remembers its hash so `commit` can record it later on in the same
+    transaction as its game.
+    """
+
+    def __init__(self, rollup):
+        self.rollup = rollup
+        self.done = None
+        # name -> content hash, for members checked but not committed
+        self.hashes = {}
+
+    def check(self, name, content):
+        """True if this exact member was committed by an earlier run."""
+        if self.done is None:
+            self.done = set(
+                IngestedMember.objects.filter(rollup=self.rollup)
+                .values_list('name', 'content_hash')
+            )
+        content_hash = hashlib.sha256(content).hexdigest()
+        if (name, content_hash) in self.done:
+            return True
+        self.hashes[name] = content_hash
+        return False
+
+    def forget(self, name):
+        """Drop a checked member that won't be committed after all."""
+        self.hashes.pop(name, None)
+
+    def commit(self, names):
+        """Record `names` as stored. Call inside their games' transaction."""
+        entries = [
+            IngestedMember(
+                rollup=self.rollup,
+                name=name,
+                content_hash=self.hashes.pop(name)
+            )
+            for name in names
+        ]
+        IngestedMember.objects.bulk_create(entries, ignore_conflicts=True)
+        if self.done is not None:
+            self.done.update(
+                (entry.name, entry.content_hash) for entry in entries)
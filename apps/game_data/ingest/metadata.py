@@ -0,0 +1,60 @@
+"""
+Keeping the game piece tables in line with template-ids.json.
+"""
+import hashlib
+
+from django.db import transaction
+
+from apps.game_data.models.ingest import SyncedSource, VersionStamp
+from apps.game_data.registry import STAMP, load_registry
+from apps.game_data.serializers.meta import GamePieceSerializer
+
+
+def conditional_headers(source):
+    """Headers that let the server answer 304 if nothing changed."""
+    headers = {}
+    if source.etag:
+        headers['If-None-Match'] = source.etag
+    if source.last_modified:
+        headers['If-Modified-Since'] = source.last_modified
+    return headers
+
+
+def sync_pieces(session, url, force=False):
+    """
+    Fetch the template ids document at `url` and upsert its pieces.
+
+    Returns a dict with a `status` of 'not modified' if the server said
+    so, 'unchanged' if the document hashes the same as last time, or
+    'synced' along with the `added`/`changed`/`unchanged` piece counts.
+    A sync that changes anything bumps the pieces' version stamp, so
+    other processes know to refresh their piece registry.
+    `force` fetches and syncs regardless. Raises `requests.HTTPError` for
+    a failed fetch, and the serializer's `ValidationError` for a bad
+    document.
+    """
+    source, _ = SyncedSource.objects.get_or_create(url=url)
+    headers = {} if force else conditional_headers(source)
+    response = session.get(url, headers=headers)
+    if response.status_code == 304:
+        return {'status': 'not modified'}
+    response.raise_for_status()
+
+    source.etag = response.headers.get('ETag', '')
+    source.last_modified = response.headers.get('Last-Modified', '')
+    content_hash = hashlib.sha256(response.content).hexdigest()
+    if not force and content_hash == source.content_hash:
+        source.save()
+        return {'status': 'unchanged'}
+
+    serializer = GamePieceSerializer(data=response.json(), many=True)
+    serializer.is_valid(raise_exception=True)
+    with transaction.atomic():
+        counts = serializer.upsert()
+        if counts['added'] or counts['changed']:
+            VersionStamp.objects.bump(STAMP)
+        # Only once the pieces are in, so a failed sync gets retried.
+        source.content_hash = content_hash
+        source.save()
+    load_registry()
+    return {'status': 'synced', **counts}
@@ -0,0 +1,171 @@
+"""
+Spreading roll-up members over several worker processes.
+"""
+import multiprocessing
+import queue
+import zlib
+
+from django import db
+
+from apps.game_data.ingest.ledger import IngestLedger
+from apps.game_data.ingest.pipeline import RollupIngestor
+from apps.game_data.ingest.tarball import MATCH_ID_PATTERN, member_match_id
+from apps.game_data.models.meta import PIECE_MODELS
+from apps.game_data.registry import refresh_registry
+
+
+def shard_for(content, workers):
+    """
+    Pick the worker for a tarball member by its match-id, so every POV
+    of one game lands on the same worker and never races another worker
+    creating the same SBBGame or participants.
+    """
+    match_id = member_match_id(content)
+    if match_id is not None:
+        return match_id.int % workers
+
+    # These fail validation wherever they go.
+    found = MATCH_ID_PATTERN.search(content)
+    if found is None:
+        return 0
+    return zlib.crc32(found.group(1)) % workers
+
+
+class WorkerDied(RuntimeError):
+    """A worker process exited without reporting back."""
+
+
+def ingest_shard(member_queue, result_queue, options):
+    """
+    Worker process body: ingest members until we're sent None. A member
+    that raises is reported as a failure rather than ending the worker,
+    which would leave the parent waiting on it.
+    """
+    rollup = options.pop('rollup')
+    ingestor = RollupIngestor(
+        ledger=IngestLedger(rollup) if rollup else None,
+        **options
+    )
+    try:
+        for name, content in iter(member_queue.get, None):
+            try:
+                ingestor.ingest_member(name, content)
+            except Exception as e:
+                ingestor.fail(name, e)
+        try:
+            ingestor.flush()
+        except Exception as e:
+            ingestor.fail('<flush>', e)
+    finally:
+        result_queue.put((
+            ingestor.recorded,
+            ingestor.skipped,
+            [(name, str(error)) for name, error in ingestor.failures]
+        ))
+        db.connections.close_all()
+
+
+class ParallelIngestor:
+    """
+    Feeds roll-up members to `workers` processes, each with its own
+    database connection, then gathers one combined report.
+
+    Has the same `recorded`/`skipped`/`failures` attributes as
+    `RollupIngestor`, though failures only carry the error text. Pass
+    `rollup` to have every worker keep the ingest ledger for it.
+    """
+
+    # Per-worker backlog, keeps memory bounded while streaming.
+    queue_size = 64
+    # Seconds between checks that the workers are still alive.
+    poll_interval = 1
+
+    def __init__(self, workers, merge_window=256, rollup=None, batch_size=1,
+                 validator='fast'):
+        self.workers = workers
+        self.options = {
+            'merge_window': merge_window,
+            'rollup': rollup,
+            'batch_size': batch_size,
+            'validator': validator
+        }
+        self.recorded = 0
+        self.skipped = 0
+        self.failures = []
+
+    def ingest_members(self, members):
+        # Workers inherit one up to date piece registry, and the piece
+        # instances made from it, rather than each loading their own.
+        refresh_registry()
+        for model_cls in PIECE_MODELS.values():
+            model_cls.objects.by_template_id()
+        # Forked children mustn't share the parent's open connections.
+        db.connections.close_all()
+
+        context = multiprocessing.get_context('fork')
+        result_queue = context.Queue()
+        member_queues = []
+        processes = []
+        for _ in range(self.workers):
+            member_queue = context.Queue(maxsize=self.queue_size)
+            process = context.Process(
+                target=ingest_shard,
+                args=(member_queue, result_queue, dict(self.options))
+            )
+            process.start()
+            member_queues.append(member_queue)
+            processes.append(process)
+
+        try:
+            for name, content in members:
+                shard = shard_for(content, self.workers)
+                self.put(
+                    member_queues[shard], (name, content), processes[shard])
+            for member_queue, process in zip(member_queues, processes):
+                self.put(member_queue, None, process)
+
+            for _ in processes:
+                recorded, skipped, failures = self.get(result_queue, processes)
+                self.recorded = self.recorded + recorded
+                self.skipped = self.skipped + skipped
+                self.failures.extend(failures)
+        except BaseException:
+            # Whatever went wrong, don't leave workers behind.
+            for process in processes:
+                process.terminate()
+            raise
+        for process in processes:
+            process.join()
+
+    def put(self, member_queue, item, process):
+        """
+        `member_queue.put(item)`, raising `WorkerDied` if `process`, the
+        worker reading it, dies first.
+        """
+        while True:
+            try:
+                member_queue.put(item, timeout=self.poll_interval)
+                return
+            except queue.Full:
+                if not process.is_alive():
+                    raise WorkerDied(
+                        f'Ingest worker {process.pid} exited with code '
+                        f'{process.exitcode}.')
+
+    def get(self, result_queue, processes):
+        """
+        `result_queue.get()`, raising `WorkerDied` if a worker crashes
+        first, or if they've all exited and nothing came.
+        """
+        while True:
+            try:
+                return result_queue.get(timeout=self.poll_interval)
+            except queue.Empty:
+                for process in processes:
+                    if process.exitcode not in (None, 0):
+                        raise WorkerDied(
+                            f'Ingest worker {process.pid} exited with code '
+                            f'{process.exitcode}.')
+                if not any(process.is_alive() for process in processes):
+                    raise WorkerDied(
+                        'Every ingest worker exited without reporting.')
@@ -0,0 +1,208 @@
+"""
+Turning roll-up tarball members into stored games.
+"""
+from collections import OrderedDict
+from contextlib import nullcontext
+import json
+
+from django.db import transaction
+
+from apps.game_data import composition
+from apps.game_data.ingest.bulk import BulkGameWriter, lock_for_writing
+from apps.game_data.ingest.fastpath import (
+    Rejected,
+    RollupValidator,
+    Unsupported
+)
+from apps.game_data.ingest.records import GameRecord
+from apps.game_data.matchups import STAMP as COMBAT_STAMP
+from apps.game_data.models import meta as meta_models
+from apps.game_data.models.ingest import VersionStamp
+from apps.game_data.serializers.game import GameTarSerializer
+
+
+class RollupIngestor:
+    """
+    Validates roll-up members with `GameTarSerializer` and hands them
+    to a writer. Keeps count of what got recorded and what didn't.
+
+    A roll-up holds one JSON per tracker user in a lobby, so the same
+    match can turn up several times. The last `merge_window` games seen
+    are held back, and any further POVs of them are merged in before the
+    game is written once.
+
+    Games are committed `batch_size` at a time, so a crash loses at most
+    one batch. With an `IngestLedger`, members an earlier run committed
+    are skipped and newly stored ones are recorded in their batch.
+
+    With `validator='fast'`, members are checked by `RollupValidator`
+    first. Anything it turns down goes through the serializer after all,
+    which decides and supplies the errors. `validator='drf'` always uses
+    the serializer.
+
+    Pass an `IngestProfiler` as `profiler` to have each stage timed.
+
+    The composition index is brought up to date once per batch, rather
+    than by the writer for every game.
+    """
+
+    VALIDATORS = ('fast', 'drf')
+
+    def __init__(self, writer=None, merge_window=256, profiler=None,
+                 ledger=None, batch_size=1, validator='fast'):
+        if validator not in self.VALIDATORS:
+            raise ValueError(f'Unknown validator {validator!r}.')
+        self.writer = writer or BulkGameWriter()
+        self.merge_window = merge_window
+        self.profiler = profiler
+        self.ledger = ledger
+        self.batch_size = batch_size
+        self.validator = validator
+        # Built once, then reset for every member.
+        self.serializer = GameTarSerializer()
+        self.recorded = 0
+        self.skipped = 0
+        self.failures = []
+        # match uuid -> (GameRecord, [member names]), oldest first
+        self.pending = OrderedDict()
+        # (GameRecord, [member names]) waiting to be committed together
+        self.batch = []
+
+    def ingest_members(self, members):
+        """Store every `(name, content)` pair from `members`."""
+        if self.profiler is not None:
+            members = self.profiler.timed_members(members)
+        for name, content in members:
+            self.ingest_member(name, content)
+        self.flush()
+
+    def ingest_member(self, name, content):
+        """
+        Queue one tarball member up to be stored. Returns the validation
+        errors or exception if it was rejected, otherwise None.
+        """
+        if self.ledger is not None and self.ledger.check(name, content):
+            self.skipped = self.skipped + 1
+            return None
+
+        key = None
+        if self.profiler is not None:
+            key = self.profiler.key_for(name, content)
+        try:
+            with self.stage(key, 'json'):
+                data = json.loads(content)
+        except ValueError as e:
+            # Truncated, non-JSON or not UTF-8.
+            return self.fail(name, e, key)
+
+        with self.stage(key, 'validate'):
+            validated_data, errors = self.validate(data)
+        if errors is not None:
+            return self.fail(name, errors, key)
+
+        try:
+            record = GameRecord.from_validated_data(validated_data)
+        except Exception as e:
+            return self.fail(name, e, key)
+
+        if record.uuid in self.pending:
+            pending_record, names = self.pending[record.uuid]
+            pending_record.merge(record)
+            names.append(name)
+        else:
+            self.pending[record.uuid] = (record, [name])
+
+        while len(self.pending) > self.merge_window:
+            self.write(*self.pending.popitem(last=False)[1])
+        return None
+
+    def validate(self, data):
+        """
+        Return `(validated_data, None)` for a good JSON, or
+        `(None, errors)` with the serializer's errors or exception.
+        """
+        if self.validator == 'fast':
+            try:
+                return RollupValidator().validate(data), None
+            except (Rejected, Unsupported):
+                pass
+
+        serializer = self.serializer.reset(data=data)
+        try:
+            is_valid = serializer.is_valid()
+        except Exception as e:
+            # Some malformed combats trip the serializer up rather than
+            # failing validation.
+            return None, e
+        if not is_valid:
+            return None, serializer.errors
+        return serializer.validated_data, None
+
+    def flush(self):
+        """Write out every game still waiting on more POVs."""
+        while self.pending:
+            self.write(*self.pending.popitem(last=False)[1])
+        self.commit()
+
+    def write(self, record, names):
+        self.batch.append((record, names))
+        if len(self.batch) >= self.batch_size:
+            self.commit()
+
+    def commit(self):
+        """Write the batch in one transaction, along with its ledger entries."""
+        if not self.batch:
+            return
+        batch, self.batch = self.batch, []
+
+        stored = []
+        games = []
+        # Every player in the batch, looked up or inserted at once.
+        account_ids = [
+            account_id
+            for record, _ in batch
+            for account_id in record.account_ids
+        ]
+        with transaction.atomic():
+            lock_for_writing()
+            players = meta_models.SBBPlayer.objects.resolve_many(account_ids)
+            for record, names in batch:
+                try:
+                    with self.stage(record.uuid, 'save'):
+                        # The writer's own transaction becomes a savepoint,
+                        # so a bad game doesn't take the batch with it.
+                        game = self.writer.write(record, players=players)
+                except Exception as e:
+                    for name in names:
+                        self.fail(name, e, record.uuid)
+                    # The rolled back game may have left changes to
+                    # players in memory that never made it to the db.
+                    players = meta_models.SBBPlayer.objects.resolve_many(
+                        account_ids)
+                else:
+                    stored.extend(names)
+                    games.append(game)
+            if games:
+                composition.refresh(games)
+            if self.ledger is not None and stored:
+                self.ledger.commit(stored)
+            if stored:
+                VersionStamp.objects.bump(COMBAT_STAMP)
+        self.recorded = self.recorded + len(stored)
+
+        if self.profiler is not None:
+            for record, _ in batch:
+                self.profiler.finish(record.uuid)
+
+    def stage(self, key, stage):
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.stage(key, stage)
+
+    def fail(self, name, error, key=None):
+        self.failures.append((name, error))
+        if self.ledger is not None:
+            self.ledger.forget(name)
+        if self.profiler is not None:
+            self.profiler.fail(key, error)
+        return error
@@ -0,0 +1,155 @@
+"""
+Plain in-memory description of a game, independent of the serializers.
+"""
+
+# SBBCombatRound's outcome, in the order outcome tuples hold it.
+OUTCOME_FIELDS = (
+    'win_percent', 'tie_percent', 'loss_percent', 'win_damage', 'loss_damage')
+
+
+def outcome_of(sim_results):
+    """Outcome tuple from validated `sim-results`, or None."""
+    if sim_results is None:
+        return None
+    return (
+        sim_results['win_percent'],
+        sim_results['tie_percent'],
+        sim_results['loss_percent'],
+        sim_results['win_dmg'],
+        sim_results['loss_dmg'],
+    )
+
+
+def pairing(account_id, opponent_id, outcome):
+    """
+    `(first, second, outcome)` with the account ids in the order combat
+    rounds are stored in, and the outcome turned round to match.
+    """
+    if account_id <= opponent_id or outcome is None:
+        return min(account_id, opponent_id), max(account_id, opponent_id), \
+            outcome
+    win, tie, loss, win_damage, loss_damage = outcome
+    return opponent_id, account_id, (loss, tie, win, loss_damage, win_damage)
+
+
+class GameRecord:
+    """
+    Everything one roll-up JSON says about a game, keyed the way it gets
+    written: by player account id and turn number.
+
+    Game pieces are held as primary keys, heroes as template ids.
+    """
+
+    def __init__(self, uuid):
+        self.uuid = uuid
+        # Account ids in the order they were first seen.
+        self.account_ids = []
+        # account_id -> placement/possibly mythic, only known for POV players
+        self.placements = {}
+        self.mythic = {}
+        # (account_id, turn_num) -> (hp, level, exp, hero template id)
+        self.summaries = {}
+        # (account_id, turn_num) -> dict of characters/spells/treasures.
+        # Characters and spells are None when the JSON had nothing to
+        # replace the stored board with.
+        self.boards = {}
+        # (account_id, account_id, turn_num) -> outcome tuple or None,
+        # ordered as `pairing` leaves them.
+        self.combats = {}
+
+    def add_player(self, account_id):
+        if account_id not in self.account_ids:
+            self.account_ids.append(account_id)
+
+    def set_summary(self, account_id, turn_num, hp, xp, hero):
+        level, fraction = xp.split('.')
+        self.summaries[(account_id, turn_num)] = (
+            hp, int(level), int(fraction), int(hero))
+
+    def set_board(self, account_id, turn_num, characters, spells, treasures):
+        """
+        Lay a board over whatever we've already got for this turn.
+        Mirrors CombatSerializer.update: empty character and spell lists
+        leave the stored ones alone, treasures are always replaced.
+        """
+        board = self.boards.setdefault(
+            (account_id, turn_num),
+            {'characters': None, 'spells': None, 'treasures': None}
+        )
+        if characters:
+            board['characters'] = characters
+        if spells:
+            board['spells'] = spells
+        board['treasures'] = treasures
+
+    def set_combat(self, account_id, opponent_id, turn_num, outcome):
+        """Pair two players' turns. A missing outcome leaves any known one."""
+        first, second, outcome = pairing(account_id, opponent_id, outcome)
+        key = (first, second, turn_num)
+        if outcome is not None or key not in self.combats:
+            self.combats[key] = outcome
+
+    def merge(self, other):
+        """
+        Fold in another POV of the same game, as if `other` had been
+        written after this one.
+        """
+        for account_id in other.account_ids:
+            self.add_player(account_id)
+        self.placements.update(other.placements)
+        self.mythic.update(other.mythic)
+        self.summaries.update(other.summaries)
+        for (account_id, turn_num), board in other.boards.items():
+            self.set_board(account_id, turn_num, **board)
+        for (first, second, turn_num), outcome in other.combats.items():
+            self.set_combat(first, second, turn_num, outcome)
+
+    @classmethod
+    def from_validated_data(cls, validated_data):
+        """Build a record from `GameTarSerializer.validated_data`."""
+        record = cls(validated_data['uuid'])
+
+        main_player_id = validated_data['player_id']
+        for player in validated_data['players']:
+            account_id = player['player_id']
+            record.add_player(account_id)
+            if account_id == main_player_id:
+                record.placements[account_id] = validated_data['placement']
+                record.mythic[account_id] = validated_data['possibly_mythic']
+
+            turn_data = zip(player['healths'], player['xps'], player['heroes'])
+            for turn_num, (hp, xp, hero) in enumerate(turn_data, start=1):
+                record.set_summary(account_id, turn_num, hp, xp, hero)
+
+        for combat in validated_data['combat_info']:
+            for side, id_key in (
+                ('main_player', 'main_player_id'),
+                ('opponent', 'opponent_id')
+            ):
+                account_id = combat[id_key]
+                board = combat[side]
+                record.add_player(account_id)
+                record.set_board(
+                    account_id,
+                    board['round'],
+                    characters=[
+                        (
+                            item['base_character'].pk,
+                            item['attack'],
+                            item['health'],
+                            item['golden'],
+                            item['position']
+                        )
+                        for item in board['characters']
+                    ],
+                    spells=[spell.pk for spell in board['spells']],
+                    treasures=[treasure.pk for treasure in board['treasures']]
+                )
+            record.set_combat(
+                combat['main_player_id'],
+                combat['opponent_id'],
+                combat['main_player']['round'],
+                outcome_of(combat.get('sim_results'))
+            )
+
+        return record
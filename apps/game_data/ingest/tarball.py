@@ -0,0 +1,44 @@
+"""
+Reading daily roll-up tarballs.
+"""
+from uuid import UUID
+import re
+import tarfile
+
+# Cheap enough to run on every member, unlike a full json.loads.
+MATCH_ID_PATTERN = re.compile(rb'"match-id"\s*:\s*"([^"]*)"')
+
+
+def iter_rollup_members(fileobj):
+    """
+    Yield `(name, content)` for each file in a gzipped roll-up tarball.
+
+    `fileobj` is read as a forward-only stream (eg. an HTTP response body),
+    so we can start handling games before the download has finished and
+    only ever hold one member in memory at a time.
+    """
+    with tarfile.open(mode='r|gz', fileobj=fileobj) as tarball:
+        tarblock = tarball.next()
+        while tarblock is not None:
+            if tarblock.isfile():
+                content = tarball.extractfile(tarblock).read()
+                yield tarblock.name, content
+
+            # A streaming TarFile still remembers every header it has read.
+            # Drop them so memory stays flat however big the roll-up is.
+            tarball.members = []
+            tarblock = tarball.next()
+
+
+def member_match_id(content):
+    """
+    The match UUID of a member's raw JSON, without parsing all of it.
+    None if there isn't a readable one.
+    """
+    found = MATCH_ID_PATTERN.search(content)
+    if found is None:
+        return None
+    try:
+        return UUID(found.group(1).decode())
+    except ValueError:
+        return None
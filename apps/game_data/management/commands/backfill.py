@@ -0,0 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import requests
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.game_data.ingest.dbprofile import PROFILES
+from apps.game_data.ingest.download import (
+    RollupCache,
+    date_range,
+    fetch_rollup,
+    rollup_session
+)
+from apps.game_data.ingest.pipeline import RollupIngestor
+
+
+class Command(BaseCommand):
+    """
+    Load every daily roll-up between two dates.
+
+    Downloads run in a thread pool over one pooled session, and each day
+    is ingested as soon as it and the days before it have arrived, while
+    later days keep downloading. Tarballs are kept in SBB_ROLLUP_CACHE, so
+    a day is only ever downloaded once.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('start', type=date.fromisoformat)
+        parser.add_argument('end', type=date.fromisoformat)
+
+        parser.add_argument(
+            '--downloads', type=int, default=4,
+            help='Number of roll-ups to download at once.'
+        )
+        # Passed through to load_bucket for each day.
+        parser.add_argument('--workers', type=int, default=1)
+        parser.add_argument('--merge-window', type=int, default=256)
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--force', action='store_true')
+        parser.add_argument(
+            '--db-profile', choices=PROFILES, default='default')
+        parser.add_argument(
+            '--validator', choices=RollupIngestor.VALIDATORS, default='fast')
+
+    def handle(self, *args, **options):
+
+        if options['end'] < options['start']:
+            raise CommandError('end must not be before start.')
+
+        cache = RollupCache(settings.SBB_ROLLUP_CACHE)
+        session = rollup_session(pool_size=options['downloads'])
+        with session, ThreadPoolExecutor(options['downloads']) as pool:
+            downloads = [
+                (day, pool.submit(
+                    fetch_rollup, session, settings.SBB_ROLLUP_URL, day, cache))
+                for day in date_range(options['start'], options['end'])
+            ]
+            for day, download in downloads:
+                try:
+                    path = download.result()
+                except requests.RequestException as e:
+                    print(f'{day}: download failed - {e}')
+                    continue
+                if path is None:
+                    print(f'{day}: no roll-up.')
+                    continue
+
+                print(f'{day}:')
+                call_command(
+                    'load_bucket',
+                    str(day),
+                    file=path,
+                    workers=options['workers'],
+                    merge_window=options['merge_window'],
+                    batch_size=options['batch_size'],
+                    force=options['force'],
+                    db_profile=options['db_profile'],
+                    validator=options['validator']
+                )
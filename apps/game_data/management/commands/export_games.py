@@ -0,0 +1,54 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.game_data.export import CHUNK_SIZE, EXPORTS, FORMATS, export
+from apps.game_data.filters import filter_games
+from apps.game_data.models import game as game_models
+from apps.game_data.serializers.api import GameFilterSerializer
+
+
+class Command(BaseCommand):
+    """
+    Stream every stored turn or board row out as NDJSON or CSV, in
+    constant memory.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=EXPORTS)
+        parser.add_argument(
+            '--format', dest='file_format', choices=FORMATS,
+            default='ndjson'
+        )
+        parser.add_argument(
+            '--output', help='Write here rather than to stdout.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+        # Same as the game list's filters.
+        parser.add_argument('--player')
+        parser.add_argument('--hero', type=int)
+        parser.add_argument('--placement', type=int)
+        parser.add_argument('--character', type=int)
+
+    def handle(self, *args, **options):
+        filters = GameFilterSerializer(data={
+            name: options[name]
+            for name in ('player', 'hero', 'placement', 'character')
+            if options[name] is not None
+        })
+        if not filters.is_valid():
+            raise CommandError(f'Bad filters - {filters.errors}')
+        games = None
+        if filters.validated_data:
+            games = filter_games(
+                game_models.SBBGame.objects.all(), **filters.validated_data)
+
+        chunks = export(
+            options['kind'], options['file_format'], games,
+            options['chunk_size']
+        )
+        if options['output']:
+            with open(options['output'], 'w', newline='') as output_file:
+                output_file.writelines(chunks)
+        else:
+            sys.stdout.writelines(chunks)
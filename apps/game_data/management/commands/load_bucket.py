@@ -1,54 +1,137 @@
-from io import BytesIO
+from contextlib import ExitStack
 import json
-import requests
-import tarfile
+import os
 
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
 
-from apps.game_data.serializers.game import GameTarSerializer
-from apps.game_data.models.game import SBBGame
+from apps.game_data.ingest.dbprofile import PROFILES, ingest_profile
+from apps.game_data.ingest.download import (
+    RollupCache,
+    open_rollup,
+    rollup_session
+)
+from apps.game_data.ingest.instrument import IngestProfiler
+from apps.game_data.ingest.ledger import IngestLedger
+from apps.game_data.ingest.parallel import ParallelIngestor
+from apps.game_data.ingest.pipeline import RollupIngestor
+from apps.game_data.ingest.tarball import iter_rollup_members
 
 
 class Command(BaseCommand):
 
-    # TODO - make this pull from an setting/env var
-    url_root = 'https://9n2ntsouxb.execute-api.us-east-1.amazonaws.com/prod/api/v1/data/daily-rollup'
-
     def add_arguments(self, parser):
         # Positional arguments
         parser.add_argument('date', nargs='?')
 
+        parser.add_argument(
+            '--file',
+            help='Load a roll-up tarball from disk instead of the bucket.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Number of processes to ingest with.'
+        )
+        parser.add_argument(
+            '--merge-window', type=int, default=256,
+            help='How many recent games to hold back for merging POVs.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=50,
+            help='How many games to commit per transaction.'
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Load members again even if an earlier run stored them.'
+        )
+        parser.add_argument(
+            '--db-profile', choices=PROFILES, default='default',
+            help="'ingest' tunes SQLite for bulk loading while this runs."
+        )
+        parser.add_argument(
+            '--validator', choices=RollupIngestor.VALIDATORS, default='fast',
+            help="'drf' validates every game with the serializers."
+        )
+        parser.add_argument(
+            '--profile', action='store_true',
+            help='Time each ingest stage and print a summary at the end.'
+        )
+        parser.add_argument(
+            '--trace',
+            help='With --profile, write per-game detail to this NDJSON file.'
+        )
+
     def handle(self, *args, **options):
 
-        file_name = f"{options['date']}.tar.gz"
+        if options['workers'] > 1 and options['profile']:
+            raise CommandError("--profile can't be used with --workers.")
 
-        response = requests.get(
-            url=f"{self.url_root}/{file_name}",
-            stream=True
-        )
+        with ExitStack() as stack:
+            if options['file']:
+                file_stream = stack.enter_context(open(options['file'], 'rb'))
+            else:
+                session = stack.enter_context(rollup_session())
+                # Streamed, so games are stored while the rest downloads.
+                file_stream = stack.enter_context(open_rollup(
+                    session,
+                    settings.SBB_ROLLUP_URL,
+                    options['date'],
+                    RollupCache(settings.SBB_ROLLUP_CACHE)
+                ))
+                if file_stream is None:
+                    # TODO Check for standard AWS error message XML
+                    print(f"No roll-up for {options['date']}.")
+                    return
+            stack.enter_context(ingest_profile(options['db_profile']))
+            self.ingest(file_stream, options)
+
+    def ingest(self, file_stream, options):
+        """Stream every game out of a gzipped roll-up and store it."""
+        # Roll-ups are tracked by date, or by file name if loaded from disk.
+        rollup = None
+        if not options['force']:
+            rollup = options['date'] or os.path.basename(options['file'])
 
-        if response.status_code == 200:
+        if options['workers'] > 1:
+            ingestor = ParallelIngestor(
+                workers=options['workers'],
+                merge_window=options['merge_window'],
+                rollup=rollup,
+                batch_size=options['batch_size'],
+                validator=options['validator']
+            )
+            ingestor.ingest_members(iter_rollup_members(file_stream))
+            self.report(ingestor)
+            return
 
-            # TODO Check for standard AWS error message XML
-            file_stream = BytesIO(response.raw.read())
-            counter = 0
-            with tarfile.open(mode='r:gz', fileobj=file_stream) as tarball:
-                for tarblock in tarball.getmembers():
-                    as_file = tarball.extractfile(tarblock)
-                    data = json.load(as_file)
+        with ExitStack() as stack:
+            profiler = None
+            if options['profile']:
+                trace_file = None
+                if options['trace']:
+                    trace_file = stack.enter_context(
+                        open(options['trace'], 'w'))
+                profiler = stack.enter_context(
+                    IngestProfiler(trace_file=trace_file))
 
-                    serializer = GameTarSerializer(data=data)
+            ingestor = RollupIngestor(
+                merge_window=options['merge_window'],
+                profiler=profiler,
+                ledger=IngestLedger(rollup) if rollup else None,
+                batch_size=options['batch_size'],
+                validator=options['validator']
+            )
+            ingestor.ingest_members(iter_rollup_members(file_stream))
 
-                    if serializer.is_valid():
-                        try:
-                            serializer.save()
-                            counter = counter + 1
-                        except Exception as e:
-                            print(tarblock.name)
-                            print(e)
-                    else:
-                        # TODO set up some real logging
-                        print(tarblock.name)
-                        print(serializer.errors)
+        self.report(ingestor)
+        if profiler is not None:
+            print(json.dumps(profiler.summary(), indent=2))
 
-            print(f'{counter} games recorded.')
+    def report(self, ingestor):
+        # TODO set up some real logging
+        for name, error in ingestor.failures:
+            print(name)
+            print(error)
+        if ingestor.skipped:
+            print(f'{ingestor.skipped} games already recorded, skipped.')
+        print(f'{ingestor.recorded} games recorded.')
@@ -1,32 +1,51 @@
-import json
 import requests
 
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
 
-from apps.game_data.serializers.meta import GamePieceSerializer
+from apps.game_data.ingest.dbprofile import PROFILES, ingest_profile
+from apps.game_data.ingest.download import rollup_session
+from apps.game_data.ingest.metadata import sync_pieces
 
 
 class Command(BaseCommand):
-
-    url_root = 'https://9n2ntsouxb.execute-api.us-east-1.amazonaws.com/prod/api/v1/data/daily-rollup'
-    github_url = 'https://raw.githubusercontent.com/SBBTracker/SBBTracker/main/assets/template-ids.json'
-
-    #def add_arguments(self, parser):
-    #    # Positional arguments
-    #    parser.add_argument('path', nargs='?')
+    """
+    Sync the game piece tables with template-ids.json. Skips the work
+    when the document hasn't changed since the last sync.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', default=None,
+            help='Sync from here rather than SBB_TEMPLATE_IDS_URL.'
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Fetch and sync even if nothing changed since last time.'
+        )
+        parser.add_argument(
+            '--db-profile', choices=PROFILES, default='default',
+            help="'ingest' tunes SQLite for bulk loading while this runs."
+        )
 
     def handle(self, *args, **options):
 
-        # Run w/ ./apps/game_data/tests/json_samples/meta_sample.json
-        # Until raschy gets an auto-refreshing bucket up
-        response = requests.get(url=f"{self.github_url}")
-        if response.status_code == 200:
-
-            json_data = response.json()
-            serializer = GamePieceSerializer(data=json_data, many=True)
-
-            if serializer.is_valid():
-                objs = serializer.save()
-                print(f'{len(objs)} records created.')
-            else:
-                print(f'Data invalid - {serializer.errors}')
+        url = options['url'] or settings.SBB_TEMPLATE_IDS_URL
+        try:
+            with rollup_session(pool_size=1) as session, \
+                    ingest_profile(options['db_profile']):
+                result = sync_pieces(session, url, force=options['force'])
+        except requests.RequestException as e:
+            raise CommandError(f'Could not fetch {url}: {e}')
+        except ValidationError as e:
+            print(f'Data invalid - {e.detail}')
+            return
+
+        if result['status'] == 'synced':
+            print(
+                f"{result['added']} pieces added, {result['changed']} "
+                f"changed, {result['unchanged']} unchanged."
+            )
+        else:
+            print(f'template-ids.json {result["status"]}, nothing to do.')
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apps.game_data.models.game import SBBBoard
+
+
+class Command(BaseCommand):
+    """
+    Delete board snapshots no turn uses any more. Rewriting a game's
+    boards leaves its old snapshots behind. Run while nothing is
+    ingesting.
+    """
+
+    def handle(self, *args, **options):
+        deleted = SBBBoard.objects.prune()
+        print(f'Deleted {deleted} unused board snapshots.')
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.game_data import composition
+
+
+def turn_count(bitmaps):
+    return bin(bitmaps[0]).count('1') if bitmaps else 0
+
+
+class Command(BaseCommand):
+    """
+    Check the composition index against the stored boards, and rebuild
+    it from them. Needed after writing games other than by ingesting
+    roll-ups, eg. through the API.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Only compare, failing if they differ. Don't rebuild."
+        )
+
+    def handle(self, *args, **options):
+        mismatches = composition.mismatches()
+        for model, key, stored, computed in mismatches:
+            print(
+                f'{model.__name__} {key}: stored {turn_count(stored)} '
+                f'turns, computed {turn_count(computed)}'
+            )
+
+        if options['check']:
+            if mismatches:
+                raise CommandError(
+                    f'The index differs for {len(mismatches)} postings.')
+            print('Composition index matches.')
+            return
+
+        composition.rebuild()
+        print(
+            f'Rebuilt the composition index, {len(mismatches)} postings '
+            f'were out.')
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.game_data.models.stats import SBBHeroStats
+
+
+class Command(BaseCommand):
+    """
+    Check the incrementally kept hero stats against a full recomputation
+    from every stored game, and rebuild them from it.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Only compare, failing if they differ. Don't rebuild."
+        )
+
+    def handle(self, *args, **options):
+        mismatches = SBBHeroStats.objects.mismatches()
+        for hero_id, (stored, computed) in sorted(mismatches.items()):
+            print(
+                f'Hero {hero_id}: stored {dict(stored)}, '
+                f'computed {dict(computed)}'
+            )
+
+        if options['check']:
+            if mismatches:
+                raise CommandError(
+                    f'Stats differ for {len(mismatches)} heroes.')
+            print('Hero stats match.')
+            return
+
+        SBBHeroStats.objects.rebuild()
+        print(
+            f'Rebuilt hero stats, {len(mismatches)} heroes were out.')
@@ -0,0 +1,104 @@
+from datetime import datetime, timezone
+import json
+import subprocess
+
+from django.core.management.base import BaseCommand
+
+from apps.game_data.benchmarks.api import GameDetailBenchmark
+from apps.game_data.benchmarks.boards import BoardStorageBenchmark
+from apps.game_data.benchmarks.composition import CompositionBenchmark
+from apps.game_data.benchmarks.export import ExportBenchmark
+from apps.game_data.benchmarks.matchups import MatchupBenchmark
+from apps.game_data.benchmarks.ingest import (
+    DBProfileBenchmark,
+    IngestBenchmark
+)
+from apps.game_data.benchmarks.series import SeriesBenchmark
+from apps.game_data.benchmarks.upserts import UpsertBenchmark
+from apps.game_data.benchmarks.validate import ValidatorBenchmark
+
+SUITES = {
+    suite.name: suite
+    for suite in (
+        IngestBenchmark,
+        DBProfileBenchmark,
+        UpsertBenchmark,
+        ValidatorBenchmark,
+        GameDetailBenchmark,
+        ExportBenchmark,
+        MatchupBenchmark,
+        CompositionBenchmark,
+        BoardStorageBenchmark,
+        SeriesBenchmark
+    )
+}
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Run a benchmark suite against a scratch database and report '
+        'the results as JSON. --output/--compare go before the suite name.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', help='Also write the results to this file.')
+        parser.add_argument(
+            '--compare',
+            help='Earlier results file to print the change against.'
+        )
+
+        subparsers = parser.add_subparsers(dest='suite', required=True)
+        for name, suite in SUITES.items():
+            suite().add_arguments(subparsers.add_parser(name))
+
+    def handle(self, *args, **options):
+        suite = SUITES[options['suite']]()
+        suite_options = {
+            key: value for key, value in options.items()
+            if key not in (
+                'suite', 'output', 'compare', 'verbosity', 'settings',
+                'pythonpath', 'traceback', 'no_color', 'force_color',
+                'skip_checks'
+            )
+        }
+
+        report = {
+            'suite': suite.name,
+            'commit': current_commit(),
+            'created': datetime.now(timezone.utc).isoformat(),
+            'options': suite_options,
+            'results': suite.run(**suite_options),
+        }
+
+        as_text = json.dumps(report, indent=2)
+        self.stdout.write(as_text)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(as_text)
+
+        if options['compare']:
+            with open(options['compare'], 'r') as compare_file:
+                previous = json.load(compare_file)
+            self.stdout.write(
+                f"Change since {previous.get('commit') or 'previous run'}:")
+            for metric, value in report['results'].items():
+                old_value = previous['results'].get(metric)
+                if not isinstance(value, (int, float)) or not old_value:
+                    continue
+                change = (value - old_value) / old_value * 100
+                self.stdout.write(
+                    f'  {metric}: {old_value:.4g} -> {value:.4g} '
+                    f'({change:+.1f}%)'
+                )
@@ -0,0 +1,122 @@
+"""
+How every hero fares against every other, from stored combat rounds.
+"""
+from django.core.cache import cache
+from django.db.models import Count, F, Sum
+
+from apps.game_data.models import game as game_models
+from apps.game_data.models.ingest import VersionStamp
+from apps.game_data.registry import get_registry, refresh_registry
+
+# Bumped by RollupIngestor whenever it commits games, so cached
+# matrices go stale.
+STAMP = 'combats'
+
+
+class MatchupMatrix:
+    """
+    Hero x hero results, indexed by position in `heroes` (template ids):
+    `rounds[i][j]` fights between them, `win_rate[i][j]` the chance hero
+    i wins one, and `damage[i][j]` what hero i can expect to deal per
+    fight. Cells with no rounds are None.
+
+    Outcomes are the tracker's simulated ones, rounds without one are
+    left out.
+    """
+
+    def __init__(self, heroes, rounds, win_rate, damage, version=0):
+        self.heroes = heroes
+        self.index = {hero: i for i, hero in enumerate(heroes)}
+        self.rounds = rounds
+        self.win_rate = win_rate
+        self.damage = damage
+        self.version = version
+
+    def get(self, hero, opponent):
+        """`{'rounds', 'win_rate', 'damage'}` for two hero template ids."""
+        i = self.index[hero]
+        j = self.index[opponent]
+        return {
+            'rounds': self.rounds[i][j],
+            'win_rate': self.win_rate[i][j],
+            'damage': self.damage[i][j],
+        }
+
+    @classmethod
+    def from_db(cls, version=0):
+        """
+        Sums every hero pairing's rounds in one GROUP BY pass over the
+        combat table's `combat_matchups` index, then fills in both sides
+        of each pairing.
+        """
+        pairs = list(
+            game_models.SBBCombatRound.objects
+            .filter(
+                hero__isnull=False,
+                opponent_hero__isnull=False,
+                win_percent__isnull=False
+            )
+            .values_list('hero_id', 'opponent_hero_id')
+            .annotate(
+                rounds=Count('pk'),
+                wins=Sum('win_percent'),
+                losses=Sum('loss_percent'),
+                dealt=Sum(F('win_percent') * F('win_damage')),
+                taken=Sum(F('loss_percent') * F('loss_damage'))
+            )
+            .order_by()
+        )
+
+        registry = get_registry()
+        hero_pks = {pk for pair in pairs for pk in pair[:2]}
+        if any(('HERO', pk) not in registry.by_pk for pk in hero_pks):
+            registry = refresh_registry()
+        template_ids = {
+            pk: registry.by_pk[('HERO', pk)].template_id for pk in hero_pks}
+        heroes = sorted(set(template_ids.values()))
+        index = {hero: i for i, hero in enumerate(heroes)}
+
+        size = len(heroes)
+        rounds = [[0] * size for _ in range(size)]
+        wins = [[0.0] * size for _ in range(size)]
+        dealt = [[0.0] * size for _ in range(size)]
+        for hero, opponent, count, won, lost, hit, taken in pairs:
+            i = index[template_ids[hero]]
+            j = index[template_ids[opponent]]
+            # Each round is a result for both sides.
+            rounds[i][j] += count
+            wins[i][j] += won
+            dealt[i][j] += hit
+            rounds[j][i] += count
+            wins[j][i] += lost
+            dealt[j][i] += taken
+
+        # Percentages, so damage sums are a hundred times too big too.
+        win_rate = [
+            [won / count / 100 if count else None
+             for won, count in zip(wins_row, rounds_row)]
+            for wins_row, rounds_row in zip(wins, rounds)
+        ]
+        damage = [
+            [hit / count / 100 if count else None
+             for hit, count in zip(dealt_row, rounds_row)]
+            for dealt_row, rounds_row in zip(dealt, rounds)
+        ]
+        return cls(heroes, rounds, win_rate, damage, version)
+
+
+def cache_key(version):
+    return f'sbb:matchups:{version}'
+
+
+def get_matchups():
+    """
+    The matchup matrix, from the cache unless games have been ingested
+    since it was computed. One query when it's cached.
+    """
+    version = VersionStamp.objects.current(STAMP)
+    matrix = cache.get(cache_key(version))
+    if matrix is None:
+        matrix = MatchupMatrix.from_db(version)
+        cache.set(cache_key(version), matrix, timeout=None)
+    return matrix
@@ -0,0 +1,27 @@
+# Generated by Django 4.0.10 on 2026-10-18 09:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game_data', '0003_sbbgame_player_list_sbbplayer_possibly_mythic_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestedMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rollup', models.CharField(max_length=128)),
+                ('name', models.CharField(max_length=255)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('committed', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='ingestedmember',
+            constraint=models.UniqueConstraint(fields=('rollup', 'name', 'content_hash'), name='unique_rollup_member'),
+        ),
+    ]
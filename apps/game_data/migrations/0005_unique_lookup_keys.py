@@ -0,0 +1,129 @@
+# Generated by Django 4.0.10 on 2026-10-18 09:45
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def duplicates(queryset, *fields):
+    """Yield `(kept_id, [duplicate ids])`, keeping the oldest row."""
+    groups = (
+        queryset.values(*fields)
+        .annotate(rows=Count('id'), kept=Min('id'))
+        .filter(rows__gt=1)
+    )
+    for group in groups:
+        same = queryset.filter(**{field: group[field] for field in fields})
+        yield group['kept'], list(
+            same.exclude(id=group['kept']).values_list('id', flat=True))
+
+
+def merge_duplicate_pieces(apps, schema_editor):
+    """
+    Point everything at the oldest row for each template id, which is the
+    one GamePieceManager.by_template_id() was already handing out.
+    """
+    turn_model = apps.get_model('game_data', 'SBBGameTurn')
+    treasure_links = turn_model._meta.get_field('treasures').remote_field.through
+    references = {
+        'SBBHero': [(turn_model, 'hero_id')],
+        'SBBCharacter': [
+            (apps.get_model('game_data', 'SBBGameCharacter'),
+             'base_character_id')
+        ],
+        'SBBSpell': [
+            (apps.get_model('game_data', 'SBBGameSpell'), 'base_spell_id')
+        ],
+        'SBBTreasure': [],
+    }
+    for model_name, referrers in references.items():
+        model = apps.get_model('game_data', model_name)
+        for kept, others in duplicates(model.objects.all(), 'template_id'):
+            for referrer, field in referrers:
+                referrer.objects.filter(
+                    **{f'{field}__in': others}).update(**{field: kept})
+            if model_name == 'SBBTreasure':
+                # A turn may already link both, drop those rather than
+                # collide with the through table's own unique constraint.
+                linked = treasure_links.objects.filter(
+                    sbbtreasure_id=kept).values('sbbgameturn_id')
+                treasure_links.objects.filter(
+                    sbbtreasure_id__in=others, sbbgameturn_id__in=linked
+                ).delete()
+                treasure_links.objects.filter(
+                    sbbtreasure_id__in=others).update(sbbtreasure_id=kept)
+            model.objects.filter(id__in=others).delete()
+
+
+def merge_duplicate_participants(apps, schema_editor):
+    participant_model = apps.get_model('game_data', 'SBBGameParticipant')
+    turn_model = apps.get_model('game_data', 'SBBGameTurn')
+    for kept, others in duplicates(
+            participant_model.objects.all(), 'match_id', 'player_id'):
+        # Duplicated turns this leaves are merged next.
+        turn_model.objects.filter(
+            participant_id__in=others).update(participant_id=kept)
+        participant_model.objects.filter(id__in=others).delete()
+
+
+def merge_duplicate_turns(apps, schema_editor):
+    """
+    Keep the oldest turn. Its board rows win, the duplicates' are only
+    moved over where it has none of that kind.
+    """
+    turn_model = apps.get_model('game_data', 'SBBGameTurn')
+    treasure_links = turn_model._meta.get_field('treasures').remote_field.through
+    board_rows = (
+        (apps.get_model('game_data', 'SBBGameCharacter'), 'game_turn_id'),
+        (apps.get_model('game_data', 'SBBGameSpell'), 'game_turn_id'),
+        (treasure_links, 'sbbgameturn_id'),
+    )
+    for kept, others in duplicates(
+            turn_model.objects.all(), 'participant_id', 'turn_num'):
+        for model, field in board_rows:
+            for other in others:
+                rows = model.objects.filter(**{field: other})
+                if model.objects.filter(**{field: kept}).exists():
+                    rows.delete()
+                else:
+                    rows.update(**{field: kept})
+        turn_model.objects.filter(id__in=others).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game_data', '0004_ingestedmember'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_pieces, migrations.RunPython.noop),
+        migrations.RunPython(
+            merge_duplicate_participants, migrations.RunPython.noop),
+        migrations.RunPython(
+            merge_duplicate_turns, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='sbbcharacter',
+            constraint=models.UniqueConstraint(fields=('template_id',), name='sbbcharacter_unique_template_id'),
+        ),
+        migrations.AddConstraint(
+            model_name='sbbgameparticipant',
+            constraint=models.UniqueConstraint(fields=('match', 'player'), name='unique_match_player'),
+        ),
+        migrations.AddConstraint(
+            model_name='sbbgameturn',
+            constraint=models.UniqueConstraint(fields=('participant', 'turn_num'), name='unique_participant_turn'),
+        ),
+        migrations.AddConstraint(
+            model_name='sbbhero',
+            constraint=models.UniqueConstraint(fields=('template_id',), name='sbbhero_unique_template_id'),
+        ),
+        migrations.AddConstraint(
+            model_name='sbbspell',
+            constraint=models.UniqueConstraint(fields=('template_id',), name='sbbspell_unique_template_id'),
+        ),
+        migrations.AddConstraint(
+            model_name='sbbtreasure',
+            constraint=models.UniqueConstraint(fields=('template_id',), name='sbbtreasure_unique_template_id'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.0.10 on 2026-10-18 10:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game_data', '0005_unique_lookup_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncedSource',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.CharField(max_length=255, unique=True)),
+                ('content_hash', models.CharField(blank=True, max_length=64)),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=64)),
+                ('synced', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.0.10 on 2026-10-18 10:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game_data', '0007_versionstamp'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sbbgamecharacter',
+            index=models.Index(fields=['base_character', 'game_turn'], name='character_base_turn'),
+        ),
+        migrations.AddIndex(
+            model_name='sbbgameparticipant',
+            index=models.Index(fields=['player', 'placement', 'match'], name='participant_player_game'),
+        ),
+        migrations.AddIndex(
+            model_name='sbbgameparticipant',
+            index=models.Index(fields=['placement', 'match'], name='participant_placement_game'),
+        ),
+        migrations.AddIndex(
+            model_name='sbbgameturn',
+            index=models.Index(fields=['hero', 'participant'], name='turn_hero_participant'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.0.10 on 2026-10-18 10:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game_data', '0008_game_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SBBHeroStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('games', models.PositiveIntegerField(default=0)),
+                ('placed_1', models.PositiveIntegerField(default=0)),
+                ('placed_2', models.PositiveIntegerField(default=0)),
+                ('placed_3', models.PositiveIntegerField(default=0)),
+                ('placed_4', models.PositiveIntegerField(default=0)),
+                ('placed_5', models.PositiveIntegerField(default=0)),
+                ('placed_6', models.PositiveIntegerField(default=0)),
+                ('placed_7', models.PositiveIntegerField(default=0)),
+                ('placed_8', models.PositiveIntegerField(default=0)),
+                ('placement_total', models.PositiveBigIntegerField(default=0)),
+                ('hero', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='game_data.sbbhero')),
+            ],
+        ),
+    ]
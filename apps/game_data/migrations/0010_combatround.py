@@ -0,0 +1,37 @@
+# Generated by Django 4.0.10 on 2026-10-18 10:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game_data', '0009_herostats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SBBCombatRound',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('win_percent', models.FloatField(null=True)),
+                ('tie_percent', models.FloatField(null=True)),
+                ('loss_percent', models.FloatField(null=True)),
+                ('win_damage', models.FloatField(null=True)),
+                ('loss_damage', models.FloatField(null=True)),
+                ('hero', models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='game_data.sbbhero')),
+                ('opponent_hero', models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='game_data.sbbhero')),
+                ('opponent_turn', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='game_data.sbbgameturn')),
+                ('turn', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='combats', to='game_data.sbbgameturn')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='sbbcombatround',
+            index=models.Index(fields=['hero', 'opponent_hero', 'win_percent', 'loss_percent', 'win_damage', 'loss_damage'], name='combat_matchups'),
+        ),
+        migrations.AddConstraint(
+            model_name='sbbcombatround',
+            constraint=models.UniqueConstraint(fields=('turn', 'opponent_turn'), name='unique_combat_pair'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.0.10 on 2026-10-18 10:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game_data', '0010_combatround'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SBBCharacterPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('block', models.PositiveIntegerField()),
+                ('turns', models.BinaryField()),
+                ('golden_turns', models.BinaryField(default=b'')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SBBTurnNumberPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('turn_num', models.IntegerField()),
+                ('block', models.PositiveIntegerField()),
+                ('turns', models.BinaryField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='sbbturnnumberposting',
+            index=models.Index(fields=['block'], name='turn_number_posting_block'),
+        ),
+        migrations.AddConstraint(
+            model_name='sbbturnnumberposting',
+            constraint=models.UniqueConstraint(fields=('turn_num', 'block'), name='unique_turn_number_posting'),
+        ),
+        migrations.AddField(
+            model_name='sbbcharacterposting',
+            name='character',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='game_data.sbbcharacter'),
+        ),
+        migrations.AddIndex(
+            model_name='sbbcharacterposting',
+            index=models.Index(fields=['block'], name='character_posting_block'),
+        ),
+        migrations.AddConstraint(
+            model_name='sbbcharacterposting',
+            constraint=models.UniqueConstraint(fields=('character', 'block'), name='unique_character_posting'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.0.10 on 2026-10-18 11:02
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game_data', '0011_composition_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SBBBoard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.BinaryField(max_length=16, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SBBBoardCharacter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attack', models.IntegerField()),
+                ('health', models.IntegerField()),
+                ('golden', models.BooleanField()),
+                ('position', models.IntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(7)])),
+                ('base_character', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='game_data.sbbcharacter')),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='characters', to='game_data.sbbboard')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='sbbgameturn',
+            name='board',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='turns', to='game_data.sbbboard'),
+        ),
+        migrations.AddIndex(
+            model_name='sbbboardcharacter',
+            index=models.Index(fields=['base_character', 'board'], name='board_character_base'),
+        ),
+    ]
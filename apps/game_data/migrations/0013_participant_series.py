@@ -0,0 +1,85 @@
+# Generated by Django 4.0.10 on 2026-10-18 11:12
+
+from array import array
+import sys
+
+from django.db import migrations, models
+
+# Copied from apps.game_data.series as it stood, so this migration keeps
+# doing the same thing whatever happens to that module.
+SERIES_FIELDS = {
+    'hp': 'hp_series',
+    'level': 'level_series',
+    'exp': 'exp_series',
+    'hero_id': 'hero_series',
+}
+MISSING = -2 ** 31
+
+
+def pack(turns):
+    """turn_num -> value or None, as little endian 32-bit ints."""
+    values = array('i', [MISSING] * max(turns, default=0))
+    for turn_num, value in turns.items():
+        values[turn_num - 1] = MISSING if value is None else value
+    while values and values[-1] == MISSING:
+        values.pop()
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+
+def pack_existing_turns(apps, schema_editor):
+    participant_model = apps.get_model('game_data', 'SBBGameParticipant')
+    turn_model = apps.get_model('game_data', 'SBBGameTurn')
+    rows = (
+        turn_model.objects.filter(hp__isnull=False)
+        .order_by('participant_id')
+        .values_list('participant_id', 'turn_num', *SERIES_FIELDS)
+    )
+    by_participant = {}
+    for participant_id, turn_num, *values in rows.iterator():
+        turns = by_participant.setdefault(
+            participant_id, {field: {} for field in SERIES_FIELDS})
+        for field, value in zip(SERIES_FIELDS, values):
+            turns[field][turn_num] = value
+    packed = [
+        participant_model(pk=pk, **{
+            SERIES_FIELDS[field]: pack(values)
+            for field, values in turns.items()
+        })
+        for pk, turns in by_participant.items()
+    ]
+    participant_model.objects.bulk_update(
+        packed, list(SERIES_FIELDS.values()), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game_data', '0012_board_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sbbgameparticipant',
+            name='exp_series',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='sbbgameparticipant',
+            name='hero_series',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='sbbgameparticipant',
+            name='hp_series',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='sbbgameparticipant',
+            name='level_series',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.RunPython(
+            pack_existing_turns, reverse_code=migrations.RunPython.noop),
+    ]
@@ -1,2 +1,5 @@
 from apps.game_data.models.meta import *
 from apps.game_data.models.game import *
+from apps.game_data.models.ingest import *
+from apps.game_data.models.stats import *
+from apps.game_data.models.composition import *
@@ -0,0 +1,62 @@
+"""
+An inverted index from characters to the boards that held them, for
+finding turns by composition without joining the character table to
+itself once per unit.
+"""
+from django.db import models
+
+from apps.game_data.models import meta as metadata
+
+# Turn pks are split into blocks of 2 ** BLOCK_BITS, a posting row
+# covering one block.
+BLOCK_BITS = 12
+
+
+class SBBCharacterPosting(models.Model):
+    """
+    The turns in one block whose board held `character`, as bitmaps:
+    bit `n` of `turns` is set if turn `block << BLOCK_BITS | n` had one,
+    and of `golden_turns` if it had a golden one. Little endian bytes,
+    trailing zero bytes left off.
+    """
+
+    character = models.ForeignKey(
+        metadata.SBBCharacter, on_delete=models.CASCADE, related_name='+')
+    block = models.PositiveIntegerField()
+    turns = models.BinaryField()
+    golden_turns = models.BinaryField(default=b'')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name='unique_character_posting',
+                fields=('character', 'block')
+            )
+        ]
+        # Refreshing reads a batch's blocks for every key.
+        indexes = [
+            models.Index(name='character_posting_block', fields=('block',)),
+        ]
+
+
+class SBBTurnNumberPosting(models.Model):
+    """
+    The turns in one block that were a player's `turn_num`th, laid out
+    as `SBBCharacterPosting.turns`. For narrowing searches to a range
+    of turns.
+    """
+
+    turn_num = models.IntegerField()
+    block = models.PositiveIntegerField()
+    turns = models.BinaryField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name='unique_turn_number_posting',
+                fields=('turn_num', 'block')
+            )
+        ]
+        indexes = [
+            models.Index(name='turn_number_posting_block', fields=('block',)),
+        ]
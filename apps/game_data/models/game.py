@@ -1,6 +1,9 @@
+import hashlib
+
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
+from apps.game_data import series
 from apps.game_data.models import meta as metadata
 
 
@@ -20,6 +23,53 @@ class SBBGame(models.Model):
     # Ask isik - can we get client patch stamp?
 
 
+class SBBGameParticipantManager(models.Manager):
+
+    def resolve_many(self, match, players):
+        """
+        Return an account_id -> SBBGameParticipant mapping of `match`'s
+        participants, for `players` (account_id -> SBBPlayer). Missing
+        participants are inserted in bulk.
+        One query if they all exist already.
+        """
+        by_player = {
+            participant.player_id: participant
+            for participant in self.filter(match=match)
+        }
+        missing = {
+            player.pk: self.model(match=match, player=player)
+            for player in players.values()
+            if player.pk not in by_player
+        }
+        if missing:
+            # Safe against a racing insert thanks to unique_match_player.
+            self.bulk_create(missing.values(), ignore_conflicts=True)
+            by_player = {
+                participant.player_id: participant
+                for participant in self.filter(match=match)
+            }
+        return {
+            account_id: by_player[player.pk]
+            for account_id, player in players.items()
+        }
+
+    def series_matrix(self, field, participants=None, width=None):
+        """
+        `(pks, rows, width)` for `field`'s series, one of 'hp', 'level',
+        'exp' or 'hero_id', across `participants`, a queryset, or all of
+        them. `rows` is a `series.matrix` in the same order as `pks`.
+        One query however many games they span.
+        """
+        participants = self.all() if participants is None else participants
+        pks = []
+        packed = []
+        for pk, data in participants.values_list(
+                'pk', series.SERIES_FIELDS[field]).iterator():
+            pks.append(pk)
+            packed.append(data)
+        return (pks, *series.matrix(packed, width))
+
+
 class SBBGameParticipant(models.Model):
     """
     Refers to a player 'in-lobby' for a specified game.
@@ -28,13 +78,57 @@ class SBBGameParticipant(models.Model):
     match = models.ForeignKey(SBBGame, on_delete=models.CASCADE)
     player = models.ForeignKey(metadata.SBBPlayer, on_delete=models.PROTECT)
     placement = models.IntegerField(null=True)
+    # Each turn's summary, packed by `series`, so a curve across many
+    # games is one column read rather than a row per turn.
+    hp_series = models.BinaryField(default=b'')
+    level_series = models.BinaryField(default=b'')
+    exp_series = models.BinaryField(default=b'')
+    hero_series = models.BinaryField(default=b'')
+
+    objects = SBBGameParticipantManager()
+
+    def series(self, field):
+        """
+        `field`, one of 'hp', 'level', 'exp' or 'hero_id', per turn as an
+        array('i'), turn 1 first, with `series.MISSING` for turns that
+        have no summary.
+        """
+        return series.unpack(getattr(self, series.SERIES_FIELDS[field]))
+
+    def set_series(self, turns):
+        """
+        Write `turns`' summaries over the packed series, leaving other
+        turns' alone. Returns whether any changed; saving is up to the
+        caller.
+        """
+        changed = False
+        for field, series_field in series.SERIES_FIELDS.items():
+            old = bytes(getattr(self, series_field))
+            new = series.merged(old, {
+                turn.turn_num: getattr(turn, field) for turn in turns})
+            if new != old:
+                setattr(self, series_field, new)
+                changed = True
+        return changed
 
     class Meta:
         constraints = [
             models.CheckConstraint(
                 name='place_min', check=models.Q(placement__gte=1)),
             models.CheckConstraint(
-                name='place_max', check=models.Q(placement__lte=8))
+                name='place_max', check=models.Q(placement__lte=8)),
+            models.UniqueConstraint(
+                name='unique_match_player', fields=('match', 'player'))
+        ]
+        # Each ends in the game, so the game list's filters can be
+        # answered from the index alone.
+        indexes = [
+            models.Index(
+                name='participant_player_game',
+                fields=('player', 'placement', 'match')),
+            models.Index(
+                name='participant_placement_game',
+                fields=('placement', 'match')),
         ]
 
 
@@ -51,6 +145,10 @@ class SBBGameTurn(models.Model):
     hp = models.IntegerField(null=True)
     level = models.IntegerField(null=True)
     exp = models.IntegerField(null=True)
+    # Set instead of SBBGameCharacter rows when boards are stored as
+    # snapshots, see SBB_BOARD_SNAPSHOTS.
+    board = models.ForeignKey(
+        'SBBBoard', null=True, on_delete=models.PROTECT, related_name='turns')
     treasures = models.ManyToManyField(metadata.SBBTreasure)
     characters = models.ManyToManyField(
         metadata.SBBCharacter,
@@ -68,7 +166,16 @@ class SBBGameTurn(models.Model):
             models.CheckConstraint(
                 name='exp_floor', check=models.Q(exp__gte=0)),
             models.CheckConstraint(
-                name='exp_cap', check=models.Q(exp__lt=3))
+                name='exp_cap', check=models.Q(exp__lt=3)),
+            models.UniqueConstraint(
+                name='unique_participant_turn',
+                fields=('participant', 'turn_num')
+            )
+        ]
+        indexes = [
+            models.Index(
+                name='turn_hero_participant',
+                fields=('hero', 'participant')),
         ]
 
 
@@ -91,6 +198,141 @@ class SBBGameCharacter(models.Model):
         )
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                name='character_base_turn',
+                fields=('base_character', 'game_turn')),
+        ]
+
+
+class SBBBoardManager(models.Manager):
+
+    @staticmethod
+    def digest(rows):
+        """
+        Hash of a board's `(base_character_id, attack, health, golden,
+        position)` rows, the same whatever order they're listed in.
+        """
+        canonical = ';'.join(
+            ','.join(str(int(value)) for value in row) for row in sorted(rows))
+        return hashlib.blake2b(canonical.encode(), digest_size=16).digest()
+
+    def resolve_many(self, boards):
+        """
+        Return a digest -> SBBBoard mapping for every one of `boards`,
+        non-empty lists of character rows, storing any not seen before
+        along with their characters.
+        """
+        boards = {self.digest(rows): rows for rows in boards}
+        if not boards:
+            return {}
+        found = self.in_bulk(list(boards), field_name='digest')
+        missing = [digest for digest in boards if digest not in found]
+        if missing:
+            # Boards someone else got to first are skipped rather than
+            # raised on, so re-read to get every pk.
+            self.bulk_create(
+                [self.model(digest=digest) for digest in missing],
+                batch_size=500,
+                ignore_conflicts=True
+            )
+            created = self.in_bulk(missing, field_name='digest')
+            # Theirs were committed along with their characters, so only
+            # boards without any are the ones inserted here.
+            theirs = set(
+                SBBBoardCharacter.objects
+                .filter(board__in=created.values())
+                .values_list('board_id', flat=True)
+            )
+            SBBBoardCharacter.objects.bulk_create(
+                [
+                    SBBBoardCharacter(
+                        board=board,
+                        **dict(zip(BOARD_CHARACTER_FIELDS, row))
+                    )
+                    for digest, board in created.items()
+                    if board.pk not in theirs
+                    for row in sorted(boards[digest])
+                ],
+                batch_size=500
+            )
+            found.update(created)
+        return found
+
+    def prune(self):
+        """
+        Delete snapshots no turn points at any more, eg. after their
+        turns were rewritten with other boards, returning how many went.
+        Writers may be about to point a turn at a board they've just
+        resolved, so only run this while nothing is ingesting.
+        """
+        _, deleted = self.filter(turns__isnull=True).delete()
+        return deleted.get(self.model._meta.label, 0)
+
+    @staticmethod
+    def character_rows(turns=None, *fields):
+        """
+        `(turn pk, *fields)` for every character on the boards of
+        `turns`, a queryset of SBBGameTurn (or every turn), however each
+        board is stored. One UNION query, ordered by the first query's
+        column names, eg. `.order_by('game_turn_id', 'position')`.
+        """
+        rows = SBBGameCharacter.objects.all()
+        snapshots = SBBGameTurn.objects.all()
+        if turns is not None:
+            rows = rows.filter(game_turn__in=turns)
+            snapshots = turns
+        return rows.values_list('game_turn_id', *fields).union(
+            snapshots.filter(board__isnull=False).values_list(
+                'pk', *(f'board__characters__{field}' for field in fields)),
+            all=True
+        )
+
+
+class SBBBoard(models.Model):
+    """
+    A distinct board, stored once however many turns finished on it.
+    `digest` is `SBBBoardManager.digest` of its characters.
+
+    Snapshots are never deleted as turns move off them; the
+    `prune_boards` command clears out the unused ones.
+    """
+
+    digest = models.BinaryField(max_length=16, unique=True)
+
+    objects = SBBBoardManager()
+
+
+# The fields a board's character rows list, in order.
+BOARD_CHARACTER_FIELDS = (
+    'base_character_id', 'attack', 'health', 'golden', 'position')
+
+
+class SBBBoardCharacter(models.Model):
+    """A character on a board snapshot, as SBBGameCharacter is on a turn."""
+
+    board = models.ForeignKey(
+        SBBBoard, on_delete=models.CASCADE, related_name='characters')
+    base_character = models.ForeignKey(
+        metadata.SBBCharacter, on_delete=models.PROTECT, related_name='+')
+    attack = models.IntegerField()
+    health = models.IntegerField()
+    golden = models.BooleanField()
+    position = models.IntegerField(
+        validators=(
+            MinValueValidator(1),
+            MaxValueValidator(7)
+        )
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                name='board_character_base',
+                fields=('base_character', 'board')),
+        ]
+
 
 class SBBGameSpell(models.Model):
 
@@ -98,3 +340,74 @@ class SBBGameSpell(models.Model):
         metadata.SBBSpell, on_delete=models.PROTECT)
     game_turn = models.ForeignKey(SBBGameTurn, on_delete=models.CASCADE)
     order = models.IntegerField()
+
+
+class SBBCombatRoundManager(models.Manager):
+
+    def refresh_heroes(self, turn_ids):
+        """
+        Copy the current hero of each of `turn_ids` onto the combat rounds
+        they fought in, for when a turn's hero has changed.
+        """
+        turn_ids = list(turn_ids)
+        for turn_field, hero_field in (
+            ('turn_id', 'hero_id'),
+            ('opponent_turn_id', 'opponent_hero_id')
+        ):
+            self.filter(**{f'{turn_field}__in': turn_ids}).update(**{
+                hero_field: models.Subquery(
+                    SBBGameTurn.objects.filter(
+                        pk=models.OuterRef(turn_field)
+                    ).values('hero_id')[:1]
+                )
+            })
+
+
+class SBBCombatRound(models.Model):
+    """
+    Two players' turns that fought each other one round, and how the
+    tracker's simulation expected the fight to go.
+
+    Stored once per fight whichever POV it came from: `turn` is the
+    player whose account id sorts first, and the outcome is from their
+    side. The outcome is null if no JSON had one.
+
+    The turns' heroes are copied here so matchups can be summed from
+    one index, see `SBBCombatRoundManager.refresh_heroes`.
+    """
+
+    turn = models.ForeignKey(
+        SBBGameTurn, on_delete=models.CASCADE, related_name='combats')
+    opponent_turn = models.ForeignKey(
+        SBBGameTurn, on_delete=models.CASCADE, related_name='+')
+    hero = models.ForeignKey(
+        metadata.SBBHero, null=True, on_delete=models.PROTECT,
+        related_name='+')
+    opponent_hero = models.ForeignKey(
+        metadata.SBBHero, null=True, on_delete=models.PROTECT,
+        related_name='+')
+    # Percentages, 0-100.
+    win_percent = models.FloatField(null=True)
+    tie_percent = models.FloatField(null=True)
+    loss_percent = models.FloatField(null=True)
+    # Expected damage dealt on a win, and taken on a loss.
+    win_damage = models.FloatField(null=True)
+    loss_damage = models.FloatField(null=True)
+
+    objects = SBBCombatRoundManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name='unique_combat_pair', fields=('turn', 'opponent_turn'))
+        ]
+        # Everything the matchup matrix reads, in the order it groups by.
+        indexes = [
+            models.Index(
+                name='combat_matchups',
+                fields=(
+                    'hero', 'opponent_hero', 'win_percent', 'loss_percent',
+                    'win_damage', 'loss_damage'
+                )
+            ),
+        ]
@@ -0,0 +1,69 @@
+"""
+Bookkeeping for loading roll-ups, not game data itself.
+"""
+from django.db import models
+from django.db.models import F
+
+
+class IngestedMember(models.Model):
+    """
+    A roll-up tarball member whose game has been committed.
+    Lets a rerun of the same roll-up skip what's already stored.
+    """
+
+    rollup = models.CharField(max_length=128)
+    name = models.CharField(max_length=255)
+    # sha256 of the member's content, a changed member gets loaded again.
+    content_hash = models.CharField(max_length=64)
+    committed = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name='unique_rollup_member',
+                fields=('rollup', 'name', 'content_hash')
+            )
+        ]
+
+
+class SyncedSource(models.Model):
+    """
+    A document the piece tables were last synced from, eg.
+    template-ids.json. Lets the next sync fetch it conditionally and
+    skip it altogether if it hasn't changed.
+    """
+
+    url = models.CharField(max_length=255, unique=True)
+    # sha256 of the document as last synced.
+    content_hash = models.CharField(max_length=64, blank=True)
+    # Validators the server sent along with it, if any.
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    synced = models.DateTimeField(auto_now=True)
+
+
+class VersionStampManager(models.Manager):
+
+    def current(self, name):
+        """The stamp's version, 0 if it's never been bumped."""
+        stamp = self.filter(name=name).values_list('version', flat=True)
+        return stamp.first() or 0
+
+    def bump(self, name):
+        """Move the stamp on one version and return the new one."""
+        self.get_or_create(name=name)
+        self.filter(name=name).update(version=F('version') + 1)
+        return self.current(name)
+
+
+class VersionStamp(models.Model):
+    """
+    A counter bumped whenever some shared data changes, eg. the game
+    pieces, so processes holding a copy in memory can tell it's stale.
+    """
+
+    name = models.CharField(max_length=64, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    objects = VersionStampManager()
@@ -3,6 +3,86 @@ For data that isn't expected to regularly change within the course of a single g
 """
 from django.db import models
 
+# model class -> (the registry they came from, {template_id: instance})
+_template_id_cache = {}
+
+
+def clear_piece_cache():
+    """Forget cached game pieces, eg. after the piece tables change."""
+    from apps.game_data.registry import clear_registry
+    clear_registry()
+
+
+class GamePieceManager(models.Manager):
+
+    def by_template_id(self):
+        """
+        Return a template_id -> instance mapping for the whole table.
+        Made from the shared piece registry (see `apps.game_data.registry`)
+        without a query of its own, and made again whenever that is
+        rebuilt.
+        """
+        from apps.game_data.registry import get_registry
+        registry = get_registry()
+        cached = _template_id_cache.get(self.model)
+        if cached is None or cached[0] is not registry:
+            piece_type = next(
+                piece_type for piece_type, model_cls in PIECE_MODELS.items()
+                if model_cls is self.model)
+            field_names = [
+                field.attname for field in self.model._meta.concrete_fields]
+            pieces = {}
+            for piece in registry:
+                if piece.piece_type != piece_type:
+                    continue
+                values = {
+                    'id': piece.pk,
+                    'template_id': piece.template_id,
+                    'slug': piece.slug,
+                    'name': piece.name
+                }
+                pieces[piece.template_id] = self.model.from_db(
+                    self.db, field_names,
+                    [values[name] for name in field_names])
+            cached = (registry, pieces)
+            _template_id_cache[self.model] = cached
+        return cached[1]
+
+
+class SBBPlayerManager(models.Manager):
+
+    # Keeps IN (...) lists under SQLite's bound parameter limit.
+    chunk_size = 500
+
+    def resolve_many(self, account_ids):
+        """
+        Return an account_id -> SBBPlayer mapping for every one of
+        `account_ids`, inserting any that don't exist yet in bulk.
+        """
+        account_ids = list(dict.fromkeys(account_ids))
+        found = self.in_bulk_by_account(account_ids)
+        missing = [
+            account_id for account_id in account_ids
+            if account_id not in found
+        ]
+        if missing:
+            # Another process may get to some of them first.
+            self.bulk_create(
+                [self.model(account_id=account_id) for account_id in missing],
+                batch_size=self.chunk_size,
+                ignore_conflicts=True
+            )
+            found.update(self.in_bulk_by_account(missing))
+        return found
+
+    def in_bulk_by_account(self, account_ids):
+        found = {}
+        for start in range(0, len(account_ids), self.chunk_size):
+            chunk = account_ids[start:start + self.chunk_size]
+            for player in self.filter(account_id__in=chunk):
+                found[player.account_id] = player
+        return found
+
 
 class SBBPlayer(models.Model):
     """
@@ -11,6 +91,8 @@ class SBBPlayer(models.Model):
     account_id = models.CharField(unique=True, max_length=128)
     possibly_mythic = models.BooleanField(null=True, default=None)
 
+    objects = SBBPlayerManager()
+
 
 class SBBGamePiece(models.Model):
     """
@@ -20,8 +102,14 @@ class SBBGamePiece(models.Model):
     slug = models.CharField(max_length=128)
     template_id = models.IntegerField()
 
+    objects = GamePieceManager()
+
     class Meta:
         abstract = True
+        constraints = [
+            models.UniqueConstraint(
+                name='%(class)s_unique_template_id', fields=('template_id',))
+        ]
 
 
 class SBBHero(SBBGamePiece):
@@ -39,3 +127,13 @@ class SBBTreasure(SBBGamePiece):
 class SBBSpell(SBBGamePiece):
     """A spell in SBB."""
 
+
+# Piece type, as it appears in slugs, -> model.
+PIECE_MODELS = {
+    'TREASURE': SBBTreasure,
+    'SPELL': SBBSpell,
+    'HERO': SBBHero,
+    'CHARACTER': SBBCharacter
+}
+
+
@@ -0,0 +1,207 @@
+"""
+Aggregates kept up to date as games are written, so they never need
+working out from every game.
+"""
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.game_data.models import game as game_models
+from apps.game_data.models import meta as metadata
+
+PLACEMENTS = range(1, 9)
+
+
+class SBBHeroStatsManager(models.Manager):
+
+    @staticmethod
+    def contributions(game):
+        """
+        Set of `(participant pk, hero pk, placement)` for `game`, one for
+        every hero each participant played on any of their turns.
+        """
+        return set(
+            game_models.SBBGameTurn.objects
+            .filter(participant__match=game, hero__isnull=False)
+            .values_list('participant_id', 'hero_id', 'participant__placement')
+            .distinct()
+        )
+
+    @staticmethod
+    def tally(contributions, counts=None, sign=1):
+        """
+        Add (or with `sign=-1`, take away) `contributions` to `counts`,
+        hero pk -> Counter of stat fields.
+        """
+        counts = {} if counts is None else counts
+        for _, hero_id, placement in contributions:
+            hero_counts = counts.setdefault(hero_id, Counter())
+            hero_counts['games'] += sign
+            if placement is not None:
+                hero_counts[f'placed_{placement}'] += sign
+                hero_counts['placement_total'] += sign * placement
+        return counts
+
+    def apply_change(self, before, after):
+        """
+        Move the stored stats from `before` to `after`, two sets of
+        `contributions` for the same game. One UPDATE however many heroes
+        it touches, as long as they all have a row.
+        """
+        counts = self.tally(after - before)
+        self.tally(before - after, counts, sign=-1)
+        changes = {
+            hero_id: {field: value for field, value in fields.items() if value}
+            for hero_id, fields in counts.items()
+        }
+        changes = {
+            hero_id: fields for hero_id, fields in changes.items() if fields}
+        if not changes:
+            return
+
+        updated = self.increment(changes)
+        if updated < len(changes):
+            # Heroes bulk inserted since, so without a stats row yet.
+            missing = changes.keys() - set(
+                self.filter(hero_id__in=changes).values_list(
+                    'hero_id', flat=True))
+            self.bulk_create(
+                [self.model(hero_id=hero_id) for hero_id in missing],
+                ignore_conflicts=True
+            )
+            self.increment({hero_id: changes[hero_id] for hero_id in missing})
+
+    def increment(self, changes):
+        """
+        Add `changes`, hero pk -> {field: amount}, to the heroes' rows in
+        one UPDATE. Returns how many rows there were to update.
+        """
+        updates = {}
+        for field in self.model.count_fields():
+            whens = [
+                When(hero_id=hero_id, then=Value(fields[field]))
+                for hero_id, fields in changes.items() if field in fields
+            ]
+            if whens:
+                updates[field] = F(field) + Case(*whens, default=Value(0))
+        return self.filter(hero_id__in=changes).update(**updates)
+
+    @contextmanager
+    def track(self, game):
+        """
+        Keep the stats in line with whatever's written to `game` inside
+        the block. Must be used within the writing transaction.
+        """
+        before = self.contributions(game)
+        yield
+        self.apply_change(before, self.contributions(game))
+
+    def computed(self):
+        """hero pk -> Counter of stat fields, worked out from every game."""
+        rows = (
+            game_models.SBBGameTurn.objects
+            .filter(hero__isnull=False)
+            .values_list('participant_id', 'hero_id', 'participant__placement')
+            .order_by()
+            .distinct()
+        )
+        return self.tally(rows.iterator())
+
+    def stored(self):
+        """hero pk -> Counter of stat fields, as stored."""
+        fields = self.model.count_fields()
+        return {
+            row[0]: Counter(
+                {field: value for field, value in zip(fields, row[1:]) if value})
+            for row in self.values_list('hero_id', *fields)
+        }
+
+    def mismatches(self):
+        """hero pk -> (stored, computed) for every hero where they differ."""
+        stored = self.stored()
+        computed = self.computed()
+        mismatches = {}
+        for hero_id in stored.keys() | computed.keys():
+            pair = (stored.get(hero_id, Counter()),
+                    computed.get(hero_id, Counter()))
+            if pair[0] != pair[1]:
+                mismatches[hero_id] = pair
+        return mismatches
+
+    def rebuild(self):
+        """Replace every row with numbers worked out from every game."""
+        counts = self.computed()
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(
+                [self.model(hero_id=hero_id, **fields)
+                 for hero_id, fields in counts.items()],
+                batch_size=500
+            )
+
+
+class SBBHeroStats(models.Model):
+    """
+    How each hero has done: games played, a histogram of placements
+    and their total, for working out means.
+
+    A participant counts once for every hero they played on any turn.
+    Games where their placement isn't known count towards `games` only.
+    """
+
+    hero = models.OneToOneField(
+        metadata.SBBHero, on_delete=models.CASCADE, related_name='stats')
+    games = models.PositiveIntegerField(default=0)
+    placed_1 = models.PositiveIntegerField(default=0)
+    placed_2 = models.PositiveIntegerField(default=0)
+    placed_3 = models.PositiveIntegerField(default=0)
+    placed_4 = models.PositiveIntegerField(default=0)
+    placed_5 = models.PositiveIntegerField(default=0)
+    placed_6 = models.PositiveIntegerField(default=0)
+    placed_7 = models.PositiveIntegerField(default=0)
+    placed_8 = models.PositiveIntegerField(default=0)
+    placement_total = models.PositiveBigIntegerField(default=0)
+
+    objects = SBBHeroStatsManager()
+
+    @staticmethod
+    def count_fields():
+        return (
+            'games',
+            *(f'placed_{placement}' for placement in PLACEMENTS),
+            'placement_total'
+        )
+
+    @property
+    def histogram(self):
+        """placement -> games finished there."""
+        return {
+            placement: getattr(self, f'placed_{placement}')
+            for placement in PLACEMENTS
+        }
+
+    @property
+    def placed(self):
+        return sum(self.histogram.values())
+
+    @property
+    def mean_placement(self):
+        return self.placement_total / self.placed if self.placed else None
+
+    @property
+    def top4_rate(self):
+        if not self.placed:
+            return None
+        return sum(self.histogram[placement] for placement in (1, 2, 3, 4)) \
+            / self.placed
+
+
+@receiver(post_save, sender=metadata.SBBHero)
+def hero_created(sender, instance, created, raw=False, **kwargs):
+    """Give every new hero a stats row, so updates never need to insert."""
+    if created and not raw:
+        SBBHeroStats.objects.get_or_create(hero=instance)
@@ -0,0 +1,146 @@
+"""
+A frozen, in-memory index of every game piece.
+
+Built from the database on first use, and by `ParallelIngestor` before
+it forks so its workers share one copy. Anything that only needs a
+piece's type, template id, pk, slug or name can look it up here without
+touching the database. `GamePieceManager.by_template_id` hands out model
+instances made from it.
+"""
+from functools import lru_cache
+from types import MappingProxyType
+from typing import NamedTuple
+
+from django.db.models.signals import post_delete, post_save
+
+from apps.game_data.models import meta as meta_models
+from apps.game_data.models.ingest import VersionStamp
+
+# Bumped by load_metadata whenever it changes the piece tables.
+STAMP = 'pieces'
+
+# Slug prefixes of real pieces, eg. SBB_CHARACTER_FROGPRINCE.
+SLUG_PREFIXES = ('SBB', 'GOLDEN')
+
+
+class Piece(NamedTuple):
+    piece_type: str
+    template_id: int
+    pk: int
+    slug: str
+    name: str
+
+
+@lru_cache(maxsize=4096)
+def slug_type(slug):
+    """
+    The piece type named in `slug`, eg. 'CHARACTER', or None if it isn't
+    a piece slug. Cached, as the same few hundred slugs come up again
+    and again.
+    """
+    tokens = slug.split('_')
+    if tokens[0] not in SLUG_PREFIXES:
+        return None
+    for token in tokens:
+        if token in meta_models.PIECE_MODELS:
+            return token
+    return None
+
+
+class PieceRegistry:
+    """
+    Every game piece, indexed by `(piece type, template id)`, by
+    `(piece type, pk)` for rows pointing at a piece, and by slug.
+    Read only: changed piece tables mean building a new one.
+    """
+
+    __slots__ = ('version', 'by_key', 'by_pk', 'by_slug')
+
+    def __init__(self, pieces=(), version=0):
+        by_key = {}
+        by_pk = {}
+        by_slug = {}
+        for piece in pieces:
+            by_key[(piece.piece_type, piece.template_id)] = piece
+            by_pk[(piece.piece_type, piece.pk)] = piece
+            by_slug[piece.slug] = piece
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'by_key', MappingProxyType(by_key))
+        object.__setattr__(self, 'by_pk', MappingProxyType(by_pk))
+        object.__setattr__(self, 'by_slug', MappingProxyType(by_slug))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('PieceRegistry is read only.')
+
+    def __len__(self):
+        return len(self.by_key)
+
+    def __iter__(self):
+        return iter(self.by_key.values())
+
+    def get(self, piece_type, template_id, default=None):
+        return self.by_key.get((piece_type, template_id), default)
+
+    @classmethod
+    def from_db(cls):
+        version = VersionStamp.objects.current(STAMP)
+        pieces = []
+        for piece_type, model_cls in meta_models.PIECE_MODELS.items():
+            # Oldest row wins, same as `GamePieceManager.by_template_id`.
+            rows = model_cls.objects.order_by('-pk').values_list(
+                'template_id', 'pk', 'slug', 'name')
+            pieces.extend(Piece(piece_type, *row) for row in rows)
+        return cls(pieces, version)
+
+
+_registry = None
+
+
+def get_registry():
+    """The shared registry, built from the database if there isn't one."""
+    if _registry is None:
+        return load_registry()
+    return _registry
+
+
+def load_registry():
+    """Build the shared registry from the database now."""
+    global _registry
+    _registry = PieceRegistry.from_db()
+    return _registry
+
+
+def clear_registry():
+    """Drop the shared registry, the next `get_registry` rebuilds it."""
+    global _registry
+    _registry = None
+
+
+def refresh_registry():
+    """
+    Rebuild the shared registry if the pieces have changed since it was
+    built, by load_metadata or `pieces_added`. Costs one query when they
+    haven't, so it's safe to call on every request.
+    """
+    registry = get_registry()
+    if VersionStamp.objects.current(STAMP) != registry.version:
+        registry = load_registry()
+    return registry
+
+
+def pieces_added():
+    """
+    Note pieces added outside load_metadata, eg. a new hero turning up
+    in a roll-up, so every process's `refresh_registry` picks them up.
+    """
+    VersionStamp.objects.bump(STAMP)
+    clear_registry()
+
+
+def piece_changed(sender, **kwargs):
+    clear_registry()
+
+
+for piece_model in meta_models.PIECE_MODELS.values():
+    post_save.connect(piece_changed, sender=piece_model)
+    post_delete.connect(piece_changed, sender=piece_model)
@@ -0,0 +1,187 @@
+"""
+For reading stored games back out through the API.
+"""
+from rest_framework import serializers
+
+from apps.game_data.models import game as game_models
+from apps.game_data.registry import refresh_registry
+
+
+def rows_by(rows, index=0):
+    """Group value rows on one of their columns, keeping their order."""
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row[index], []).append(row)
+    return grouped
+
+
+class GameDetailSerializer(serializers.BaseSerializer):
+    """
+    Read only. A whole SBBGame: every participant with each of their
+    turns, boards, spells and treasures.
+
+    Boards can run to thousands of rows, so rather than nesting model
+    serializers each table is read once with `values_list` and the
+    output built straight into dicts, skipping DRF's per-field
+    `to_representation`. Piece names come from the piece registry. A
+    game takes the same handful of queries however big it is.
+    """
+
+    def to_representation(self, game):
+        self.registry = refresh_registry()
+        self.pieces = {}
+
+        participants = (
+            game_models.SBBGameParticipant.objects
+            .filter(match=game)
+            .order_by('pk')
+            .values_list(
+                'pk', 'player__account_id', 'player__possibly_mythic',
+                'placement')
+        )
+        game_turns = game_models.SBBGameTurn.objects.filter(
+            participant__match=game)
+        turns = rows_by(
+            game_turns
+            .order_by('participant_id', 'turn_num')
+            .values_list(
+                'participant_id', 'pk', 'turn_num', 'hero_id', 'hp', 'level',
+                'exp'),
+        )
+        # Whether they're stored as rows or snapshots.
+        characters = rows_by(
+            game_models.SBBBoard.objects.character_rows(
+                game_turns, 'base_character_id', 'attack', 'health',
+                'golden', 'position'
+            ).order_by('game_turn_id', 'position'),
+        )
+        spells = rows_by(
+            game_models.SBBGameSpell.objects
+            .filter(game_turn__participant__match=game)
+            .order_by('game_turn_id', 'order', 'pk')
+            .values_list('game_turn_id', 'base_spell_id'),
+        )
+        treasures = rows_by(
+            game_models.SBBGameTurn.treasures.through.objects
+            .filter(sbbgameturn__participant__match=game)
+            .order_by('sbbgameturn_id', 'pk')
+            .values_list('sbbgameturn_id', 'sbbtreasure_id'),
+        )
+
+        self.boards = (characters, spells, treasures)
+
+        return {
+            'match-id': str(game.uuid),
+            'players': [
+                self.player(row, turns.get(row[0], ()))
+                for row in participants
+            ],
+        }
+
+    def player(self, row, turns):
+        _, account_id, possibly_mythic, placement = row
+        return {
+            'player-id': account_id,
+            'placement': placement,
+            'possibly-mythic': possibly_mythic,
+            'turns': [self.turn(turn_row) for turn_row in turns],
+        }
+
+    def turn(self, row):
+        _, turn_id, turn_num, hero_id, hp, level, exp = row
+        characters, spells, treasures = self.boards
+        return {
+            'turn': turn_num,
+            'hero': self.piece('HERO', hero_id),
+            'hp': hp,
+            'level': level,
+            'exp': exp,
+            'characters': [
+                {
+                    **self.piece('CHARACTER', character_id),
+                    'attack': attack,
+                    'health': health,
+                    'golden': golden,
+                    'position': position,
+                }
+                for _, character_id, attack, health, golden, position
+                in characters.get(turn_id, ())
+            ],
+            'spells': [
+                self.piece('SPELL', spell_id)
+                for _, spell_id in spells.get(turn_id, ())
+            ],
+            'treasures': [
+                self.piece('TREASURE', treasure_id)
+                for _, treasure_id in treasures.get(turn_id, ())
+            ],
+        }
+
+    def piece(self, piece_type, pk):
+        """`{'id': template id, 'name': ...}` for a piece's primary key."""
+        if pk is None:
+            return None
+        key = (piece_type, pk)
+        if key not in self.pieces:
+            piece = self.registry.by_pk.get(key)
+            if piece is None:
+                # Maybe added since the registry was built, eg. a new
+                # hero turning up in a roll-up.
+                self.registry = refresh_registry()
+                piece = self.registry.by_pk.get(key)
+            if piece is None:
+                self.pieces[key] = None
+            else:
+                self.pieces[key] = {
+                    'id': piece.template_id, 'name': piece.name}
+        return self.pieces[key]
+
+
+class GameFilterSerializer(serializers.Serializer):
+    """Query params for the game list. Heroes and characters are template ids."""
+
+    player = serializers.CharField(max_length=128, required=False)
+    hero = serializers.IntegerField(required=False)
+    placement = serializers.IntegerField(
+        min_value=1, max_value=8, required=False)
+    character = serializers.IntegerField(required=False)
+
+
+class GameSummaryListSerializer(serializers.ListSerializer):
+    """A page of games, their participants read in one query."""
+
+    def to_representation(self, games):
+        games = list(games)
+        participants = rows_by(
+            game_models.SBBGameParticipant.objects
+            .filter(match__in=games)
+            .order_by('pk')
+            .values_list('match_id', 'player__account_id', 'placement')
+        )
+        return [
+            self.child.summary(game, participants.get(game.pk, ()))
+            for game in games
+        ]
+
+
+class GameSummarySerializer(serializers.BaseSerializer):
+    """Read only. A game's id and who placed where."""
+
+    def to_representation(self, game):
+        return self.summary(
+            game,
+            game.sbbgameparticipant_set.order_by('pk').values_list(
+                'match_id', 'player__account_id', 'placement')
+        )
+
+    def summary(self, game, participants):
+        return {
+            'match-id': str(game.uuid),
+            'players': [
+                {'player-id': account_id, 'placement': placement}
+                for _, account_id, placement in participants
+            ],
+        }
+
+    class Meta:
+        list_serializer_class = GameSummaryListSerializer
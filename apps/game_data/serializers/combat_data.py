@@ -1,16 +1,32 @@
+import math
+
+from django.conf import settings
 from rest_framework import serializers
 
+from apps.game_data.ingest.diff import (
+    CHARACTER_FIELDS,
+    SPELL_FIELDS,
+    RowSync
+)
+from apps.game_data.ingest.records import (
+    OUTCOME_FIELDS,
+    outcome_of,
+    pairing
+)
 from apps.game_data.models import (
     game as game_models,
     meta as meta_models
 )
-from apps.game_data.serializers.utils import ContextDefaulter
+from apps.game_data.serializers.utils import (
+    ContextDefaulter,
+    JSONDashConvertMixin,
+    TemplateIDRelatedField
+)
 
 
 class GameCharacterSerializer(serializers.ModelSerializer):
 
-    id = serializers.SlugRelatedField(
-        slug_field='template_id',
+    id = TemplateIDRelatedField(
         queryset=meta_models.SBBCharacter.objects.all(),
         source='base_character'
     )
@@ -38,13 +54,11 @@ class CombatSerializer(serializers.ModelSerializer):
     """
 
     round = serializers.HiddenField(default=ContextDefaulter(source='round'))
-    treasures = serializers.SlugRelatedField(
-        slug_field='template_id',
+    treasures = TemplateIDRelatedField(
         queryset=meta_models.SBBTreasure.objects.all(),
         many=True
     )
-    spells = serializers.SlugRelatedField(
-        slug_field='template_id',
+    spells = TemplateIDRelatedField(
         queryset=meta_models.SBBSpell.objects.all(),
         many=True
     )
@@ -56,26 +70,61 @@ class CombatSerializer(serializers.ModelSerializer):
         extra_kwargs = {'participant': {'required': False}}
 
     def update(self, instance, validated_data):
-
+        """
+        Bring the stored board in line with this one, only writing the
+        rows that differ. Empty character and spell lists leave what's
+        stored alone, treasures are always replaced.
+        """
         characters = validated_data.pop('characters', None)
         if characters:
-            instance.characters.clear()
-        char_serializer = self.fields.get('characters').child
-        for item in characters:
-            item['game_turn'] = self.instance
-            char_serializer.create(validated_data=item)
+            rows = [
+                (
+                    item['base_character'].pk,
+                    item['attack'],
+                    item['health'],
+                    item['golden'],
+                    item['position']
+                )
+                for item in characters
+            ]
+            board_id = None
+            if settings.SBB_BOARD_SNAPSHOTS:
+                boards = game_models.SBBBoard.objects
+                board_id = boards.resolve_many([rows])[boards.digest(rows)].pk
+                # Rows make way for the snapshot.
+                rows = []
+            board = RowSync(game_models.SBBGameCharacter, CHARACTER_FIELDS)
+            board.add(
+                list(instance.sbbgamecharacter_set.all()),
+                rows,
+                game_turn=instance
+            )
+            board.save()
+            if instance.board_id != board_id:
+                game_models.SBBGameTurn.objects.filter(
+                    pk=instance.pk).update(board_id=board_id)
+                instance.board_id = board_id
 
         spells = validated_data.pop('spells', None)
         if spells:
-            instance.spells.clear()
-        for index, item in enumerate(spells):
-            game_models.SBBGameSpell.objects.create(
-                    base_spell=item, order=index, game_turn=self.instance)
+            spell_rows = RowSync(game_models.SBBGameSpell, SPELL_FIELDS)
+            spell_rows.add(
+                list(instance.sbbgamespell_set.all()),
+                [(item.pk, index) for index, item in enumerate(spells)],
+                game_turn=instance
+            )
+            spell_rows.save()
+
+        if 'treasures' in validated_data:
+            # Only adds and removes the treasures that changed.
+            instance.treasures.set(validated_data.pop('treasures'))
 
-        if validated_data.get('treasures', None):
-            instance.treasures.clear()
+        participant = validated_data.get('participant')
+        if participant is not None and instance.participant_id != participant.pk:
+            instance.participant = participant
+            instance.save()
 
-        return super().update(instance, validated_data)
+        return instance
 
     def create(self, validated_data):
 
@@ -93,6 +142,22 @@ class CombatSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class SimResultsSerializer(JSONDashConvertMixin, serializers.Serializer):
+    """The tracker's simulation of a fight, from the main player's side."""
+
+    win_percent = serializers.FloatField(min_value=0, max_value=100)
+    tie_percent = serializers.FloatField(min_value=0, max_value=100)
+    loss_percent = serializers.FloatField(min_value=0, max_value=100)
+    win_dmg = serializers.FloatField(min_value=0)
+    loss_dmg = serializers.FloatField(min_value=0)
+
+    def validate(self, attrs):
+        # FloatField lets NaN through.
+        if not all(math.isfinite(value) for value in attrs.values()):
+            raise serializers.ValidationError('Must all be finite numbers.')
+        return attrs
+
+
 class CombatMatchSerializer(serializers.Serializer):
     """
     Serializer for top-level json containing both player's data.
@@ -100,6 +165,7 @@ class CombatMatchSerializer(serializers.Serializer):
 
     main_player = CombatSerializer()
     opponent = CombatSerializer()
+    sim_results = SimResultsSerializer(required=False, allow_null=True)
 
     def to_internal_value(self, data):
         main_player = self.parent.parent.initial_data['player-id']
@@ -107,33 +173,71 @@ class CombatMatchSerializer(serializers.Serializer):
         self.context['main_player_id'] = main_player
         self.context['round'] = data['round']
 
-        known_keys = {'round', 'sim-results', 'main_player'}
+        if 'sim-results' in data:
+            data['sim_results'] = data.pop('sim-results')
+
+        known_keys = {'round', 'sim_results', 'main_player'}
         leftover_keys = set(data.keys()) - known_keys
         op_id = leftover_keys.pop()
         data['opponent'] = data.pop(op_id)
         self.context['opponent_id'] = op_id
 
-        return super().to_internal_value(data)
-
-    def create(self, validated_data):
-        game = self.parent.parent.instance
-
-        acct_id = self.context['main_player_id']
+        # Context gets overwritten by every round in the list, so keep
+        # the account ids with the round they belong to.
+        validated = super().to_internal_value(data)
+        validated['main_player_id'] = main_player
+        validated['opponent_id'] = op_id
+        return validated
+
+    def get_participant(self, game, acct_id):
+        """From the parent's resolved participants if there are any."""
+        participants = self.context.get('participants', {})
+        if acct_id in participants:
+            return participants[acct_id]
         player_obj, _ = meta_models.SBBPlayer.objects.get_or_create(
             account_id=acct_id)
         participant, _ = game_models.SBBGameParticipant.objects.get_or_create(
             match=game, player=player_obj)
+        return participant
+
+    def create(self, validated_data):
+        game = self.parent.parent.instance
+
         main_p_data = validated_data.get('main_player')
-        main_p_data['participant'] = participant
+        main_p_data['participant'] = self.get_participant(
+            game, validated_data['main_player_id'])
         main_p_turn = self.fields.get('main_player').create(main_p_data)
 
-        acct_id = self.context['opponent_id']
-        player_obj, _ = meta_models.SBBPlayer.objects.get_or_create(
-            account_id=acct_id)
-        participant, _ = game_models.SBBGameParticipant.objects.get_or_create(
-            match=game, player_id=player_obj)
         op_data = validated_data.get('opponent')
-        op_data['participant'] = participant
+        op_data['participant'] = self.get_participant(
+            game, validated_data['opponent_id'])
         op_turn = self.fields.get('opponent').create(op_data)
 
+        self.save_pairing(validated_data, main_p_turn, op_turn)
         return [main_p_turn, op_turn]
+
+    def save_pairing(self, validated_data, main_p_turn, op_turn):
+        """Store which turns fought, and the outcome if there was one."""
+        turns = {
+            validated_data['main_player_id']: main_p_turn,
+            validated_data['opponent_id']: op_turn,
+        }
+        first, second, outcome = pairing(
+            validated_data['main_player_id'],
+            validated_data['opponent_id'],
+            outcome_of(validated_data.get('sim_results'))
+        )
+        values = {
+            'hero_id': turns[first].hero_id,
+            'opponent_hero_id': turns[second].hero_id,
+        }
+        if outcome is not None:
+            values.update(zip(OUTCOME_FIELDS, outcome))
+
+        combat, created = game_models.SBBCombatRound.objects.get_or_create(
+            turn=turns[first], opponent_turn=turns[second], defaults=values)
+        if not created and any(getattr(combat, field) != value
+                               for field, value in values.items()):
+            for field, value in values.items():
+                setattr(combat, field, value)
+            combat.save()
@@ -1,20 +1,34 @@
 """
 For ingesting the data from daily roll-up tarballs.
 """
+from django.db import transaction
 from rest_framework import serializers
 
 from apps.game_data.models import game as game_models
 from apps.game_data.models import meta as meta_models
+from apps.game_data.models import stats as stats_models
 from apps.game_data.serializers.participant_data import (
     PlayerGameRecordSerializer
 )
 from apps.game_data.serializers.combat_data import CombatMatchSerializer
-from apps.game_data.serializers.utils import JSONDashConvertMixin
+from apps.game_data.serializers.utils import (
+    JSONDashConvertMixin,
+    ReusableSerializerMixin
+)
 
 
-class GameTarSerializer(JSONDashConvertMixin, serializers.ModelSerializer):
+class GameTarSerializer(
+    ReusableSerializerMixin,
+    JSONDashConvertMixin,
+    serializers.ModelSerializer
+):
     """
-    Used to munch a json from one tarball file.
+    Used to munch a json from one tarball file. To go through many,
+    make one and `reset` it for each.
+
+    Players are looked up through `context['players']`, an account_id ->
+    SBBPlayer mapping. Pass one in to share it between many games, ids
+    it's missing are resolved in bulk and added to it.
     """
 
     players = PlayerGameRecordSerializer(many=True)
@@ -38,33 +52,55 @@ class GameTarSerializer(JSONDashConvertMixin, serializers.ModelSerializer):
                 participant['placement'] = placement
                 participant['possibly_mythic'] = validated_data.pop('possibly_mythic')
 
-        self.update_participants(instance, new_participants=participants)
-        self.fields.get('combat_info').create(
-            validated_data.get('combat_info')
-        )
+        combat_info = validated_data.get('combat_info')
+        with transaction.atomic(), \
+                stats_models.SBBHeroStats.objects.track(instance):
+            self.resolve_participants(instance, participants, combat_info)
+            self.update_participants(instance, new_participants=participants)
+            self.fields.get('combat_info').create(combat_info)
 
         return instance
 
+    def resolve_participants(self, instance, participants, combat_info):
+        """
+        Look up every player and participant this game mentions up front,
+        leaving them in context for the nested serializers.
+        """
+        account_ids = [item['player_id'] for item in participants]
+        for combat in combat_info:
+            account_ids.append(combat['main_player_id'])
+            account_ids.append(combat['opponent_id'])
+        account_ids = list(dict.fromkeys(account_ids))
+
+        players = self.context.setdefault('players', {})
+        missing = [
+            account_id for account_id in account_ids
+            if account_id not in players
+        ]
+        if missing:
+            players.update(
+                meta_models.SBBPlayer.objects.resolve_many(missing))
+
+        self.context['participants'] = (
+            game_models.SBBGameParticipant.objects.resolve_many(
+                instance,
+                {account_id: players[account_id] for account_id in account_ids}
+            )
+        )
+
     def validate_players(self, value):
         """Check that we aren't about to end up with 9+ participants."""
         return value
 
     def update_participants(self, instance, new_participants):
 
-        existing = instance.sbbgameparticipant_set.values_list(
-            'player__account_id', flat=True)
+        participants = self.context['participants']
         for item in new_participants:
             item['match'] = instance
-            if item['player_id'] not in existing:
-                self.fields.get('players').child.create(item)
-            else:
-                self.fields.get('players').child.update(
-                    validated_data=item,
-                    instance=game_models.SBBGameParticipant.objects.get(
-                        player__account_id=item['player_id'],
-                        match=instance
-                    )
-                )
+            self.fields.get('players').child.update(
+                validated_data=item,
+                instance=participants[item['player_id']]
+            )
 
     def create(self, validated_data):
         """Create a whole new SBBGame from scratch."""
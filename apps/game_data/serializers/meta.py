@@ -4,12 +4,62 @@ Serializers for ingesting template id metadata.
 from rest_framework import serializers
 
 from apps.game_data.models import meta as meta_models
+from apps.game_data.registry import slug_type
 from apps.game_data.serializers.utils import (
     ContextDefaulter,
     IDKeyListSerializer
 )
 
 
+class GamePieceListSerializer(IDKeyListSerializer):
+    """
+    A whole template-ids.json. Besides the usual `save`, `upsert` stores
+    it with a few bulk statements per piece table.
+    """
+
+    piece_fields = ('slug', 'name')
+
+    def upsert(self):
+        """
+        Add new pieces and update changed ones, keyed on template id and
+        piece type, leaving the rest alone. Returns counts of `added`,
+        `changed` and `unchanged` pieces.
+        """
+        by_model = {}
+        for item in self.validated_data:
+            model_cls = self.child.get_model(item['slug'])
+            by_model.setdefault(model_cls, {})[int(item['template_id'])] = item
+
+        counts = {'added': 0, 'changed': 0, 'unchanged': 0}
+        for model_cls, items in by_model.items():
+            stored = model_cls.objects.in_bulk(
+                list(items), field_name='template_id')
+            added = []
+            changed = []
+            for template_id, item in items.items():
+                piece = stored.get(template_id)
+                if piece is None:
+                    added.append(model_cls(
+                        template_id=template_id,
+                        **{field: item[field] for field in self.piece_fields}
+                    ))
+                elif any(getattr(piece, field) != item[field]
+                         for field in self.piece_fields):
+                    for field in self.piece_fields:
+                        setattr(piece, field, item[field])
+                    changed.append(piece)
+            model_cls.objects.bulk_create(added)
+            model_cls.objects.bulk_update(changed, self.piece_fields)
+            counts['added'] = counts['added'] + len(added)
+            counts['changed'] = counts['changed'] + len(changed)
+            counts['unchanged'] = (
+                counts['unchanged'] + len(items) - len(added) - len(changed))
+
+        # Bulk statements don't send the signals that usually do this.
+        meta_models.clear_piece_cache()
+        return counts
+
+
 class GamePieceSerializer(serializers.Serializer):
     """
     Class for ingesting json containing info on SBB game pieces:
@@ -22,19 +72,11 @@ class GamePieceSerializer(serializers.Serializer):
     Id = serializers.CharField(source='slug')
     Name = serializers.CharField(max_length=32, source='name')
 
-    mapping = {
-        'TREASURE': meta_models.SBBTreasure,
-        'SPELL': meta_models.SBBSpell,
-        'HERO': meta_models.SBBHero,
-        'CHARACTER': meta_models.SBBCharacter
-    }
+    mapping = meta_models.PIECE_MODELS
 
     def validate_Id(self, value):
-        tokens = value.split('_')
-        if not tokens[0] in ('SBB', 'GOLDEN'):
+        if slug_type(value) is None:
             raise serializers.ValidationError()
-        if not set(tokens).intersection(self.mapping.keys()):
-            raise serializers.ValidationError
 
         if self.instance:
             model_cls = self.get_model(value)
@@ -44,8 +86,12 @@ class GamePieceSerializer(serializers.Serializer):
         return value
 
     def create(self, validated_data):
+        """Upsert on template id, so reloading the same file is harmless."""
         model_cls = self.get_model(validated_data['slug'])
-        instance = model_cls._default_manager.create(**validated_data)
+        instance, _ = model_cls._default_manager.update_or_create(
+            template_id=validated_data.pop('template_id'),
+            defaults=validated_data
+        )
         return instance
 
     def update(self, instance, validated_data):
@@ -55,10 +101,7 @@ class GamePieceSerializer(serializers.Serializer):
 
     def get_model(self, slug_value):
         """Return the type of model the slug corresponds to."""
-        tokens = slug_value.split('_')
-        for token in tokens:
-            if token in self.mapping.keys():
-                return self.mapping[token]
+        return self.mapping.get(slug_type(slug_value))
 
     class Meta:
-        list_serializer_class = IDKeyListSerializer
+        list_serializer_class = GamePieceListSerializer
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from apps.game_data.models import (meta as meta_models, game as game_models)
+from apps.game_data.registry import pieces_added
 from apps.game_data.serializers.utils import (
     IDKeyListField,
     JSONDashConvertMixin
@@ -40,50 +41,82 @@ class PlayerGameRecordSerializer(
         """Update Turn data object associated with participant instance."""
         turn_obj, _ = game_models.SBBGameTurn.objects.get_or_create(
             participant=instance, turn_num=turn_num)
-        hero_obj, _ = meta_models.SBBHero.objects.get_or_create(
+        hero_obj, created = meta_models.SBBHero.objects.get_or_create(
             template_id=hero
         )
-        turn_obj.hero = hero_obj
-        turn_obj.hp = hp
-
+        if created:
+            pieces_added()
         level, fraction = xp.split('.')
-        turn_obj.level = level
-        turn_obj.exp = fraction
-
-        turn_obj.save()
+        values = {
+            'hero_id': hero_obj.pk,
+            'hp': hp,
+            'level': int(level),
+            'exp': int(fraction)
+        }
+
+        # Rewriting an unchanged turn is a wasted write.
+        if any(getattr(turn_obj, attr) != value
+               for attr, value in values.items()):
+            new_hero = turn_obj.hero_id != values['hero_id']
+            for attr, value in values.items():
+                setattr(turn_obj, attr, value)
+            turn_obj.save()
+            if new_hero:
+                game_models.SBBCombatRound.objects.refresh_heroes(
+                    [turn_obj.pk])
 
         return turn_obj
 
+    def get_player(self, account_id):
+        """From the parent's resolved players if there are any."""
+        players = self.context.get('players', {})
+        if account_id in players:
+            return players[account_id]
+        player_obj, _ = meta_models.SBBPlayer.objects.get_or_create(
+            account_id=account_id)
+        return player_obj
+
     def update(self, validated_data, instance):
+        changed = instance.pk is None
         if 'player_id' in validated_data:
-            player_obj, _ = meta_models.SBBPlayer.objects.get_or_create(
-            account_id=validated_data['player_id'])
+            player_obj = self.get_player(validated_data['player_id'])
+            changed = changed or instance.player_id != player_obj.pk
             instance.player = player_obj
         if 'match' in validated_data:
+            changed = changed or instance.match_id != validated_data['match'].pk
             instance.match = validated_data['match']
         if 'placement' in validated_data:
+            changed = changed or instance.placement != validated_data['placement']
             instance.placement = validated_data['placement']
         if 'possibly_mythic' in validated_data:
-            instance.player.possibly_mythic = validated_data['possibly_mythic']
-            instance.player.save()
+            mythic = validated_data['possibly_mythic']
+            if instance.player.possibly_mythic != mythic:
+                instance.player.possibly_mythic = mythic
+                instance.player.save()
 
-        instance.save()
+        if instance.pk is None:
+            instance.save()
+            changed = False
 
         turn_data = zip(
             validated_data.pop('healths'),
             validated_data.pop('xps'),
             validated_data.pop('heroes')
         )
+        turns = []
         turn_num = 1
         for hp, xp, hero in turn_data:
-            self.update_turn(instance, turn_num, hp, xp, hero)
+            turns.append(self.update_turn(instance, turn_num, hp, xp, hero))
             turn_num = turn_num + 1
 
+        # One save for the participant's own fields and its series.
+        if instance.set_series(turns) or changed:
+            instance.save()
+
         return instance
 
     def create(self, validated_data):
-        player_obj, _ = meta_models.SBBPlayer.objects.get_or_create(
-            account_id=validated_data['player_id'])
+        player_obj = self.get_player(validated_data['player_id'])
         validated_data['player'] = player_obj
         del validated_data['player_id']
 
@@ -3,6 +3,7 @@ Serializer-related utility code not linked to a specific serializer.
 """
 from collections.abc import Mapping
 
+from django.utils.encoding import smart_str
 from rest_framework import fields
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
@@ -42,6 +43,46 @@ class JSONDashConvertMixin:
         return new_dict
 
 
+def nested_serializers(serializer):
+    """
+    Yield `serializer` and every serializer nested under it, building
+    their fields along the way if DRF hasn't yet.
+    """
+    yield serializer
+    for field in serializer.fields.values():
+        if isinstance(field, serializers.ListSerializer):
+            field = field.child
+        if isinstance(field, serializers.BaseSerializer):
+            yield from nested_serializers(field)
+
+
+class ReusableSerializerMixin:
+    """
+    Lets one serializer instance work through document after document,
+    so DRF only builds and deep-copies its nested fields once, rather
+    than for every instance. Call `reset` before each document.
+
+    Nested fields read their context from the root serializer, so each
+    document gets a fresh context and can't see what the last one left
+    there. Not for sharing between threads.
+    """
+
+    # What DRF keeps on a serializer for the document it was given.
+    document_attrs = ('initial_data', '_validated_data', '_errors', '_data')
+
+    def reset(self, data=fields.empty, instance=None, context=None):
+        """Get ready for the next document, as if newly instantiated."""
+        for serializer in nested_serializers(self):
+            for attr in self.document_attrs:
+                serializer.__dict__.pop(attr, None)
+            serializer.instance = None
+        self.instance = instance
+        if data is not fields.empty:
+            self.initial_data = data
+        self._context = {} if context is None else context
+        return self
+
+
 class IDKeyListSerializer(serializers.ListSerializer):
     """
     For cleanly handling JSON where object IDs are used as keys in what is
@@ -145,6 +186,33 @@ class IDKeyListField(fields.ListField):
         return self.run_child_validation(data_list)
 
 
+class TemplateIDRelatedField(serializers.SlugRelatedField):
+    """
+    Resolves game pieces by template_id from the process-wide piece cache
+    (see `GamePieceManager.by_template_id`), rather than a query per item.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('slug_field', 'template_id')
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        try:
+            template_id = int(data)
+        except (TypeError, ValueError):
+            self.fail('invalid')
+
+        model_cls = self.get_queryset().model
+        try:
+            return model_cls.objects.by_template_id()[template_id]
+        except KeyError:
+            self.fail(
+                'does_not_exist',
+                slug_name=self.slug_field,
+                value=smart_str(data)
+            )
+
+
 class ContextDefaulter:
     """Pulls field default from the designated context key."""
     requires_context = True
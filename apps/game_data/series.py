@@ -0,0 +1,92 @@
+"""
+Per-participant summary series, packed into bytes as one little endian
+32-bit integer per turn, first turn first.
+
+`numpy.frombuffer(data, dtype='<i4')` reads one without copying.
+"""
+from array import array
+import sys
+
+# Turn field -> the SBBGameParticipant field holding it as a series.
+SERIES_FIELDS = {
+    'hp': 'hp_series',
+    'level': 'level_series',
+    'exp': 'exp_series',
+    'hero_id': 'hero_series',
+}
+# Stands in for turns with no summary.
+MISSING = -2 ** 31
+
+# 'i' is 32 bits everywhere Django runs.
+TYPECODE = 'i'
+
+
+def unpack(data):
+    """Packed bytes -> array('i')."""
+    values = array(TYPECODE)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def pack(values):
+    """
+    Any sequence of ints -> packed bytes. Trailing MISSING entries are
+    dropped, so a series only has one packed form.
+    """
+    values = array(TYPECODE, values)
+    while values and values[-1] == MISSING:
+        values.pop()
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+
+def merged(data, turns):
+    """
+    Packed `data` with `turns`, turn_num -> value or None, written over
+    it. Turns past the end grow it, with MISSING for any skipped.
+    """
+    values = unpack(data)
+    for turn_num, value in turns.items():
+        if turn_num > len(values):
+            values.extend([MISSING] * (turn_num - len(values)))
+        values[turn_num - 1] = MISSING if value is None else value
+    return pack(values)
+
+
+def series_for(rows):
+    """
+    participant pk -> {series field: packed bytes}, from
+    `(participant_id, turn_num, hp, level, exp, hero_id)` rows.
+    """
+    by_participant = {}
+    for participant_id, turn_num, *values in rows:
+        turns = by_participant.setdefault(
+            participant_id, {field: {} for field in SERIES_FIELDS})
+        for field, value in zip(SERIES_FIELDS, values):
+            turns[field][turn_num] = value
+    return {
+        participant_id: {
+            SERIES_FIELDS[field]: merged(b'', values)
+            for field, values in turns.items()
+        }
+        for participant_id, turns in by_participant.items()
+    }
+
+
+def matrix(packed, width=None):
+    """
+    `(rows, width)`: an array('i') holding every packed series in
+    `packed`, one row of `width` turns each, padded with MISSING. Wide
+    enough for the longest by default, longer ones are cut short.
+    """
+    unpacked = [unpack(data) for data in packed]
+    if width is None:
+        width = max((len(values) for values in unpacked), default=0)
+    rows = array(TYPECODE)
+    for values in unpacked:
+        rows.extend(values[:width])
+        rows.extend([MISSING] * (width - len(values)))
+    return rows, width
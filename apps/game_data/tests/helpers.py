@@ -0,0 +1,244 @@
+"""
+Shared setup for tests that ingest whole games.
+"""
+from copy import deepcopy
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from uuid import uuid4
+import json
+import os
+import threading
+
+from django.urls import reverse
+
+from apps.game_data.benchmarks.synthetic import (
+    load_sample,
+    piece_document,
+    pov_of
+)
+from apps.game_data.ingest.bulk import BulkGameWriter
+from apps.game_data.ingest.records import OUTCOME_FIELDS, GameRecord
+from apps.game_data.models import (
+    composition as composition_models,
+    game as game_models,
+    meta as meta_models,
+    stats as stats_models
+)
+from apps.game_data.serializers.game import GameTarSerializer
+from apps.game_data.serializers.meta import GamePieceSerializer
+from apps.game_data.series import MISSING
+
+
+def load_pieces():
+    """Load the sample game pieces, golden characters included."""
+    serializer = GamePieceSerializer(data=piece_document(), many=True)
+    serializer.is_valid(raise_exception=True)
+    serializer.save()
+
+
+def rename_players(json_data, suffix):
+    """Give every player in a game JSON a fresh account id."""
+    as_text = json.dumps(json_data)
+    for player in json_data['players']:
+        account_id = player['player-id']
+        as_text = as_text.replace(account_id, f'{account_id}{suffix}')
+    return json.loads(as_text)
+
+
+def sample_members():
+    """A few games, some seen from more than one POV, as tar members."""
+    json_data = load_sample('full_sample.json')
+    docs = [
+        json_data,
+        pov_of(json_data, '5E2F2E83C4BC4A8E', 3),
+        pov_of(json_data, '94EFFF42C8A8A56E', 1),
+    ]
+    for suffix in ('A', 'B', 'C'):
+        other_game = rename_players(json_data, suffix)
+        other_game['match-id'] = str(uuid4())
+        docs.append(other_game)
+        docs.append(pov_of(other_game, f'5E2F2E83C4BC4A8E{suffix}', 2))
+
+    return [
+        (f'{index}.json', json.dumps(doc).encode())
+        for index, doc in enumerate(docs)
+    ]
+
+
+def game_rows():
+    """
+    Every stored game row, described by natural keys so that two databases
+    built by different code paths can be compared.
+    """
+    turn_key = ('participant__match__uuid', 'participant__player__account_id', 'turn_num')
+    return {
+        'players': sorted(meta_models.SBBPlayer.objects.values_list(
+            'account_id', 'possibly_mythic')),
+        'heroes': sorted(meta_models.SBBHero.objects.values_list(
+            'template_id', 'name', 'slug')),
+        'participants': sorted(
+            game_models.SBBGameParticipant.objects.values_list(
+                'match__uuid', 'player__account_id', 'placement')),
+        'turns': sorted(game_models.SBBGameTurn.objects.values_list(
+            *turn_key, 'hero__template_id', 'hp', 'level', 'exp')),
+        'treasures': sorted(game_models.SBBGameTurn.objects.filter(
+            treasures__isnull=False).values_list(
+                *turn_key, 'treasures__template_id')),
+        # Boards stored as rows or snapshots come out the same.
+        'characters': sorted(
+            list(game_models.SBBGameCharacter.objects.values_list(
+                *('game_turn__' + field for field in turn_key),
+                'base_character__template_id',
+                'attack', 'health', 'golden', 'position'))
+            + list(game_models.SBBGameTurn.objects.filter(
+                board__isnull=False).values_list(
+                    *turn_key,
+                    *('board__characters__' + field for field in (
+                        'base_character__template_id', 'attack', 'health',
+                        'golden', 'position'))))),
+        'spells': sorted(game_models.SBBGameSpell.objects.values_list(
+            *('game_turn__' + field for field in turn_key),
+            'base_spell__template_id', 'order')),
+        'combats': sorted(game_models.SBBCombatRound.objects.values_list(
+            *('turn__' + field for field in turn_key),
+            'opponent_turn__participant__player__account_id',
+            'opponent_turn__turn_num',
+            'hero__template_id', 'opponent_hero__template_id',
+            *OUTCOME_FIELDS)),
+        'series': participant_series(),
+    }
+
+
+def participant_series():
+    """
+    Every participant's packed series, heroes given by template id so
+    they compare across databases.
+    """
+    template_ids = dict(
+        meta_models.SBBHero.objects.values_list('pk', 'template_id'))
+    template_ids[MISSING] = None
+    found = []
+    for participant in game_models.SBBGameParticipant.objects.select_related(
+            'match', 'player'):
+        found.append((
+            participant.match.uuid, participant.player.account_id,
+            *(tuple(participant.series(field))
+              for field in ('hp', 'level', 'exp')),
+            tuple(template_ids[pk] for pk in participant.series('hero_id'))
+        ))
+    return sorted(found)
+
+
+def clear_games():
+    """Delete everything ingest writes, leaving the game pieces."""
+    stats_models.SBBHeroStats.objects.all().delete()
+    composition_models.SBBCharacterPosting.objects.all().delete()
+    composition_models.SBBTurnNumberPosting.objects.all().delete()
+    game_models.SBBCombatRound.objects.all().delete()
+    game_models.SBBGameCharacter.objects.all().delete()
+    game_models.SBBGameSpell.objects.all().delete()
+    game_models.SBBGameTurn.objects.all().delete()
+    game_models.SBBBoard.objects.all().delete()
+    game_models.SBBGameParticipant.objects.all().delete()
+    game_models.SBBGame.objects.all().delete()
+    meta_models.SBBPlayer.objects.all().delete()
+
+
+def serializer_save(json_data, context=None):
+    if context is None:
+        context = {}
+    serializer = GameTarSerializer(data=json_data, context=context)
+    serializer.is_valid(raise_exception=True)
+    return serializer.save()
+
+
+def bulk_save(json_data):
+    serializer = GameTarSerializer(data=json_data)
+    serializer.is_valid(raise_exception=True)
+    return BulkGameWriter().write(
+        GameRecord.from_validated_data(serializer.validated_data))
+
+
+def row_writes(context):
+    """Inserts, updates and deletes, leaving out the SQLite lock."""
+    return [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].split()[0] in ('INSERT', 'UPDATE', 'DELETE')
+        and not query['sql'].endswith('WHERE 0')
+    ]
+
+
+def changed_boards(json_data):
+    """The same game with an attack, a spell list and a board changed."""
+    json_data = deepcopy(json_data)
+    account_id = json_data['player-id']
+    boards = [combat[account_id] for combat in json_data['combat-info']]
+    boards[-1]['characters'][0]['attack'] += 1
+    boards[-2]['spells'] = boards[0]['spells'] + boards[-2]['spells']
+    boards[-3]['characters'] = boards[-3]['characters'][:-1]
+    return json_data
+
+
+def game_url(match_id):
+    return reverse('game_data:game-detail', kwargs={'uuid': match_id})
+
+
+class BucketHandler(SimpleHTTPRequestHandler):
+    """
+    Serves a directory like the roll-up bucket, counting requests.
+    Files get an ETag from their size and mtime, and the usual
+    Last-Modified.
+    """
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(self.path)
+        if server.fail_next:
+            server.fail_next = server.fail_next - 1
+            self.send_error(503)
+            return
+
+        self.etag = None
+        path = self.translate_path(self.path)
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            self.etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+            if self.headers.get('If-None-Match') == self.etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+        super().do_GET()
+
+    def end_headers(self):
+        if getattr(self, 'etag', None):
+            self.send_header('ETag', self.etag)
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalBucket:
+    """
+    A local HTTP stand-in for SBB_ROLLUP_URL or SBB_TEMPLATE_IDS_URL,
+    serving `directory`.
+    """
+
+    def __init__(self, directory):
+        self.server = ThreadingHTTPServer(
+            ('127.0.0.1', 0),
+            partial(BucketHandler, directory=directory)
+        )
+        self.server.requests = []
+        self.server.fail_next = 0
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        return self.server
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
@@ -0,0 +1,253 @@
+from copy import deepcopy
+from itertools import combinations
+from uuid import uuid4
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.game_data.filters import filter_games
+from apps.game_data.models.game import (
+    SBBGame,
+    SBBGameCharacter,
+    SBBGameTurn
+)
+from apps.game_data.models.ingest import VersionStamp
+from apps.game_data.models.meta import SBBHero
+from apps.game_data.registry import STAMP, get_registry
+from apps.game_data.tests.helpers import (
+    bulk_save,
+    game_url,
+    load_pieces,
+    load_sample,
+    rename_players
+)
+
+
+def list_games(client, **params):
+    return client.get(reverse('game_data:game-list'), params)
+
+
+class TestGameDetail(TestCase):
+
+    def setUp(self) -> None:
+        load_pieces()
+        self.json_data = load_sample('full_sample.json')
+        bulk_save(deepcopy(self.json_data))
+
+    def test_game(self):
+        response = self.client.get(game_url(self.json_data['match-id']))
+        self.assertEqual(response.status_code, 200)
+        game = response.json()
+        self.assertEqual(game['match-id'], self.json_data['match-id'])
+        self.assertEqual(len(game['players']), 8)
+
+        account_id = self.json_data['player-id']
+        player, = [
+            player for player in game['players']
+            if player['player-id'] == account_id
+        ]
+        self.assertEqual(player['placement'], self.json_data['placement'])
+        self.assertEqual(
+            [turn['turn'] for turn in player['turns']],
+            list(range(1, len(player['turns']) + 1))
+        )
+
+        # Compare one turn against what the sample said.
+        combat = self.json_data['combat-info'][-1]
+        board = combat[account_id]
+        turn = player['turns'][combat['round'] - 1]
+        self.assertEqual(
+            [
+                (str(item['id']), item['attack'], item['health'],
+                 item['golden'], item['position'])
+                for item in turn['characters']
+            ],
+            sorted(
+                [
+                    (item['id'], item['attack'], item['health'],
+                     item['golden'], item['position'])
+                    for item in board['characters']
+                ],
+                key=lambda item: item[4]
+            )
+        )
+        self.assertEqual(
+            [str(item['id']) for item in turn['treasures']],
+            board['treasures']
+        )
+        self.assertEqual(turn['hero']['name'], SBBHero.objects.get(
+            template_id=turn['hero']['id']).name)
+        stored = SBBGameTurn.objects.get(
+            participant__player__account_id=account_id,
+            turn_num=turn['turn']
+        )
+        self.assertEqual(
+            (turn['hp'], turn['level'], turn['exp']),
+            (stored.hp, stored.level, stored.exp)
+        )
+
+    def test_piece_added_elsewhere(self):
+        """A hero the registry hasn't seen yet is still named."""
+        get_registry()
+        # Without signals, as ingest elsewhere would, which only bumps
+        # the stamp.
+        SBBHero.objects.bulk_create(
+            [SBBHero(template_id=99999, name='New', slug='SBB_HERO_NEW')])
+        VersionStamp.objects.bump(STAMP)
+        SBBGameTurn.objects.filter(turn_num=1).update(
+            hero=SBBHero.objects.get(template_id=99999))
+
+        game = self.client.get(game_url(self.json_data['match-id'])).json()
+        self.assertEqual(
+            game['players'][0]['turns'][0]['hero'],
+            {'id': 99999, 'name': 'New'}
+        )
+
+    def test_missing_game(self):
+        response = self.client.get(game_url(uuid4()))
+        self.assertEqual(response.status_code, 404)
+
+    def test_constant_queries(self):
+        """Query count mustn't grow with rounds or board size."""
+        short_game = rename_players(self.json_data, 'A')
+        short_game['match-id'] = str(uuid4())
+        short_game['combat-info'] = short_game['combat-info'][:1]
+        for player in short_game['players']:
+            player['heroes'] = player['heroes'][:1]
+            for key in ('healths', 'xps'):
+                player[key] = {'1': player[key]['1']}
+        bulk_save(short_game)
+        # Building the piece registry is a one off.
+        get_registry()
+
+        counts = []
+        for match_id in (short_game['match-id'], self.json_data['match-id']):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(game_url(match_id))
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertLessEqual(counts[1], 8)
+
+
+class TestGameList(TestCase):
+
+    def setUp(self) -> None:
+        load_pieces()
+        self.json_data = load_sample('full_sample.json')
+        self.other_game = rename_players(self.json_data, 'A')
+        self.other_game['match-id'] = str(uuid4())
+        bulk_save(deepcopy(self.json_data))
+        bulk_save(deepcopy(self.other_game))
+        self.player = self.json_data['player-id']
+
+        # Set the second game apart: a different hero, no 85s.
+        self.hero = SBBHero.objects.exclude(
+            sbbgameturn__isnull=False).first()
+        other_turns = SBBGameTurn.objects.filter(
+            participant__player__account_id=f'{self.player}A')
+        other_turns.update(hero=self.hero)
+        SBBGameCharacter.objects.filter(
+            game_turn__participant__match__uuid=self.other_game['match-id'],
+            base_character__template_id=85
+        ).delete()
+
+    def match_ids(self, **params):
+        response = list_games(self.client, **params)
+        self.assertEqual(response.status_code, 200)
+        return [game['match-id'] for game in response.json()['results']]
+
+    def test_list(self):
+        response = list_games(self.client)
+        games = response.json()['results']
+        # Newest first.
+        self.assertEqual(
+            [game['match-id'] for game in games],
+            [self.other_game['match-id'], self.json_data['match-id']]
+        )
+        self.assertIn(
+            {'player-id': self.player,
+             'placement': self.json_data['placement']},
+            games[1]['players']
+        )
+        self.assertEqual(len(games[1]['players']), 8)
+
+    def test_filters(self):
+        both = [self.other_game['match-id'], self.json_data['match-id']]
+        first = [self.json_data['match-id']]
+        second = [self.other_game['match-id']]
+
+        self.assertEqual(self.match_ids(player=self.player), first)
+        self.assertEqual(self.match_ids(player=f'{self.player}A'), second)
+        self.assertEqual(
+            self.match_ids(placement=self.json_data['placement']), both)
+        self.assertEqual(self.match_ids(placement=1), [])
+        self.assertEqual(self.match_ids(hero=self.hero.template_id), second)
+        self.assertEqual(self.match_ids(character=85), first)
+        self.assertEqual(self.match_ids(character=111), both)
+        self.assertEqual(
+            self.match_ids(
+                player=f'{self.player}A', hero=self.hero.template_id,
+                placement=self.json_data['placement']),
+            second
+        )
+        # All on the same participant.
+        self.assertEqual(
+            self.match_ids(player=self.player, hero=self.hero.template_id),
+            []
+        )
+
+    def test_unknown_piece(self):
+        self.assertEqual(self.match_ids(hero=99999), [])
+        self.assertEqual(self.match_ids(character=99999), [])
+
+    def test_unknown_piece_no_rebuild(self):
+        """An unknown id only costs the stamp check, not a rebuild."""
+        get_registry()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(filter_games(
+                SBBGame.objects.all(), hero=99999).count(), 0)
+        self.assertEqual(len(queries), 1)
+
+    def test_bad_filter(self):
+        self.assertEqual(list_games(self.client, placement=9).status_code, 400)
+        self.assertEqual(list_games(self.client, hero='x').status_code, 400)
+
+    def test_pages(self):
+        page = list_games(self.client, page_size=1).json()
+        self.assertEqual(len(page['results']), 1)
+        self.assertIsNone(page['previous'])
+        page = self.client.get(page['next']).json()
+        self.assertEqual(
+            [game['match-id'] for game in page['results']],
+            [self.json_data['match-id']]
+        )
+        self.assertIsNone(page['next'])
+
+    def test_query_plans(self):
+        """Every combination of filters is answered from indexes."""
+        filters = {
+            'player': self.player,
+            'hero': self.hero.template_id,
+            'placement': 1,
+            'character': 85,
+        }
+        latest = SBBGame.objects.order_by('-id').first()
+        for count in range(1, len(filters) + 1):
+            for names in combinations(filters, count):
+                params = {name: filters[name] for name in names}
+                # As the paginator runs it, past the first page.
+                queryset = filter_games(
+                    SBBGame.objects.all(), **params
+                ).filter(id__lt=latest.pk).order_by('-id')[:51]
+                sql, sql_params = queryset.query.sql_with_params()
+                with connection.cursor() as cursor:
+                    cursor.execute(f'EXPLAIN QUERY PLAN {sql}', sql_params)
+                    plan = [row[-1] for row in cursor.fetchall()]
+                with self.subTest(filters=names):
+                    # A SCAN, even of a covering index, reads all of it.
+                    self.assertEqual(
+                        [step for step in plan if step.startswith('SCAN')], [])
+                    self.assertTrue(
+                        [step for step in plan if step.startswith('SEARCH')])
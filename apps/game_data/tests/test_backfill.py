@@ -0,0 +1,187 @@
+from datetime import date
+from contextlib import redirect_stdout
+from io import StringIO
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from apps.game_data.benchmarks.synthetic import RollupGenerator, write_rollup
+from apps.game_data.ingest.download import (
+    RollupCache,
+    date_range,
+    fetch_rollup,
+    open_rollup,
+    rollup_session
+)
+from apps.game_data.ingest.tarball import iter_rollup_members
+from apps.game_data.models.game import SBBGame
+from apps.game_data.tests.helpers import LocalBucket, load_pieces
+
+
+class TestRollupDownload(TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.bucket_dir = os.path.join(self.tmp_dir.name, 'bucket')
+        os.makedirs(self.bucket_dir)
+        self.cache = RollupCache(os.path.join(self.tmp_dir.name, 'cache'))
+        self.bucket = LocalBucket(self.bucket_dir)
+        self.session = rollup_session(backoff_factor=0)
+
+    def tearDown(self) -> None:
+        self.session.close()
+        self.tmp_dir.cleanup()
+
+    def add_rollup(self, day, seed=0):
+        path = os.path.join(self.bucket_dir, f'{day}.tar.gz')
+        write_rollup(path, RollupGenerator(seed).members(2))
+        return path
+
+    def test_date_range(self):
+        self.assertEqual(
+            list(date_range(date(2022, 2, 27), date(2022, 3, 1))),
+            [date(2022, 2, 27), date(2022, 2, 28), date(2022, 3, 1)]
+        )
+
+    def test_downloads_once(self):
+        source = self.add_rollup('2022-05-01')
+        with self.bucket as server:
+            path = fetch_rollup(
+                self.session, self.bucket.url, '2022-05-01', self.cache)
+            again = fetch_rollup(
+                self.session, self.bucket.url, '2022-05-01', self.cache)
+
+        self.assertEqual(server.requests, ['/2022-05-01.tar.gz'])
+        self.assertEqual(path, again)
+        with open(path, 'rb') as cached, open(source, 'rb') as original:
+            self.assertEqual(cached.read(), original.read())
+
+    def test_content_addressed(self):
+        source = self.add_rollup('2022-05-01')
+        shutil.copy(source, os.path.join(self.bucket_dir, '2022-05-02.tar.gz'))
+        self.add_rollup('2022-05-03', seed=1)
+        with self.bucket:
+            paths = [
+                fetch_rollup(self.session, self.bucket.url, day, self.cache)
+                for day in ('2022-05-01', '2022-05-02', '2022-05-03')
+            ]
+        self.assertEqual(paths[0], paths[1])
+        self.assertNotEqual(paths[0], paths[2])
+
+    def test_missing_day(self):
+        with self.bucket:
+            path = fetch_rollup(
+                self.session, self.bucket.url, '2022-05-01', self.cache)
+        self.assertIsNone(path)
+        self.assertIsNone(self.cache.get('2022-05-01'))
+
+    def test_streams_into_cache(self):
+        source = self.add_rollup('2022-05-01')
+        with self.bucket as server:
+            with open_rollup(self.session, self.bucket.url, '2022-05-01',
+                             self.cache) as stream:
+                members = iter_rollup_members(stream)
+                next(members)
+                # Still downloading, so not cached yet.
+                self.assertIsNone(self.cache.get('2022-05-01'))
+                self.assertEqual(len(list(members)), 1)
+
+            with open_rollup(self.session, self.bucket.url, '2022-05-01',
+                             self.cache) as stream:
+                self.assertEqual(len(list(iter_rollup_members(stream))), 2)
+
+        self.assertEqual(server.requests, ['/2022-05-01.tar.gz'])
+        with open(self.cache.get('2022-05-01'), 'rb') as cached, \
+                open(source, 'rb') as original:
+            self.assertEqual(cached.read(), original.read())
+
+    def test_stream_failure_not_cached(self):
+        self.add_rollup('2022-05-01')
+        with self.bucket, self.assertRaises(RuntimeError):
+            with open_rollup(self.session, self.bucket.url, '2022-05-01',
+                             self.cache) as stream:
+                stream.read(10)
+                raise RuntimeError('ingest died')
+        self.assertIsNone(self.cache.get('2022-05-01'))
+        self.assertEqual(
+            [name for name in os.listdir(self.cache.directory)
+             if name.endswith('.part')],
+            []
+        )
+
+    def test_stream_missing_day(self):
+        with self.bucket:
+            with open_rollup(self.session, self.bucket.url, '2022-05-01',
+                             self.cache) as stream:
+                self.assertIsNone(stream)
+
+    def test_retries(self):
+        self.add_rollup('2022-05-01')
+        with self.bucket as server:
+            server.fail_next = 2
+            path = fetch_rollup(
+                self.session, self.bucket.url, '2022-05-01', self.cache)
+        self.assertIsNotNone(path)
+        self.assertEqual(len(server.requests), 3)
+
+
+class TestBackfillCommand(TestCase):
+
+    def setUp(self) -> None:
+        load_pieces()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        bucket_dir = os.path.join(self.tmp_dir.name, 'bucket')
+        os.makedirs(bucket_dir)
+        generator = RollupGenerator(povs=2)
+        for day in ('2022-05-01', '2022-05-03'):
+            write_rollup(
+                os.path.join(bucket_dir, f'{day}.tar.gz'),
+                generator.members(3)
+            )
+        self.bucket = LocalBucket(bucket_dir)
+        self.settings = override_settings(
+            SBB_ROLLUP_URL=self.bucket.url,
+            SBB_ROLLUP_CACHE=os.path.join(self.tmp_dir.name, 'cache')
+        )
+        self.settings.enable()
+
+    def tearDown(self) -> None:
+        self.settings.disable()
+        self.tmp_dir.cleanup()
+
+    def backfill(self):
+        output = StringIO()
+        with redirect_stdout(output):
+            call_command('backfill', '2022-05-01', '2022-05-03', downloads=3)
+        return output.getvalue()
+
+    def test_backfill(self):
+        with self.bucket as server:
+            output = self.backfill()
+            self.assertEqual(len(server.requests), 3)
+            self.assertEqual(SBBGame.objects.count(), 6)
+            self.assertIn('2022-05-02: no roll-up.', output)
+
+            # Cached days aren't downloaded again, nor their games loaded.
+            output = self.backfill()
+            self.assertEqual(len(server.requests), 4)
+            self.assertEqual(SBBGame.objects.count(), 6)
+            self.assertIn('6 games already recorded, skipped.', output)
+
+    def test_load_bucket_uses_cache(self):
+        with self.bucket as server:
+            self.backfill()
+            with redirect_stdout(StringIO()):
+                call_command('load_bucket', '2022-05-01')
+            self.assertEqual(len(server.requests), 3)
+
+    def test_load_bucket_fills_cache(self):
+        with self.bucket as server:
+            with redirect_stdout(StringIO()):
+                call_command('load_bucket', '2022-05-01')
+                call_command('load_bucket', '2022-05-01')
+            self.assertEqual(len(server.requests), 1)
+        self.assertEqual(SBBGame.objects.count(), 3)
@@ -0,0 +1,172 @@
+import os
+import tempfile
+
+from django.test import TestCase
+
+from apps.game_data.benchmarks.api import GameDetailBenchmark
+from apps.game_data.benchmarks.boards import BoardStorageBenchmark
+from apps.game_data.benchmarks.composition import CompositionBenchmark
+from apps.game_data.benchmarks.export import ExportBenchmark
+from apps.game_data.benchmarks.matchups import MatchupBenchmark
+from apps.game_data.benchmarks.ingest import (
+    DBProfileBenchmark,
+    IngestBenchmark
+)
+from apps.game_data.benchmarks.series import SeriesBenchmark
+from apps.game_data.benchmarks.synthetic import RollupGenerator, write_rollup
+from apps.game_data.benchmarks.upserts import UpsertBenchmark
+from apps.game_data.benchmarks.validate import ValidatorBenchmark
+from apps.game_data.ingest.pipeline import RollupIngestor
+from apps.game_data.models.game import SBBGame, SBBGameTurn
+from apps.game_data.tests.helpers import load_pieces
+
+
+class TestRollupGenerator(TestCase):
+
+    def setUp(self) -> None:
+        load_pieces()
+
+    def test_deterministic(self):
+        self.assertEqual(
+            list(RollupGenerator(seed=3, povs=2).members(4)),
+            list(RollupGenerator(seed=3, povs=2).members(4))
+        )
+        self.assertNotEqual(
+            list(RollupGenerator(seed=3).members(1)),
+            list(RollupGenerator(seed=4).members(1))
+        )
+
+    def test_games_are_valid(self):
+        ingestor = RollupIngestor()
+        ingestor.ingest_members(RollupGenerator(povs=3).members(5))
+        self.assertEqual(ingestor.failures, [])
+        self.assertEqual(ingestor.recorded, 15)
+        self.assertEqual(SBBGame.objects.count(), 5)
+
+
+class TestIngestBenchmark(TestCase):
+
+    def setUp(self) -> None:
+        load_pieces()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_measure_file(self):
+        path = os.path.join(self.tmp_dir.name, 'rollup.tar.gz')
+        write_rollup(path, RollupGenerator(povs=2).members(3))
+
+        results = IngestBenchmark().measure_file(path)
+        self.assertEqual(results['games'], 3)
+        self.assertEqual(results['members'], 6)
+        self.assertEqual(results['failures'], 0)
+        self.assertGreater(results['queries_per_game'], 0)
+        self.assertLessEqual(
+            results['latency_p50_ms'], results['latency_p99_ms'])
+
+
+class TestUpsertBenchmark(TestCase):
+
+    def test_measure(self):
+        results = UpsertBenchmark().measure(sizes='240,480', repeats=2, seed=0)
+        self.assertEqual(len(results), 8)
+        self.assertIn('upsert_new_turns_ms_480', results)
+        # Sampling leaves the tables at the size measured.
+        self.assertEqual(SBBGameTurn.objects.count(), 480)
+
+
+class TestDBProfileBenchmark(TestCase):
+
+    def test_measure_under_profile(self):
+        results = DBProfileBenchmark().measure(
+            games=2, povs=2, seed=0, merge_window=256, batch_size=50,
+            db_profile='ingest'
+        )
+        self.assertEqual(results['games'], 2)
+        self.assertEqual(results['failures'], 0)
+
+
+class TestValidatorBenchmark(TestCase):
+
+    def test_measure(self):
+        results = ValidatorBenchmark().measure(games=3, seed=0)
+        self.assertEqual(
+            sorted(results),
+            [
+                'docs_per_sec_drf', 'docs_per_sec_drf_reused',
+                'docs_per_sec_fast', 'games', 'ms_per_doc_drf',
+                'ms_per_doc_drf_reused', 'ms_per_doc_fast', 'setup_us_drf',
+                'setup_us_drf_reused', 'speedup'
+            ]
+        )
+        self.assertEqual(results['games'], 3)
+        # How they compare is for the command's output, timings are too
+        # noisy to assert on here.
+        for key, value in results.items():
+            self.assertGreater(value, 0, key)
+
+
+class TestGameDetailBenchmark(TestCase):
+
+    def test_measure(self):
+        results = GameDetailBenchmark().measure(
+            rounds='2,6', repeats=2, seed=0)
+        self.assertEqual(len(results), 6)
+        self.assertEqual(results['queries_2'], results['queries_6'])
+        self.assertGreater(results['kb_6'], results['kb_2'])
+
+
+class TestExportBenchmark(TestCase):
+
+    def test_measure(self):
+        results = ExportBenchmark().measure(
+            games=2, turns=3, chunk_size=50, seed=0)
+        self.assertEqual(results['turn_rows'], 2 * 8 * 3)
+        self.assertEqual(results['board_rows'], 2 * 8 * 3 * 7)
+        self.assertGreater(results['rows_per_sec_boards_csv'], 0)
+
+
+class TestMatchupBenchmark(TestCase):
+
+    def test_measure(self):
+        results = MatchupBenchmark().measure(rounds=500, repeats=2, seed=0)
+        self.assertEqual(results['rounds'], 500)
+        self.assertGreater(results['heroes'], 1)
+        self.assertIn('cached_ms', results)
+
+
+class TestCompositionBenchmark(TestCase):
+
+    def test_measure(self):
+        # Raises if the index and the joins ever disagree.
+        results = CompositionBenchmark().measure(
+            boards=600, searches=3, seed=0)
+        self.assertEqual(results['boards'], 600)
+        self.assertGreater(results['matches_1_any'], 0)
+        self.assertIn('join_ms_3_turns', results)
+
+
+class TestBoardStorageBenchmark(TestCase):
+
+    def test_measure(self):
+        # Raises if the two modes export different boards.
+        results = BoardStorageBenchmark().measure(
+            days=2, games_per_day=2, povs=1, seed=0)
+        self.assertEqual(results['rows_boards'], 0)
+        self.assertGreater(results['snapshots_boards'], 0)
+        self.assertLess(
+            results['snapshots_character_rows'],
+            results['rows_character_rows']
+        )
+
+
+class TestSeriesBenchmark(TestCase):
+
+    def test_measure(self):
+        # Raises if the series and the turns ever disagree.
+        results = SeriesBenchmark().measure(
+            days=2, games_per_day=2, repeats=1, seed=0)
+        self.assertEqual(results['participants'], 32)
+        self.assertGreater(results['width'], 1)
+        self.assertIn('turns_ms', results)
@@ -0,0 +1,167 @@
+from contextlib import redirect_stdout
+from copy import deepcopy
+from io import StringIO
+from unittest import mock
+import json
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.game_data import composition
+from apps.game_data.export import export_rows
+from apps.game_data.filters import filter_games
+from apps.game_data.ingest.pipeline import RollupIngestor
+from apps.game_data.models.game import (
+    SBBBoard,
+    SBBBoardCharacter,
+    SBBGame,
+    SBBGameCharacter,
+    SBBGameTurn
+)
+from apps.game_data.models.meta import SBBCharacter
+from apps.game_data.tests.helpers import (
+    bulk_save,
+    changed_boards,
+    clear_games,
+    game_rows,
+    game_url,
+    load_pieces,
+    load_sample,
+    row_writes,
+    sample_members,
+    serializer_save
+)
+
+snapshots = override_settings(SBB_BOARD_SNAPSHOTS=True)
+
+
+class TestBoardSnapshots(TestCase):
+
+    def setUp(self) -> None:
+        load_pieces()
+        self.json_data = load_sample('full_sample.json')
+
+    def test_digest(self):
+        rows = [(1, 2, 2, False, 1), (5, 3, 4, True, 2)]
+        self.assertEqual(
+            SBBBoard.objects.digest(rows),
+            SBBBoard.objects.digest(rows[::-1])
+        )
+        self.assertNotEqual(
+            SBBBoard.objects.digest(rows),
+            SBBBoard.objects.digest([rows[0], (5, 3, 4, False, 2)])
+        )
+
+    def test_racing_insert(self):
+        """A board someone else stores first is used, not duplicated."""
+        character = SBBCharacter.objects.first()
+        rows = [(character.pk, 2, 2, False, 1), (character.pk, 3, 4, True, 2)]
+        theirs = SBBBoard.objects.resolve_many([rows])
+
+        # As if it turned up between our lookup and our insert.
+        in_bulk = SBBBoard.objects.in_bulk
+        with mock.patch.object(
+                SBBBoard.objects, 'in_bulk',
+                side_effect=[{}, in_bulk(field_name='digest')]):
+            ours = SBBBoard.objects.resolve_many([rows])
+        self.assertEqual(ours, theirs)
+        self.assertEqual(SBBBoardCharacter.objects.count(), 2)
+
+    def test_prune(self):
+        with snapshots:
+            bulk_save(deepcopy(self.json_data))
+            boards = SBBBoard.objects.count()
+            bulk_save(changed_boards(self.json_data))
+        expected = game_rows()
+        self.assertGreater(SBBBoard.objects.count(), boards)
+
+        with redirect_stdout(StringIO()):
+            call_command('prune_boards')
+        self.assertEqual(
+            SBBBoard.objects.count(),
+            SBBGameTurn.objects.filter(board__isnull=False)
+            .values('board_id').distinct().count()
+        )
+        self.assertEqual(game_rows(), expected)
+        self.assertEqual(SBBBoard.objects.prune(), 0)
+
+    def test_same_rows(self):
+        for save in (serializer_save, bulk_save):
+            with self.subTest(save=save.__name__):
+                save(deepcopy(self.json_data))
+                save(changed_boards(self.json_data))
+                expected = game_rows()
+                clear_games()
+
+                with snapshots:
+                    save(deepcopy(self.json_data))
+                    save(changed_boards(self.json_data))
+                self.assertEqual(game_rows(), expected)
+                self.assertFalse(SBBGameCharacter.objects.exists())
+                clear_games()
+
+    def test_shared(self):
+        """Games with the same boards point at the same snapshots."""
+        with snapshots:
+            RollupIngestor().ingest_members(sample_members())
+        boards = SBBGameTurn.objects.filter(board__isnull=False)
+        self.assertEqual(
+            SBBBoard.objects.count(),
+            boards.values('board_id').distinct().count()
+        )
+        # Four copies of the same game.
+        self.assertEqual(boards.count(), 4 * SBBBoard.objects.count())
+
+    def test_switching(self):
+        """Rewriting a game in the other mode moves its boards across."""
+        bulk_save(deepcopy(self.json_data))
+        expected = game_rows()
+        with snapshots:
+            bulk_save(deepcopy(self.json_data))
+        self.assertFalse(SBBGameCharacter.objects.exists())
+        self.assertEqual(game_rows(), expected)
+
+        bulk_save(deepcopy(self.json_data))
+        self.assertFalse(
+            SBBGameTurn.objects.filter(board__isnull=False).exists())
+        self.assertEqual(game_rows(), expected)
+
+    def test_rerun_writes_nothing(self):
+        with snapshots:
+            for save in (serializer_save, bulk_save):
+                save(deepcopy(self.json_data))
+                with CaptureQueriesContext(connection) as queries:
+                    save(deepcopy(self.json_data))
+                self.assertEqual(row_writes(queries), [], save.__name__)
+                clear_games()
+
+    def test_reads(self):
+        """Everything reading boards sees the same either way."""
+        members = [
+            ('0.json', json.dumps(self.json_data).encode()),
+            ('1.json', json.dumps(changed_boards(self.json_data)).encode()),
+        ]
+        results = []
+        for mode in (override_settings(), snapshots):
+            with mode:
+                RollupIngestor().ingest_members(members)
+            self.assertEqual(composition.mismatches(), [])
+            detail = self.client.get(
+                game_url(self.json_data['match-id'])).json()
+            results.append((
+                detail,
+                sorted(export_rows('boards')),
+                [
+                    filter_games(SBBGame.objects.all(), character=template_id)
+                    .exists()
+                    for template_id in (85, 111, 25)
+                ],
+                sorted(SBBGameTurn.objects.filter(
+                    pk__in=composition.find_turns([85])
+                ).values_list('turn_num', flat=True)),
+            ))
+            clear_games()
+        self.assertEqual(results[0], results[1])
+        self.assertIn(True, results[0][2])
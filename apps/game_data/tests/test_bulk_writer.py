@@ -0,0 +1,218 @@
+from copy import deepcopy
+from uuid import uuid4
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.game_data.ingest.diff import diff_rows
+from apps.game_data.ingest.pipeline import RollupIngestor
+from apps.game_data.models import (
+    game as game_models,
+    meta as meta_models
+)
+from apps.game_data.registry import get_registry
+from apps.game_data.tests.helpers import (
+    bulk_save,
+    changed_boards,
+    clear_games,
+    game_rows,
+    load_pieces,
+    load_sample,
+    pov_of,
+    rename_players,
+    row_writes,
+    sample_members,
+    serializer_save
+)
+
+
+class TestBulkGameWriter(TestCase):
+
+    def setUp(self) -> None:
+        load_pieces()
+        self.json_data = load_sample('full_sample.json')
+
+    def assertSameRows(self, *json_docs):
+        """Both write paths should leave identical rows behind."""
+        # Validation pops keys out of the combat data, so work on copies.
+        for json_data in json_docs:
+            serializer_save(deepcopy(json_data))
+        expected = game_rows()
+        clear_games()
+
+        for json_data in json_docs:
+            bulk_save(deepcopy(json_data))
+        self.assertEqual(game_rows(), expected)
+
+    def test_same_rows_as_serializer(self):
+        self.assertSameRows(self.json_data)
+        self.assertEqual(len(game_rows()['characters']), 108)
+
+    def test_same_rows_for_second_pov(self):
+        """A second JSON for the same match should update in place."""
+        other_pov = pov_of(self.json_data, '5E2F2E83C4BC4A8E', 3)
+        other_pov['possibly-mythic'] = True
+        other_pov['combat-info'][0]['5E2F2E83C4BC4A8E']['characters'] = []
+        other_pov['combat-info'][1]['5E2F2E83C4BC4A8E']['spells'] = []
+        self.assertSameRows(self.json_data, other_pov)
+
+    def test_same_rows_for_changed_boards(self):
+        self.assertSameRows(self.json_data, changed_boards(self.json_data))
+
+    def test_same_rows_on_rerun(self):
+        self.assertSameRows(self.json_data, self.json_data)
+
+    def test_constant_queries(self):
+        """Query count per game mustn't grow with rounds or board size."""
+        short_game = rename_players(self.json_data, 'A')
+        short_game['match-id'] = str(uuid4())
+        # Keep the last round so there's at least one treasure to link.
+        short_game['combat-info'] = (
+            short_game['combat-info'][:1] + short_game['combat-info'][-1:])
+
+        long_game = rename_players(self.json_data, 'B')
+        long_game['match-id'] = str(uuid4())
+
+        # Built by the first validation otherwise.
+        get_registry()
+        with CaptureQueriesContext(connection) as short_queries:
+            bulk_save(short_game)
+        with CaptureQueriesContext(connection) as long_queries:
+            bulk_save(long_game)
+
+        self.assertEqual(
+            len(short_queries.captured_queries),
+            len(long_queries.captured_queries)
+        )
+        self.assertLess(len(long_queries.captured_queries), 25)
+
+
+class TestBoardDiff(TestCase):
+
+    def setUp(self) -> None:
+        load_pieces()
+        self.json_data = load_sample('full_sample.json')
+
+    def test_diff_rows(self):
+        class Row:
+            def __init__(self, pk, value):
+                self.pk = pk
+                self.value = value
+
+        rows = [Row(1, 'a'), Row(2, 'b'), Row(3, 'b'), Row(4, 'c')]
+        updates, creates, deletes = diff_rows(
+            rows, ['b', 'a', 'd', 'e', 'f'], key=lambda row: row.value)
+        self.assertEqual(
+            [(row.pk, value) for row, value in updates], [(2, 'd'), (4, 'e')])
+        self.assertEqual(creates, ['f'])
+        self.assertEqual(deletes, [])
+
+        updates, creates, deletes = diff_rows(
+            rows, ['c'], key=lambda row: row.value)
+        self.assertEqual((updates, creates), ([], []))
+        self.assertEqual([row.pk for row in deletes], [1, 2, 3])
+
+    def test_rerun_writes_nothing(self):
+        for save in (serializer_save, bulk_save):
+            save(deepcopy(self.json_data))
+            with CaptureQueriesContext(connection) as queries:
+                save(deepcopy(self.json_data))
+            self.assertEqual(row_writes(queries), [], save.__name__)
+            clear_games()
+
+    def test_only_changes_written(self):
+        for save in (serializer_save, bulk_save):
+            save(deepcopy(self.json_data))
+            with CaptureQueriesContext(connection) as queries:
+                save(changed_boards(self.json_data))
+            tables = sorted(
+                sql.split('"')[1] for sql in row_writes(queries))
+            self.assertEqual(
+                tables,
+                [
+                    'game_data_sbbgamecharacter',  # delete the dropped one
+                    'game_data_sbbgamecharacter',  # update the attack
+                    'game_data_sbbgamespell',  # reuse the first row
+                    'game_data_sbbgamespell',  # add the second
+                ],
+                save.__name__
+            )
+            clear_games()
+
+
+def player_queries(context):
+    return [
+        query for query in context.captured_queries
+        if 'game_data_sbbplayer' in query['sql']
+    ]
+
+
+class TestResolveMany(TestCase):
+
+    def setUp(self) -> None:
+        load_pieces()
+
+    def test_players(self):
+        meta_models.SBBPlayer.objects.create(account_id='A')
+        with CaptureQueriesContext(connection) as queries:
+            players = meta_models.SBBPlayer.objects.resolve_many(
+                ['A', 'B', 'A', 'C'])
+        self.assertEqual(list(players), ['A', 'B', 'C'])
+        self.assertEqual(meta_models.SBBPlayer.objects.count(), 3)
+        # Look up, insert the missing two, look those up.
+        self.assertEqual(len(queries), 3)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(
+                meta_models.SBBPlayer.objects.resolve_many(['C', 'A']),
+                {'C': players['C'], 'A': players['A']}
+            )
+        self.assertEqual(len(queries), 1)
+
+    def test_participants(self):
+        game = game_models.SBBGame.objects.create(uuid=uuid4())
+        players = meta_models.SBBPlayer.objects.resolve_many(['A', 'B'])
+        game_models.SBBGameParticipant.objects.create(
+            match=game, player=players['A'])
+
+        participants = game_models.SBBGameParticipant.objects.resolve_many(
+            game, players)
+        self.assertEqual(
+            {account_id: participant.player for account_id, participant
+             in participants.items()},
+            players
+        )
+        self.assertEqual(game.sbbgameparticipant_set.count(), 2)
+
+        with CaptureQueriesContext(connection) as queries:
+            again = game_models.SBBGameParticipant.objects.resolve_many(
+                game, players)
+        self.assertEqual(again, participants)
+        self.assertEqual(len(queries), 1)
+
+    def test_serializer_shares_players(self):
+        json_data = load_sample('full_sample.json')
+        other_game = deepcopy(json_data)
+        other_game['match-id'] = str(uuid4())
+
+        context = {}
+        serializer_save(deepcopy(json_data), context)
+        self.assertEqual(len(context['players']), 8)
+        with CaptureQueriesContext(connection) as queries:
+            serializer_save(other_game, context)
+        # Same players, nothing to look up or write.
+        self.assertEqual(player_queries(queries), [])
+
+    def test_one_player_lookup_per_batch(self):
+        members = sample_members()
+        with CaptureQueriesContext(connection) as queries:
+            ingestor = RollupIngestor(batch_size=10)
+            ingestor.ingest_members(members)
+        self.assertEqual(ingestor.recorded, len(members))
+        # Select, insert, select again, then mythic flag updates.
+        self.assertEqual(
+            [query['sql'].split()[0] for query in player_queries(queries)
+             if 'UPDATE' not in query['sql']],
+            ['SELECT', 'INSERT', 'SELECT']
+        )
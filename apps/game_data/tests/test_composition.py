@@ -0,0 +1,147 @@
+from contextlib import redirect_stdout
+from io import StringIO
+from itertools import combinations
+from unittest import mock
+import json
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from apps.game_data import composition
+from apps.game_data.ingest.pipeline import RollupIngestor
+from apps.game_data.models.composition import SBBTurnNumberPosting
+from apps.game_data.models.game import SBBGameCharacter, SBBGameTurn
+from apps.game_data.tests.helpers import (
+    bulk_save,
+    changed_boards,
+    load_pieces,
+    load_sample,
+    sample_members
+)
+
+
+def ingest(*json_docs, **options):
+    RollupIngestor(**options).ingest_members(
+        (f'{index}.json', json.dumps(json_data).encode())
+        for index, json_data in enumerate(json_docs)
+    )
+
+
+def boards():
+    """turn pk -> {(character template id, golden)}, for every stored turn."""
+    found = {
+        pk: set() for pk in SBBGameTurn.objects.values_list('pk', flat=True)}
+    for turn_id, template_id, golden in SBBGameCharacter.objects.values_list(
+            'game_turn_id', 'base_character__template_id', 'golden'):
+        found[turn_id].add((template_id, golden))
+    return found
+
+
+def expected_turns(characters, golden=False, turns=None):
+    """What `find_turns` should say, the slow way."""
+    turn_nums = dict(SBBGameTurn.objects.values_list('pk', 'turn_num'))
+    found = []
+    for turn_id, board in sorted(boards().items()):
+        held = {
+            template_id for template_id, is_golden in board
+            if is_golden or not golden
+        }
+        if set(characters) <= held and (
+                turns is None or turn_nums[turn_id] in turns):
+            found.append(turn_id)
+    return found
+
+
+class TestCompositionIndex(TestCase):
+
+    def setUp(self) -> None:
+        load_pieces()
+        self.json_data = load_sample('full_sample.json')
+
+    def assertFindsTurns(self):
+        """`find_turns` agrees with the boards for every small search."""
+        characters = sorted({
+            template_id for board in boards().values()
+            for template_id, _ in board
+        })
+        searches = [
+            search for size in (1, 2, 3)
+            for search in combinations(characters, size)
+        ]
+        matched = 0
+        for search in searches[:300]:
+            for options in ({}, {'golden': True}, {'turns': range(3, 7)}):
+                found = composition.find_turns(search, **options)
+                self.assertEqual(
+                    found, expected_turns(search, **options), (search, options))
+                matched = matched + bool(found)
+        self.assertGreater(matched, 50)
+
+    def test_ingest(self):
+        RollupIngestor().ingest_members(sample_members())
+        self.assertEqual(composition.mismatches(), [])
+        self.assertFindsTurns()
+
+    def test_batches(self):
+        RollupIngestor(batch_size=3).ingest_members(sample_members())
+        self.assertEqual(composition.mismatches(), [])
+
+    def test_blocks(self):
+        """With tiny blocks, postings span plenty of them."""
+        with mock.patch.multiple(composition, BLOCK_BITS=3, BLOCK_MASK=7):
+            RollupIngestor().ingest_members(sample_members())
+            self.assertEqual(composition.mismatches(), [])
+            self.assertFindsTurns()
+
+    def test_changed_board(self):
+        ingest(self.json_data)
+        ingest(changed_boards(self.json_data))
+        self.assertEqual(composition.mismatches(), [])
+        self.assertFindsTurns()
+
+    def test_unknown_character(self):
+        ingest(self.json_data)
+        characters = next(board for board in boards().values() if board)
+        template_id = min(characters)[0]
+        self.assertTrue(composition.find_turns([template_id]))
+        self.assertEqual(composition.find_turns([template_id, -1]), [])
+        with self.assertRaises(ValueError):
+            composition.find_turns([])
+
+    def test_rebuild(self):
+        ingest(self.json_data)
+        refreshed = composition.stored()
+        # Written without the pipeline, so left out of the index.
+        bulk_save(changed_boards(self.json_data))
+        self.assertTrue(composition.mismatches())
+        with self.assertRaises(CommandError), redirect_stdout(StringIO()):
+            call_command('rebuild_composition_index', '--check')
+
+        with redirect_stdout(StringIO()):
+            call_command('rebuild_composition_index')
+        self.assertEqual(composition.mismatches(), [])
+        self.assertNotEqual(composition.stored(), refreshed)
+        ingest(self.json_data)
+        self.assertEqual(composition.stored(), refreshed)
+
+    def test_racing_insert(self):
+        """A posting someone else inserts first is merged into."""
+        merge_postings = composition.merge_postings
+
+        def insert_theirs(*args):
+            # As if it turned up between our read and our insert.
+            found = merge_postings(*args)
+            if not SBBTurnNumberPosting.objects.exists():
+                SBBTurnNumberPosting.objects.create(
+                    turn_num=5, block=0, turns=composition.to_bytes(0b0110))
+            return found
+
+        with mock.patch.object(
+                composition, 'merge_postings', side_effect=insert_theirs):
+            composition.sync_postings(
+                SBBTurnNumberPosting, composition.TURN_NUMBER_KEY,
+                composition.TURN_NUMBER_BITS, {0: 0b1001},
+                {(5, 0): [0b1001]}
+            )
+        self.assertEqual(composition.stored()[1], {(5, 0): [0b1111]})
@@ -0,0 +1,50 @@
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import TransactionTestCase
+
+from apps.game_data.ingest.dbprofile import ingest_profile, pragma
+
+
+class TestIngestProfile(TransactionTestCase):
+
+    def setUp(self) -> None:
+        if connection.vendor != 'sqlite':
+            self.skipTest('Profiles only tune SQLite.')
+
+    def settings(self):
+        # Memory mapping is a no-op on the in-memory test database.
+        return {
+            name: pragma(connection, name)
+            for name in ('synchronous', 'cache_size', 'temp_store')
+        }
+
+    def test_applied_then_restored(self):
+        before = self.settings()
+        with ingest_profile('ingest'):
+            self.assertEqual(
+                self.settings(),
+                {
+                    'synchronous': 1,
+                    'cache_size': -256 * 1024,
+                    'temp_store': 2
+                }
+            )
+        self.assertEqual(self.settings(), before)
+
+    def test_new_connections_tuned(self):
+        before = self.settings()
+        with ingest_profile('ingest'):
+            pragma(connection, 'cache_size', -2000)
+            # As if a worker had just opened its connection.
+            connection_created.send(
+                sender=connection.__class__, connection=connection)
+            self.assertEqual(self.settings()['cache_size'], -256 * 1024)
+
+        connection_created.send(
+            sender=connection.__class__, connection=connection)
+        self.assertEqual(self.settings(), before)
+
+    def test_default_changes_nothing(self):
+        before = self.settings()
+        with ingest_profile('default'):
+            self.assertEqual(self.settings(), before)
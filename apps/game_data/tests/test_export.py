@@ -0,0 +1,153 @@
+from contextlib import redirect_stdout
+from copy import deepcopy
+from io import StringIO
+import csv
+import json
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.game_data.export import export
+from apps.game_data.models.game import SBBGameCharacter, SBBGameTurn
+from apps.game_data.tests.helpers import (
+    bulk_save,
+    load_pieces,
+    load_sample,
+    rename_players
+)
+
+
+def export_url(kind, file_format):
+    return reverse(
+        'game_data:export',
+        kwargs={'kind': kind, 'file_format': file_format}
+    )
+
+
+class TestExport(TestCase):
+
+    def setUp(self) -> None:
+        load_pieces()
+        self.json_data = load_sample('full_sample.json')
+        bulk_save(deepcopy(self.json_data))
+        # Throttle history lives in the cache.
+        cache.clear()
+        self.client.force_login(User.objects.create_user('analyst'))
+
+    def test_turns(self):
+        rows = [
+            json.loads(line)
+            for line in ''.join(export('turns', 'ndjson')).splitlines()
+        ]
+        self.assertEqual(len(rows), SBBGameTurn.objects.count())
+
+        turn = SBBGameTurn.objects.select_related(
+            'participant__player', 'hero').order_by('pk').first()
+        self.assertEqual(rows[0], {
+            'match-id': self.json_data['match-id'],
+            'player-id': turn.participant.player.account_id,
+            'turn': turn.turn_num,
+            'hero': turn.hero.template_id,
+            'hp': turn.hp,
+            'level': turn.level,
+            'exp': turn.exp,
+        })
+
+    def test_boards_csv(self):
+        rows = list(csv.reader(
+            ''.join(export('boards', 'csv')).splitlines()))
+        self.assertEqual(
+            rows[0],
+            ['match-id', 'player-id', 'turn', 'character', 'attack',
+             'health', 'golden', 'position']
+        )
+        self.assertEqual(len(rows) - 1, SBBGameCharacter.objects.count())
+
+        character = SBBGameCharacter.objects.select_related(
+            'base_character').order_by('pk').first()
+        self.assertEqual(rows[1][3:], [
+            str(character.base_character.template_id),
+            str(character.attack),
+            str(character.health),
+            str(character.golden),
+            str(character.position),
+        ])
+
+    def test_chunks(self):
+        """Rows are read and handed on a chunk at a time."""
+        with CaptureQueriesContext(connection) as queries:
+            chunks = list(export('boards', 'ndjson', chunk_size=10))
+        # One for boards stored as rows, one for snapshots.
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(
+            len(chunks), -(-SBBGameCharacter.objects.count() // 10))
+
+    def test_endpoint(self):
+        other_game = rename_players(self.json_data, 'A')
+        other_game['match-id'] = '6b1c1b84-e3d9-4c1f-9d35-3f1bf8e0e0a1'
+        bulk_save(other_game)
+
+        response = self.client.get(export_url('turns', 'csv'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('turns.csv', response['Content-Disposition'])
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(
+            len(content.splitlines()) - 1, SBBGameTurn.objects.count())
+
+        # Filtered like the game list.
+        response = self.client.get(
+            export_url('turns', 'ndjson'),
+            {'player': self.json_data['player-id']}
+        )
+        match_ids = {
+            json.loads(line)['match-id']
+            for line in b''.join(response.streaming_content).splitlines()
+        }
+        self.assertEqual(match_ids, {self.json_data['match-id']})
+
+    def test_bad_request(self):
+        self.assertEqual(
+            self.client.get(export_url('hands', 'csv')).status_code, 404)
+        self.assertEqual(
+            self.client.get(export_url('turns', 'xml')).status_code, 404)
+        self.assertEqual(
+            self.client.get(
+                export_url('turns', 'csv'), {'placement': 0}).status_code,
+            400
+        )
+
+    def test_signed_in_only(self):
+        self.client.logout()
+        self.assertEqual(
+            self.client.get(export_url('turns', 'csv')).status_code, 403)
+
+    @override_settings(SBB_EXPORT_RATE='2/hour')
+    def test_throttled(self):
+        for _ in range(2):
+            self.assertEqual(
+                self.client.get(export_url('turns', 'csv')).status_code, 200)
+        self.assertEqual(
+            self.client.get(export_url('turns', 'csv')).status_code, 429)
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'boards.csv')
+            call_command('export_games', 'boards', '--format=csv',
+                         f'--output={path}')
+            with open(path, newline='') as csv_file:
+                rows = list(csv.reader(csv_file))
+        self.assertEqual(len(rows) - 1, SBBGameCharacter.objects.count())
+
+        output = StringIO()
+        with redirect_stdout(output):
+            call_command('export_games', 'turns', '--placement=1')
+        self.assertEqual(output.getvalue(), '')
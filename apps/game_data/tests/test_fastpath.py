@@ -0,0 +1,203 @@
+from copy import deepcopy
+from random import Random
+import json
+
+from django.test import TestCase
+
+from apps.game_data.benchmarks.synthetic import RollupGenerator
+from apps.game_data.ingest.fastpath import (
+    Rejected,
+    Unsupported,
+    validate_rollup
+)
+from apps.game_data.ingest.pipeline import RollupIngestor
+from apps.game_data.ingest.records import GameRecord
+from apps.game_data.serializers.game import GameTarSerializer
+from apps.game_data.tests.helpers import (
+    clear_games,
+    game_rows,
+    load_pieces,
+    load_sample
+)
+
+UNSUPPORTED = 'unsupported'
+
+# Values a mutation can drop in anywhere.
+ODD_VALUES = [
+    None, '', ' ', 0, -1, 1, 7, 8, 9, 1.0, 1.5, True, False, [], {}, ['1'],
+    {'1': 1}, '1', ' 3 ', '7.0', '8.00', '2.1', '2.3', '2.1.1', '12.0',
+    '1.', 'x.1', 'abc', 'true', 'no', 'x' * 20, 'a\x00b', '\ud800',
+    '0.0', '31', 'ffffffff-ffff-ffff-ffff-ffffffffffff', 100, 100.5, '1e2',
+    'nan', '-inf', 'Infinity',
+]
+# And keys it can rename to or add.
+ODD_KEYS = [
+    '0', '01', '11', ' 1', 'x', 'match', 'participant', 'round',
+    'sim-results', 'sim_results', 'win-percent', 'loss_dmg', 'player_id',
+    'match_id', 'possibly_mythic', 'combat_info',
+]
+
+
+def slots(data):
+    """Every (container, key) pair in a JSON document."""
+    if isinstance(data, dict):
+        keys = list(data)
+    elif isinstance(data, list):
+        keys = range(len(data))
+    else:
+        return []
+    found = [(data, key) for key in keys]
+    for key in keys:
+        found.extend(slots(data[key]))
+    return found
+
+
+def mutate(json_data, random):
+    """A copy of `json_data` with one to three random things broken."""
+    json_data = deepcopy(json_data)
+    for _ in range(random.randint(1, 3)):
+        container, key = random.choice(slots(json_data) or [(None, None)])
+        if container is None:
+            break
+        kind = random.choice(('drop', 'replace', 'replace', 'rename', 'add'))
+        if kind == 'drop':
+            del container[key]
+        elif kind == 'replace':
+            container[key] = deepcopy(random.choice(ODD_VALUES))
+        elif isinstance(container, dict):
+            new_key = random.choice(
+                ODD_KEYS + [key.replace('-', '_'), key + '-'])
+            if kind == 'rename':
+                container[new_key] = container.pop(key)
+            else:
+                container[new_key] = deepcopy(random.choice(ODD_VALUES))
+    return json_data
+
+
+def drf_outcome(json_data):
+    """Validated data, or None if the serializer won't have it."""
+    serializer = GameTarSerializer(data=deepcopy(json_data))
+    try:
+        is_valid = serializer.is_valid()
+    except Exception:
+        return None
+    return serializer.validated_data if is_valid else None
+
+
+def fast_outcome(json_data):
+    try:
+        return validate_rollup(json_data)
+    except Rejected:
+        return None
+    except Unsupported:
+        return UNSUPPORTED
+
+
+def record_of(validated_data):
+    try:
+        return vars(GameRecord.from_validated_data(validated_data))
+    except Exception as e:
+        return type(e)
+
+
+class TestRollupValidator(TestCase):
+
+    def setUp(self) -> None:
+        load_pieces()
+
+    def assertSameOutcome(self, json_data):
+        """Returns whether the fast path could make up its own mind."""
+        untouched = deepcopy(json_data)
+        fast = fast_outcome(json_data)
+        self.assertEqual(json_data, untouched)
+        if fast == UNSUPPORTED:
+            return False
+
+        drf = drf_outcome(json_data)
+        self.assertEqual(
+            fast is None, drf is None, json.dumps(json_data)[:2000])
+        if drf is not None:
+            self.assertEqual(fast, drf)
+            self.assertEqual(record_of(fast), record_of(drf))
+        return True
+
+    def test_samples(self):
+        json_data = load_sample('full_sample.json')
+        self.assertIsNotNone(fast_outcome(json_data))
+        self.assertTrue(self.assertSameOutcome(json_data))
+
+    def test_generated_documents(self):
+        for json_data in RollupGenerator(seed=5).members(5):
+            json_data = json.loads(json_data[1])
+            self.assertIsNotNone(fast_outcome(json_data))
+            self.assertSameOutcome(json_data)
+
+    def test_mutated_documents(self):
+        """Both paths accept and reject the same broken documents."""
+        random = Random(14)
+        games = [
+            json.loads(content)
+            for _, content in RollupGenerator(seed=14).members(4)
+        ]
+        # Cut them down so each DRF run is cheap.
+        for json_data in games:
+            json_data['combat-info'] = json_data['combat-info'][:2]
+            for player in json_data['players']:
+                for key in ('healths', 'xps'):
+                    player[key] = {
+                        index: value for index, value in player[key].items()
+                        if int(index) <= 3
+                    }
+                player['heroes'] = player['heroes'][:3]
+
+        decided = accepted = 0
+        for _ in range(400):
+            json_data = mutate(random.choice(games), random)
+            if self.assertSameOutcome(json_data):
+                decided = decided + 1
+                accepted = accepted + (fast_outcome(json_data) is not None)
+        # Most mutations are decided without DRF, and some survive.
+        self.assertGreater(decided, 350)
+        self.assertGreater(accepted, 20)
+        self.assertLess(accepted, decided - 100)
+
+    def test_unsupported(self):
+        json_data = load_sample('full_sample.json')
+        json_data['players'][0]['match'] = 1
+        with self.assertRaises(Unsupported):
+            validate_rollup(json_data)
+
+
+class TestFastIngest(TestCase):
+
+    def setUp(self) -> None:
+        load_pieces()
+
+    def test_same_as_drf(self):
+        members = list(RollupGenerator(seed=2, povs=2).members(3))
+        bad_game = json.loads(members[0][1])
+        bad_game['placement'] = 9
+        # Used to crash the serializer outright.
+        no_round = json.loads(members[1][1])
+        del no_round['combat-info'][0]['round']
+        members = members + [
+            ('bad.json', json.dumps(bad_game).encode()),
+            ('no_round.json', json.dumps(no_round).encode()),
+        ]
+
+        results = {}
+        for validator in RollupIngestor.VALIDATORS:
+            ingestor = RollupIngestor(validator=validator)
+            ingestor.ingest_members(members)
+            results[validator] = (
+                ingestor.recorded,
+                [(name, str(error)) for name, error in ingestor.failures],
+                game_rows()
+            )
+            clear_games()
+        self.assertEqual(results['fast'], results['drf'])
+        self.assertEqual(results['fast'][0], len(members) - 2)
+        self.assertEqual(
+            [name for name, _ in results['fast'][1]],
+            ['bad.json', 'no_round.json']
+        )
@@ -0,0 +1,86 @@
+from contextlib import redirect_stdout
+from copy import deepcopy
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from apps.game_data.models.game import SBBGameParticipant, SBBGameTurn
+from apps.game_data.models.stats import SBBHeroStats
+from apps.game_data.tests.helpers import (
+    bulk_save,
+    load_pieces,
+    load_sample,
+    pov_of,
+    rename_players,
+    serializer_save
+)
+
+
+class TestHeroStats(TestCase):
+
+    def setUp(self) -> None:
+        load_pieces()
+        self.json_data = load_sample('full_sample.json')
+        self.player = self.json_data['player-id']
+
+    def player_stats(self, account_id):
+        hero_id = SBBGameTurn.objects.filter(
+            participant__player__account_id=account_id
+        ).values_list('hero_id', flat=True).first()
+        return SBBHeroStats.objects.get(hero_id=hero_id)
+
+    def test_new_game(self):
+        bulk_save(deepcopy(self.json_data))
+        self.assertEqual(SBBHeroStats.objects.mismatches(), {})
+
+        stats = self.player_stats(self.player)
+        placement = self.json_data['placement']
+        self.assertEqual(stats.games, 1)
+        self.assertEqual(stats.histogram[placement], 1)
+        self.assertEqual(stats.mean_placement, placement)
+        self.assertEqual(stats.top4_rate, 1 if placement <= 4 else 0)
+        self.assertEqual(
+            sum(stats.games for stats in SBBHeroStats.objects.all()),
+            SBBGameParticipant.objects.count()
+        )
+
+    def test_other_povs(self):
+        bulk_save(deepcopy(self.json_data))
+        other_player = '5E2F2E83C4BC4A8E'
+        bulk_save(pov_of(self.json_data, other_player, 3))
+        self.assertEqual(SBBHeroStats.objects.mismatches(), {})
+        self.assertEqual(self.player_stats(other_player).histogram[3], 1)
+
+        # A changed placement moves between buckets rather than adding.
+        bulk_save(pov_of(self.json_data, other_player, 1))
+        stats = self.player_stats(other_player)
+        self.assertEqual(stats.histogram[3], 0)
+        self.assertEqual(stats.histogram[1], 1)
+        self.assertEqual(stats.top4_rate, 1)
+        self.assertEqual(SBBHeroStats.objects.mismatches(), {})
+
+    def test_serializer_save(self):
+        serializer_save(deepcopy(self.json_data))
+        serializer_save(rename_players(self.json_data, 'A') | {
+            'match-id': '6b1c1b84-e3d9-4c1f-9d35-3f1bf8e0e0a1'})
+        serializer_save(pov_of(self.json_data, '5E2F2E83C4BC4A8E', 2))
+        self.assertEqual(SBBHeroStats.objects.mismatches(), {})
+        self.assertEqual(self.player_stats(self.player).games, 2)
+
+    def test_command(self):
+        bulk_save(deepcopy(self.json_data))
+        with redirect_stdout(StringIO()):
+            call_command('rebuild_hero_stats', '--check')
+
+        stats = self.player_stats(self.player)
+        stats.games = 5
+        stats.save()
+        with self.assertRaises(CommandError), redirect_stdout(StringIO()):
+            call_command('rebuild_hero_stats', '--check')
+
+        with redirect_stdout(StringIO()):
+            call_command('rebuild_hero_stats')
+        self.assertEqual(SBBHeroStats.objects.mismatches(), {})
+        self.assertEqual(self.player_stats(self.player).games, 1)
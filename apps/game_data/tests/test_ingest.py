@@ -0,0 +1,313 @@
+from contextlib import redirect_stdout
+from io import StringIO
+import json
+import os
+import tempfile
+import tracemalloc
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.game_data.benchmarks.synthetic import RollupGenerator, write_rollup
+from apps.game_data.ingest.bulk import BulkGameWriter
+from apps.game_data.ingest.instrument import IngestProfiler, normalize_sql
+from apps.game_data.ingest.ledger import IngestLedger
+from apps.game_data.ingest.pipeline import RollupIngestor
+from apps.game_data.ingest.tarball import iter_rollup_members
+from apps.game_data.models.game import SBBGame
+from apps.game_data.models.ingest import IngestedMember
+from apps.game_data.tests.helpers import (
+    clear_games,
+    game_rows,
+    load_pieces,
+    sample_members
+)
+
+
+class TestRollupStreaming(TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def peak_memory(self, game_count):
+        """Peak traced memory while streaming a roll-up of `game_count`."""
+        path = os.path.join(self.tmp_dir.name, f'{game_count}.tar.gz')
+        write_rollup(path, RollupGenerator().members(game_count))
+
+        seen = 0
+        with open(path, 'rb') as file_stream:
+            tracemalloc.start()
+            try:
+                for name, content in iter_rollup_members(file_stream):
+                    json.loads(content)
+                    seen = seen + 1
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+        self.assertEqual(seen, game_count)
+        return peak
+
+    def test_member_contents(self):
+        path = os.path.join(self.tmp_dir.name, 'rollup.tar.gz')
+        expected = list(RollupGenerator().members(3))
+        write_rollup(path, expected)
+
+        with open(path, 'rb') as file_stream:
+            members = list(iter_rollup_members(file_stream))
+
+        self.assertEqual(members, expected)
+
+    def test_memory_stays_flat(self):
+        """
+        Ten times the games shouldn't come close to doubling peak memory.
+        Buffering the whole roll-up would scale it ten-fold.
+        """
+        small_peak = self.peak_memory(50)
+        large_peak = self.peak_memory(500)
+        self.assertLess(large_peak, small_peak * 2)
+
+
+class CountingWriter(BulkGameWriter):
+
+    def __init__(self):
+        self.uuids = []
+
+    def write(self, record, **kwargs):
+        self.uuids.append(record.uuid)
+        return super().write(record, **kwargs)
+
+
+class Crash(BaseException):
+    pass
+
+
+class CrashingWriter(CountingWriter):
+    """Dies like a killed process on its `crash_at`th write."""
+
+    def __init__(self, crash_at):
+        super().__init__()
+        self.crash_at = crash_at
+
+    def write(self, record, **kwargs):
+        if len(self.uuids) + 1 == self.crash_at:
+            raise Crash()
+        return super().write(record, **kwargs)
+
+
+class TestPOVMerging(TestCase):
+
+    def setUp(self) -> None:
+        load_pieces()
+        # 4 games, one with 3 POVs and the others with 2 each.
+        self.members = sample_members()
+
+    def test_one_write_per_game(self):
+        writer = CountingWriter()
+        ingestor = RollupIngestor(writer=writer)
+        ingestor.ingest_members(self.members)
+
+        self.assertEqual(ingestor.recorded, len(self.members))
+        self.assertEqual(len(writer.uuids), 4)
+        self.assertEqual(len(set(writer.uuids)), 4)
+        self.assertEqual(SBBGame.objects.count(), 4)
+
+    def test_same_rows_as_unmerged(self):
+        RollupIngestor(merge_window=0).ingest_members(self.members)
+        expected = game_rows()
+        clear_games()
+
+        RollupIngestor().ingest_members(self.members)
+        self.assertEqual(game_rows(), expected)
+
+    def test_small_window(self):
+        """Games pushed out of the window still end up correct."""
+        shuffled = self.members[::2] + self.members[1::2]
+        RollupIngestor(merge_window=0).ingest_members(shuffled)
+        expected = game_rows()
+        clear_games()
+
+        writer = CountingWriter()
+        RollupIngestor(writer=writer, merge_window=1).ingest_members(shuffled)
+        self.assertEqual(game_rows(), expected)
+        self.assertGreater(len(writer.uuids), 4)
+
+
+class TestLoadBucketCommand(TestCase):
+
+    def setUp(self) -> None:
+        load_pieces()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_load_file(self):
+        path = os.path.join(self.tmp_dir.name, 'rollup.tar.gz')
+        write_rollup(path, RollupGenerator(povs=2).members(4))
+
+        call_command('load_bucket', file=path)
+        self.assertEqual(SBBGame.objects.count(), 4)
+
+    def test_rerun_uses_ledger(self):
+        path = os.path.join(self.tmp_dir.name, 'rollup.tar.gz')
+        write_rollup(path, RollupGenerator(povs=2).members(4))
+
+        call_command('load_bucket', file=path)
+        self.assertEqual(
+            IngestedMember.objects.filter(rollup='rollup.tar.gz').count(), 8)
+        call_command('load_bucket', file=path)
+        self.assertEqual(IngestedMember.objects.count(), 8)
+
+        call_command('load_bucket', file=path, force=True)
+        self.assertEqual(IngestedMember.objects.count(), 8)
+        self.assertEqual(SBBGame.objects.count(), 4)
+
+    def test_bad_member(self):
+        path = os.path.join(self.tmp_dir.name, 'rollup.tar.gz')
+        members = list(RollupGenerator(povs=1).members(4))
+        bad = [('truncated.json', members[1][1][:50]),
+               ('binary.json', b'\xff\xfe')]
+        write_rollup(path, members[:2] + bad + members[2:])
+
+        out = StringIO()
+        with redirect_stdout(out):
+            call_command('load_bucket', file=path, batch_size=2)
+        self.assertEqual(SBBGame.objects.count(), 4)
+        self.assertEqual(
+            set(IngestedMember.objects.values_list('name', flat=True)),
+            {name for name, _ in members}
+        )
+        self.assertIn('truncated.json', out.getvalue())
+        self.assertIn('binary.json', out.getvalue())
+        self.assertIn('4 games recorded.', out.getvalue())
+
+        # The rerun skips the good ones and fails the bad ones again.
+        out = StringIO()
+        with redirect_stdout(out):
+            call_command('load_bucket', file=path)
+        self.assertIn('4 games already recorded, skipped.', out.getvalue())
+        self.assertIn('truncated.json', out.getvalue())
+
+
+class TestIngestLedger(TestCase):
+
+    def setUp(self) -> None:
+        load_pieces()
+        # 4 games over 7 members.
+        self.members = sample_members()[2:]
+
+    def test_rerun_skips_everything(self):
+        first = RollupIngestor(ledger=IngestLedger('2022-05-01'))
+        first.ingest_members(self.members)
+        self.assertEqual(first.recorded, len(self.members))
+
+        writer = CountingWriter()
+        second = RollupIngestor(
+            writer=writer, ledger=IngestLedger('2022-05-01'))
+        second.ingest_members(self.members)
+        self.assertEqual(second.recorded, 0)
+        self.assertEqual(second.skipped, len(self.members))
+        self.assertEqual(writer.uuids, [])
+
+    def test_other_rollup_or_content_is_loaded(self):
+        RollupIngestor(ledger=IngestLedger('2022-05-01')).ingest_members(
+            self.members)
+
+        other_day = RollupIngestor(ledger=IngestLedger('2022-05-02'))
+        other_day.ingest_members(self.members[:1])
+        self.assertEqual(other_day.recorded, 1)
+
+        name, content = self.members[0]
+        changed = RollupIngestor(ledger=IngestLedger('2022-05-01'))
+        changed.ingest_members([(name, content + b' ')])
+        self.assertEqual(changed.recorded, 1)
+
+    def test_failures_not_recorded(self):
+        ingestor = RollupIngestor(ledger=IngestLedger('2022-05-01'))
+        ingestor.ingest_members(self.members + [('bad.json', b'{}')])
+        self.assertEqual(len(ingestor.failures), 1)
+        self.assertFalse(
+            IngestedMember.objects.filter(name='bad.json').exists())
+        self.assertEqual(ingestor.ledger.hashes, {})
+
+    def test_resume_after_crash(self):
+        RollupIngestor().ingest_members(self.members)
+        expected = game_rows()
+        clear_games()
+
+        # Unmerged, each member is a write. Dies on the 5th, keeping the
+        # first two batches: 4 members of 3 games.
+        crashing = RollupIngestor(
+            writer=CrashingWriter(crash_at=5),
+            merge_window=0,
+            ledger=IngestLedger('2022-05-01'),
+            batch_size=2
+        )
+        with self.assertRaises(Crash):
+            crashing.ingest_members(self.members)
+        self.assertEqual(SBBGame.objects.count(), 3)
+        self.assertEqual(IngestedMember.objects.count(), 4)
+
+        writer = CountingWriter()
+        resumed = RollupIngestor(
+            writer=writer,
+            ledger=IngestLedger('2022-05-01'),
+            batch_size=2
+        )
+        resumed.ingest_members(self.members)
+        self.assertEqual(resumed.skipped, 4)
+        self.assertEqual(resumed.recorded, len(self.members) - 4)
+        self.assertEqual(game_rows(), expected)
+
+
+class TestIngestProfiler(TestCase):
+
+    def setUp(self) -> None:
+        load_pieces()
+        self.members = sample_members()
+
+    def test_normalize_sql(self):
+        self.assertEqual(
+            normalize_sql('INSERT INTO "t" ("a", "b") VALUES (%s, %s), (%s, %s)'),
+            'INSERT INTO "t" ("a", "b") VALUES (%s, ...) ...'
+        )
+        self.assertEqual(
+            normalize_sql('INSERT INTO "t" ("a") SELECT %s UNION ALL SELECT %s'),
+            'INSERT INTO "t" ("a") SELECT %s ...'
+        )
+        self.assertEqual(
+            normalize_sql('SELECT * FROM "t" WHERE "a" IN (%s, %s, %s)'),
+            'SELECT * FROM "t" WHERE "a" IN (%s, ...)'
+        )
+
+    def test_summary_and_trace(self):
+        trace_file = StringIO()
+        with IngestProfiler(trace_file=trace_file) as profiler:
+            ingestor = RollupIngestor(profiler=profiler)
+            ingestor.ingest_members(self.members)
+            ingestor.ingest_member('broken.json', b'{"match-id": "nope"}')
+
+        summary = profiler.summary()
+        self.assertEqual(summary['games'], 5)
+        self.assertEqual(summary['failures'], 1)
+        self.assertEqual(
+            set(summary['stages']), {'decompress', 'json', 'validate', 'save'})
+        self.assertEqual(sum(summary['queries_per_game'].values()), 5)
+        self.assertGreater(summary['queries']['count'], 0)
+        # Anything else is the batch transactions around the games.
+        self.assertLessEqual(
+            sum(game['queries'] for game in summary['slowest_games']),
+            summary['queries']['count']
+        )
+        self.assertGreater(summary['top_sql'][0]['count'], 1)
+
+        traces = [json.loads(line) for line in trace_file.getvalue().splitlines()]
+        self.assertEqual(len(traces), 5)
+        self.assertEqual(
+            sorted(len(trace['members']) for trace in traces), [0, 2, 2, 2, 3])
+        self.assertEqual(traces[-1]['game'], 'broken.json')
+        self.assertTrue(traces[-1]['errors'])
@@ -0,0 +1,180 @@
+from copy import deepcopy
+import json
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.game_data.ingest.pipeline import RollupIngestor
+from apps.game_data.ingest.records import OUTCOME_FIELDS
+from apps.game_data.matchups import MatchupMatrix, get_matchups
+from apps.game_data.models.game import SBBCombatRound, SBBGameTurn
+from apps.game_data.models.meta import SBBHero
+from apps.game_data.tests.helpers import (
+    bulk_save,
+    load_pieces,
+    load_sample,
+    pov_of,
+    rename_players,
+    serializer_save
+)
+
+
+def stored_combats():
+    return {
+        (
+            combat.turn.participant.player.account_id,
+            combat.opponent_turn.participant.player.account_id,
+            combat.turn.turn_num
+        ): combat
+        for combat in SBBCombatRound.objects.select_related(
+            'turn__participant__player',
+            'opponent_turn__participant__player'
+        )
+    }
+
+
+class TestCombatRounds(TestCase):
+
+    def setUp(self) -> None:
+        load_pieces()
+        self.json_data = load_sample('full_sample.json')
+        self.player = self.json_data['player-id']
+
+    def test_pairings(self):
+        for save in (serializer_save, bulk_save):
+            with self.subTest(save=save.__name__):
+                save(deepcopy(self.json_data))
+                combats = stored_combats()
+                self.assertEqual(
+                    len(combats), len(self.json_data['combat-info']))
+
+                for item in self.json_data['combat-info']:
+                    opponent, = set(item) - {
+                        self.player, 'round', 'sim-results'}
+                    first, second = sorted((self.player, opponent))
+                    combat = combats[(first, second, item['round'])]
+                    sim = item['sim-results']
+                    outcome = (
+                        sim['win-percent'], sim['tie-percent'],
+                        sim['loss-percent'], sim['win-dmg'], sim['loss-dmg'])
+                    if first != self.player:
+                        # Turned round to the first player's side.
+                        outcome = (
+                            outcome[2], outcome[1], outcome[0], outcome[4],
+                            outcome[3])
+                    self.assertEqual(
+                        tuple(getattr(combat, field)
+                              for field in OUTCOME_FIELDS),
+                        outcome
+                    )
+                    self.assertEqual(
+                        combat.hero_id, combat.turn.hero_id)
+                    self.assertEqual(
+                        combat.opponent_hero_id, combat.opponent_turn.hero_id)
+                SBBCombatRound.objects.all().delete()
+
+    def test_other_pov(self):
+        """Both sides' JSONs describe the same fight, stored once."""
+        bulk_save(deepcopy(self.json_data))
+        opponent = '5E2F2E83C4BC4A8E'
+        other_pov = pov_of(self.json_data, opponent, 3)
+        for item in other_pov['combat-info']:
+            item['sim-results'] = None
+        bulk_save(other_pov)
+
+        self.assertEqual(
+            SBBCombatRound.objects.count(), len(self.json_data['combat-info']))
+        self.assertFalse(
+            SBBCombatRound.objects.filter(win_percent__isnull=True).exists())
+
+    def test_hero_changes(self):
+        """Combat rounds follow their turns' heroes."""
+        hero = SBBHero.objects.exclude(
+            template_id__in=[
+                player['heroes'][0] for player in self.json_data['players']]
+        ).first()
+        for save in (serializer_save, bulk_save):
+            with self.subTest(save=save.__name__):
+                save(deepcopy(self.json_data))
+                changed = deepcopy(self.json_data)
+                for player in changed['players']:
+                    if player['player-id'] == self.player:
+                        player['heroes'] = [
+                            str(hero.template_id)] * len(player['heroes'])
+                # Without any combats, so only the turns change.
+                changed['combat-info'] = []
+                save(changed)
+
+                turns = SBBGameTurn.objects.filter(
+                    participant__player__account_id=self.player)
+                self.assertEqual(
+                    set(SBBCombatRound.objects.filter(turn__in=turns)
+                        .values_list('hero_id', flat=True))
+                    | set(SBBCombatRound.objects.filter(
+                        opponent_turn__in=turns).values_list(
+                            'opponent_hero_id', flat=True)),
+                    {hero.pk}
+                )
+                SBBCombatRound.objects.all().delete()
+                SBBGameTurn.objects.all().update(hero=None)
+
+
+class TestMatchups(TestCase):
+
+    def setUp(self) -> None:
+        load_pieces()
+        cache.clear()
+        self.json_data = load_sample('full_sample.json')
+        bulk_save(deepcopy(self.json_data))
+
+    def test_matrix(self):
+        matrix = MatchupMatrix.from_db()
+        self.assertEqual(matrix.heroes, sorted(matrix.heroes))
+
+        # The same sums, a round at a time.
+        expected = {}
+        combats = SBBCombatRound.objects.select_related(
+            'hero', 'opponent_hero').exclude(win_percent__isnull=True)
+        for combat in combats:
+            hero = combat.hero.template_id
+            opponent = combat.opponent_hero.template_id
+            for key, won, hit in (
+                ((hero, opponent), combat.win_percent,
+                 combat.win_percent * combat.win_damage),
+                ((opponent, hero), combat.loss_percent,
+                 combat.loss_percent * combat.loss_damage),
+            ):
+                rounds, wins, dealt = expected.get(key, (0, 0, 0))
+                expected[key] = (rounds + 1, wins + won, dealt + hit)
+        self.assertTrue(expected)
+
+        for hero in matrix.heroes:
+            for opponent in matrix.heroes:
+                cell = matrix.get(hero, opponent)
+                if (hero, opponent) not in expected:
+                    self.assertEqual(cell['rounds'], 0)
+                    self.assertIsNone(cell['win_rate'])
+                    continue
+                rounds, wins, dealt = expected[(hero, opponent)]
+                self.assertEqual(cell['rounds'], rounds)
+                self.assertAlmostEqual(cell['win_rate'], wins / 100 / rounds)
+                self.assertAlmostEqual(cell['damage'], dealt / 100 / rounds)
+
+    def test_cached_until_ingest(self):
+        matrix = get_matchups()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(get_matchups().rounds, matrix.rounds)
+        self.assertEqual(len(queries), 1)
+
+        other_game = rename_players(self.json_data, 'A')
+        other_game['match-id'] = '6b1c1b84-e3d9-4c1f-9d35-3f1bf8e0e0a1'
+        RollupIngestor().ingest_members(
+            [('other.json', json.dumps(other_game).encode())])
+
+        self.assertGreater(get_matchups().version, matrix.version)
+        self.assertEqual(
+            sum(map(sum, get_matchups().rounds)),
+            2 * sum(map(sum, matrix.rounds))
+        )
@@ -46,3 +46,16 @@ class TestSerializers(TestCase):
         self.assertEqual(SBBHero.objects.all().count(), 40)
         self.assertEqual(SBBSpell.objects.all().count(), 53)
         self.assertEqual(SBBTreasure.objects.all().count(), 74)
+
+    def test_reload_json_file(self):
+        """Loading the same template ids again updates rather than adds."""
+
+        json_data = json.load(
+            open(os.path.join(self.samples_dir, 'meta_sample.json'), 'r'))
+        for _ in range(2):
+            serializer = GamePieceSerializer(data=json_data, many=True)
+            self.assertTrue(serializer.is_valid())
+            serializer.save()
+
+        self.assertEqual(SBBCharacter.objects.all().count(), 95)
+        self.assertEqual(SBBTreasure.objects.all().count(), 74)
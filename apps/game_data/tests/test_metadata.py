@@ -0,0 +1,151 @@
+from contextlib import redirect_stdout
+from io import StringIO
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.game_data.benchmarks.synthetic import piece_document
+from apps.game_data.ingest.download import rollup_session
+from apps.game_data.ingest.metadata import sync_pieces
+from apps.game_data.models.ingest import SyncedSource, VersionStamp
+from apps.game_data.models.meta import (
+    SBBCharacter,
+    SBBHero,
+    SBBSpell,
+    SBBTreasure
+)
+from apps.game_data.registry import STAMP, get_registry
+from apps.game_data.serializers.meta import GamePieceSerializer
+from apps.game_data.tests.helpers import LocalBucket
+
+
+def piece_count():
+    return sum(
+        model_cls.objects.count()
+        for model_cls in (SBBCharacter, SBBHero, SBBSpell, SBBTreasure)
+    )
+
+
+class TestPieceUpsert(TestCase):
+
+    def upsert(self, json_data):
+        serializer = GamePieceSerializer(data=json_data, many=True)
+        self.assertTrue(serializer.is_valid())
+        return serializer.upsert()
+
+    def test_counts(self):
+        json_data = piece_document()
+        with CaptureQueriesContext(connection) as queries:
+            counts = self.upsert(json_data)
+        self.assertEqual(
+            counts, {'added': len(json_data), 'changed': 0, 'unchanged': 0})
+        self.assertEqual(piece_count(), len(json_data))
+        # A lookup and an insert per piece table.
+        self.assertEqual(len(queries), 8)
+
+        json_data['0']['Name'] = 'Frog King'
+        json_data['99999'] = {'Id': 'SBB_SPELL_NEW', 'Name': 'New'}
+        counts = self.upsert(json_data)
+        self.assertEqual(
+            counts,
+            {'added': 1, 'changed': 1, 'unchanged': len(json_data) - 2}
+        )
+        self.assertEqual(piece_count(), len(json_data))
+        self.assertEqual(
+            SBBCharacter.objects.get(template_id=0).name, 'Frog King')
+        self.assertEqual(
+            SBBSpell.objects.by_template_id()[99999].slug, 'SBB_SPELL_NEW')
+
+    def test_same_rows_as_save(self):
+        json_data = piece_document()
+        serializer = GamePieceSerializer(data=json_data, many=True)
+        self.assertTrue(serializer.is_valid())
+        serializer.save()
+        self.assertEqual(
+            self.upsert(json_data),
+            {'added': 0, 'changed': 0, 'unchanged': len(json_data)}
+        )
+
+
+class TestSyncPieces(TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.bucket = LocalBucket(self.tmp_dir.name)
+        self.url = f'{self.bucket.url}/template-ids.json'
+        self.session = rollup_session(backoff_factor=0)
+        self.write_document(piece_document())
+
+    def tearDown(self) -> None:
+        self.session.close()
+        self.tmp_dir.cleanup()
+
+    def write_document(self, json_data, mtime=None):
+        path = os.path.join(self.tmp_dir.name, 'template-ids.json')
+        with open(path, 'w') as json_file:
+            json.dump(json_data, json_file)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+    def test_conditional_fetch(self):
+        with self.bucket:
+            first = sync_pieces(self.session, self.url)
+            again = sync_pieces(self.session, self.url)
+        self.assertEqual(first['status'], 'synced')
+        self.assertEqual(first['added'], piece_count())
+        self.assertEqual(again, {'status': 'not modified'})
+
+        source = SyncedSource.objects.get(url=self.url)
+        self.assertTrue(source.etag)
+        self.assertTrue(source.last_modified)
+
+    def test_unchanged_content(self):
+        """Same bytes under a new ETag still skip the upsert."""
+        with self.bucket:
+            sync_pieces(self.session, self.url)
+            self.write_document(piece_document(), mtime=0)
+            with CaptureQueriesContext(connection) as queries:
+                result = sync_pieces(self.session, self.url)
+        self.assertEqual(result, {'status': 'unchanged'})
+        self.assertFalse(any(
+            'game_data_sbb' in query['sql']
+            for query in queries.captured_queries
+        ))
+
+    def test_changed_content(self):
+        json_data = piece_document()
+        with self.bucket:
+            sync_pieces(self.session, self.url)
+            json_data['0']['Name'] = 'Frog King'
+            self.write_document(json_data, mtime=0)
+            result = sync_pieces(self.session, self.url)
+            forced = sync_pieces(self.session, self.url, force=True)
+        self.assertEqual(
+            result,
+            {
+                'status': 'synced', 'added': 0, 'changed': 1,
+                'unchanged': len(json_data) - 1
+            }
+        )
+        self.assertEqual(forced['unchanged'], len(json_data))
+        # Bumped by the first two syncs only, and this process refreshed.
+        self.assertEqual(VersionStamp.objects.current(STAMP), 2)
+        self.assertEqual(get_registry().version, 2)
+        self.assertEqual(get_registry().get('CHARACTER', 0).name, 'Frog King')
+
+    def test_command(self):
+        with self.bucket, redirect_stdout(StringIO()) as stdout:
+            call_command('load_metadata', url=self.url)
+            call_command('load_metadata', url=self.url)
+        self.assertEqual(
+            stdout.getvalue().splitlines(),
+            [
+                f'{piece_count()} pieces added, 0 changed, 0 unchanged.',
+                'template-ids.json not modified, nothing to do.'
+            ]
+        )
@@ -0,0 +1,139 @@
+from uuid import uuid4
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class TestUniqueLookupKeysMigration(TransactionTestCase):
+    """Duplicates made before the constraints existed get merged."""
+
+    migrate_from = [('game_data', '0004_ingestedmember')]
+    migrate_to = [('game_data', '0005_unique_lookup_keys')]
+
+    def setUp(self) -> None:
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        self.old_apps = executor.loader.project_state(self.migrate_from).apps
+
+    def tearDown(self) -> None:
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def migrate(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_to)
+        return executor.loader.project_state(self.migrate_to).apps
+
+    def test_merges_duplicates(self):
+        get_model = self.old_apps.get_model
+        character_model = get_model('game_data', 'SBBCharacter')
+        old_character = character_model.objects.create(
+            template_id=5, name='Old', slug='SBB_CHARACTER_OLD')
+        new_character = character_model.objects.create(
+            template_id=5, name='New', slug='SBB_CHARACTER_OLD')
+        treasure_model = get_model('game_data', 'SBBTreasure')
+        old_treasure = treasure_model.objects.create(
+            template_id=7, name='T', slug='SBB_TREASURE_T')
+        new_treasure = treasure_model.objects.create(
+            template_id=7, name='T', slug='SBB_TREASURE_T')
+        spell_model = get_model('game_data', 'SBBSpell')
+        spell = spell_model.objects.create(
+            template_id=9, name='S', slug='SBB_SPELL_S')
+
+        game = get_model('game_data', 'SBBGame').objects.create(uuid=uuid4())
+        player = get_model('game_data', 'SBBPlayer').objects.create(
+            account_id='A')
+        participant_model = get_model('game_data', 'SBBGameParticipant')
+        first = participant_model.objects.create(match=game, player=player)
+        second = participant_model.objects.create(match=game, player=player)
+
+        turn_model = get_model('game_data', 'SBBGameTurn')
+        first_turn = turn_model.objects.create(participant=first, turn_num=1)
+        second_turn = turn_model.objects.create(participant=second, turn_num=1)
+        get_model('game_data', 'SBBGameCharacter').objects.create(
+            base_character=new_character, game_turn=first_turn,
+            attack=1, health=1, golden=False, position=1)
+        get_model('game_data', 'SBBGameSpell').objects.create(
+            base_spell=spell, game_turn=second_turn, order=0)
+        first_turn.treasures.add(old_treasure, new_treasure)
+        second_turn.treasures.add(new_treasure)
+
+        new_apps = self.migrate()
+        get_model = new_apps.get_model
+
+        characters = get_model('game_data', 'SBBCharacter').objects.all()
+        self.assertEqual(
+            list(characters.values_list('pk', flat=True)), [old_character.pk])
+        self.assertEqual(
+            list(get_model('game_data', 'SBBTreasure').objects.values_list(
+                'pk', flat=True)),
+            [old_treasure.pk]
+        )
+        self.assertEqual(
+            list(get_model('game_data', 'SBBGameParticipant').objects
+                 .values_list('pk', flat=True)),
+            [first.pk]
+        )
+
+        turn = get_model('game_data', 'SBBGameTurn').objects.get()
+        self.assertEqual(turn.pk, first_turn.pk)
+        self.assertEqual(
+            list(turn.sbbgamecharacter_set.values_list(
+                'base_character_id', flat=True)),
+            [old_character.pk]
+        )
+        # The kept turn had no spells, so the duplicate's moved over.
+        self.assertEqual(turn.sbbgamespell_set.count(), 1)
+        # It did have treasures, so the duplicate's were dropped.
+        self.assertEqual(
+            list(turn.treasures.values_list('pk', flat=True)),
+            [old_treasure.pk]
+        )
+
+
+class TestParticipantSeriesMigration(TransactionTestCase):
+    """Turns stored before the series existed get packed."""
+
+    migrate_from = [('game_data', '0012_board_snapshots')]
+    migrate_to = [('game_data', '0013_participant_series')]
+
+    setUp = TestUniqueLookupKeysMigration.setUp
+    tearDown = TestUniqueLookupKeysMigration.tearDown
+    migrate = TestUniqueLookupKeysMigration.migrate
+
+    def test_packs_turns(self):
+        get_model = self.old_apps.get_model
+        hero = get_model('game_data', 'SBBHero').objects.create(
+            template_id=61, name='H', slug='SBB_HERO_H')
+        game = get_model('game_data', 'SBBGame').objects.create(uuid=uuid4())
+        participant_model = get_model('game_data', 'SBBGameParticipant')
+        summarised, unsummarised = (
+            participant_model.objects.create(
+                match=game,
+                player=get_model('game_data', 'SBBPlayer').objects.create(
+                    account_id=account_id))
+            for account_id in ('A', 'B')
+        )
+        turn_model = get_model('game_data', 'SBBGameTurn')
+        for turn_num, hp in ((1, 40), (3, 31)):
+            turn_model.objects.create(
+                participant=summarised, turn_num=turn_num, hero=hero, hp=hp,
+                level=2, exp=turn_num // 2)
+        # Board only, no summary.
+        turn_model.objects.create(participant=unsummarised, turn_num=1)
+
+        self.migrate()
+
+        from apps.game_data.models.game import SBBGameParticipant
+        from apps.game_data.series import MISSING
+        participant = SBBGameParticipant.objects.get(pk=summarised.pk)
+        self.assertEqual(list(participant.series('hp')), [40, MISSING, 31])
+        self.assertEqual(list(participant.series('exp')), [0, MISSING, 1])
+        self.assertEqual(
+            list(participant.series('hero_id')), [hero.pk, MISSING, hero.pk])
+        self.assertEqual(
+            list(SBBGameParticipant.objects.get(
+                pk=unsummarised.pk).series('hp')),
+            []
+        )
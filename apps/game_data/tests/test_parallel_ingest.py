@@ -0,0 +1,144 @@
+from queue import Queue
+from unittest import mock
+import os
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from apps.game_data.ingest import parallel
+from apps.game_data.ingest.parallel import (
+    ParallelIngestor,
+    WorkerDied,
+    ingest_shard,
+    shard_for
+)
+from apps.game_data.ingest.pipeline import RollupIngestor
+from apps.game_data.tests.helpers import (
+    clear_games,
+    game_rows,
+    load_pieces,
+    sample_members
+)
+
+
+class TestSharding(TestCase):
+
+    def setUp(self) -> None:
+        load_pieces()
+        self.members = sample_members()
+
+    def test_povs_share_a_shard(self):
+        shards = [shard_for(content, 4) for _, content in self.members]
+        self.assertEqual(len(set(shards[:3])), 1)
+        for shard in shards:
+            self.assertIn(shard, range(4))
+
+    def test_unreadable_match_id(self):
+        self.assertEqual(shard_for(b'{}', 4), 0)
+        self.assertIn(shard_for(b'{"match-id": "nope"}', 4), range(4))
+
+    def test_shards_match_serial(self):
+        """
+        Shards ingested independently, in any order, should give the
+        same rows as one serial run.
+        """
+        serial = RollupIngestor()
+        serial.ingest_members(self.members)
+        self.assertEqual(serial.recorded, len(self.members))
+        expected = game_rows()
+        clear_games()
+
+        shards = {}
+        for name, content in self.members:
+            shards.setdefault(shard_for(content, 3), []).append((name, content))
+        for shard in sorted(shards, reverse=True):
+            RollupIngestor().ingest_members(shards[shard])
+
+        self.assertEqual(game_rows(), expected)
+
+
+def broken_member(self, name, content):
+    if name == '1.json':
+        raise RuntimeError('database is locked')
+    return original_ingest_member(self, name, content)
+
+
+original_ingest_member = RollupIngestor.ingest_member
+
+
+def exit_at_once(member_queue, result_queue, options):
+    os._exit(3)
+
+
+class TestWorkerFailures(TestCase):
+
+    def setUp(self) -> None:
+        # Closing it would end the test's transaction.
+        patcher = mock.patch.object(parallel.db.connections, 'close_all')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        load_pieces()
+        self.members = sample_members()
+
+    def test_worker_reports_failure(self):
+        """A member that raises is reported and the worker carries on."""
+        member_queue = Queue()
+        result_queue = Queue()
+        for index, (_, content) in enumerate(self.members):
+            member_queue.put((f'{index}.json', content))
+        member_queue.put(None)
+        with mock.patch.object(RollupIngestor, 'ingest_member', broken_member):
+            ingest_shard(member_queue, result_queue, {'rollup': None})
+
+        recorded, skipped, failures = result_queue.get_nowait()
+        self.assertEqual(recorded, len(self.members) - 1)
+        self.assertEqual(failures, [('1.json', 'database is locked')])
+
+    def test_dead_worker_raises(self):
+        """The parent gives up rather than waiting on a dead worker."""
+        ingestor = ParallelIngestor(workers=2)
+        ingestor.queue_size = 1
+        ingestor.poll_interval = 0.05
+        with mock.patch.object(parallel, 'ingest_shard', exit_at_once):
+            with self.assertRaises(WorkerDied):
+                ingestor.ingest_members(self.members * 4)
+
+
+class TestParallelIngestor(TransactionTestCase):
+
+    def setUp(self) -> None:
+        # The test database's name is only settled once tests are running.
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('Worker processes need a database they can all open.')
+        load_pieces()
+        self.members = sample_members()
+
+    def test_matches_serial(self):
+        serial = RollupIngestor()
+        serial.ingest_members(self.members)
+        expected = game_rows()
+        clear_games()
+
+        ingestor = ParallelIngestor(workers=3)
+        ingestor.ingest_members(self.members)
+        self.assertEqual(ingestor.recorded, len(self.members))
+        self.assertEqual(ingestor.failures, [])
+        self.assertEqual(game_rows(), expected)
+
+    def test_rerun_skips(self):
+        ParallelIngestor(workers=3, rollup='2022-05-01').ingest_members(
+            self.members)
+
+        rerun = ParallelIngestor(workers=3, rollup='2022-05-01', batch_size=2)
+        rerun.ingest_members(self.members)
+        self.assertEqual(rerun.recorded, 0)
+        self.assertEqual(rerun.skipped, len(self.members))
+
+    def test_member_raises(self):
+        with mock.patch.object(RollupIngestor, 'ingest_member', broken_member):
+            ingestor = ParallelIngestor(workers=3)
+            ingestor.ingest_members(
+                (f'{index}.json', content)
+                for index, (_, content) in enumerate(self.members))
+        self.assertEqual(ingestor.recorded, len(self.members) - 1)
+        self.assertEqual(ingestor.failures, [('1.json', 'database is locked')])
@@ -0,0 +1,142 @@
+from copy import deepcopy
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.game_data import series
+from apps.game_data.models.game import SBBGameParticipant, SBBGameTurn
+from apps.game_data.tests.helpers import (
+    bulk_save,
+    clear_games,
+    load_pieces,
+    load_sample,
+    row_writes,
+    serializer_save
+)
+
+
+def turn_series():
+    """`series.series_for` every stored turn, the way a rebuild would."""
+    return series.series_for(
+        SBBGameTurn.objects.filter(hp__isnull=False).values_list(
+            'participant_id', 'turn_num', *series.SERIES_FIELDS))
+
+
+def stored_series():
+    return {
+        participant.pk: {
+            field: bytes(getattr(participant, field))
+            for field in series.SERIES_FIELDS.values()
+        }
+        for participant in SBBGameParticipant.objects.all()
+        if participant.hp_series
+    }
+
+
+class TestPacking(TestCase):
+
+    def test_round_trip(self):
+        values = [40, -3, series.MISSING, 2 ** 31 - 1]
+        self.assertEqual(list(series.unpack(series.pack(values))), values)
+        self.assertEqual(len(series.pack(values)), 16)
+        # Always little endian.
+        self.assertEqual(series.pack([1]), b'\x01\x00\x00\x00')
+
+    def test_trailing_missing(self):
+        self.assertEqual(
+            series.pack([5, series.MISSING, series.MISSING]),
+            series.pack([5])
+        )
+        self.assertEqual(series.pack([series.MISSING]), b'')
+
+    def test_merged(self):
+        packed = series.merged(b'', {3: 30, 1: 10})
+        self.assertEqual(
+            list(series.unpack(packed)), [10, series.MISSING, 30])
+        self.assertEqual(
+            list(series.unpack(series.merged(packed, {2: 20, 3: None}))),
+            [10, 20]
+        )
+
+    def test_matrix(self):
+        packed = [series.pack([1, 2, 3]), b'', series.pack([4])]
+        rows, width = series.matrix(packed)
+        self.assertEqual(width, 3)
+        missing = series.MISSING
+        self.assertEqual(
+            list(rows), [1, 2, 3, missing, missing, missing, 4, missing,
+                         missing])
+        rows, width = series.matrix(packed, width=2)
+        self.assertEqual(list(rows), [1, 2, missing, missing, 4, missing])
+
+
+class TestParticipantSeries(TestCase):
+
+    def setUp(self) -> None:
+        load_pieces()
+        self.json_data = load_sample('full_sample.json')
+
+    def test_matches_turns(self):
+        for save in (serializer_save, bulk_save):
+            with self.subTest(save=save.__name__):
+                save(deepcopy(self.json_data))
+                self.assertEqual(stored_series(), turn_series())
+                clear_games()
+
+    def test_values(self):
+        bulk_save(deepcopy(self.json_data))
+        player = self.json_data['players'][0]
+        participant = SBBGameParticipant.objects.get(
+            player__account_id=player['player-id'])
+        self.assertEqual(
+            list(participant.series('hp')), list(player['healths'].values()))
+        self.assertEqual(
+            [f'{level}.{exp}' for level, exp in zip(
+                participant.series('level'), participant.series('exp'))],
+            list(player['xps'].values())
+        )
+        self.assertEqual(
+            set(participant.series('hero_id')),
+            set(participant.sbbgameturn_set.values_list('hero_id', flat=True))
+        )
+
+    def test_one_update(self):
+        """The bulk writer packs every participant in one statement."""
+        with CaptureQueriesContext(connection) as queries:
+            bulk_save(deepcopy(self.json_data))
+        table = SBBGameParticipant._meta.db_table
+        self.assertEqual(
+            len([sql for sql in row_writes(queries)
+                 if sql.startswith(f'UPDATE "{table}"')]),
+            1
+        )
+
+    def test_changed_summary(self):
+        for save in (serializer_save, bulk_save):
+            with self.subTest(save=save.__name__):
+                save(deepcopy(self.json_data))
+                changed = deepcopy(self.json_data)
+                healths = changed['players'][0]['healths']
+                healths['3'] = healths['3'] - 1
+                save(changed)
+                self.assertEqual(stored_series(), turn_series())
+                participant = SBBGameParticipant.objects.get(
+                    player__account_id=changed['players'][0]['player-id'])
+                self.assertEqual(
+                    participant.series('hp')[2], healths['3'])
+                clear_games()
+
+    def test_series_matrix(self):
+        bulk_save(deepcopy(self.json_data))
+        participants = SBBGameParticipant.objects.filter(hp_series__gt=b'')
+        with self.assertNumQueries(1):
+            pks, rows, width = SBBGameParticipant.objects.series_matrix(
+                'hp', participants)
+        self.assertEqual(len(rows), len(pks) * width)
+        for index, pk in enumerate(pks):
+            curve = SBBGameParticipant.objects.get(pk=pk).series('hp')
+            row = rows[index * width:(index + 1) * width]
+            self.assertEqual(row[:len(curve)], curve)
+            self.assertEqual(
+                set(row[len(curve):]) - {series.MISSING}, set())
@@ -0,0 +1,120 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.game_data.models.ingest import VersionStamp
+from apps.game_data.models.meta import (
+    PIECE_MODELS,
+    SBBCharacter,
+    SBBHero,
+    SBBPlayer
+)
+from apps.game_data.registry import (
+    STAMP,
+    Piece,
+    PieceRegistry,
+    get_registry,
+    load_registry,
+    pieces_added,
+    refresh_registry,
+    slug_type
+)
+from apps.game_data.tests.helpers import load_pieces
+
+
+class TestPieceRegistry(TestCase):
+
+    def setUp(self) -> None:
+        load_pieces()
+
+    def test_lookups(self):
+        frog_prince = SBBCharacter.objects.get(template_id=0)
+        registry = get_registry()
+        with CaptureQueriesContext(connection) as queries:
+            by_key = registry.get('CHARACTER', 0)
+            by_slug = registry.by_slug['SBB_CHARACTER_FROGPRINCE']
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(
+            by_key,
+            Piece('CHARACTER', 0, frog_prince.pk,
+                  'SBB_CHARACTER_FROGPRINCE', 'Frog Prince')
+        )
+        self.assertIs(by_slug, by_key)
+        self.assertIsNone(registry.get('SPELL', 0))
+        self.assertEqual(
+            len(registry),
+            sum(model_cls.objects.count() for model_cls in PIECE_MODELS.values())
+        )
+
+    def test_read_only(self):
+        registry = get_registry()
+        with self.assertRaises(AttributeError):
+            registry.version = 5
+        with self.assertRaises(TypeError):
+            registry.by_slug['SBB_NEW'] = None
+
+    def test_cleared_on_save(self):
+        registry = get_registry()
+        SBBHero.objects.create(template_id=99999, slug='SBB_HERO_NEW')
+        self.assertIsNot(get_registry(), registry)
+        self.assertEqual(
+            get_registry().get('HERO', 99999).slug, 'SBB_HERO_NEW')
+
+    def test_other_saves_keep_it(self):
+        registry = get_registry()
+        SBBPlayer.objects.create(account_id='A')
+        self.assertIs(get_registry(), registry)
+
+    def test_backs_by_template_id(self):
+        """Piece instances come from the registry, not queries of their own."""
+        registry = load_registry()
+        with CaptureQueriesContext(connection) as queries:
+            frog_prince = SBBCharacter.objects.by_template_id()[0]
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(frog_prince, SBBCharacter.objects.get(template_id=0))
+        self.assertEqual(frog_prince.slug, registry.get('CHARACTER', 0).slug)
+        self.assertFalse(frog_prince._state.adding)
+        self.assertIs(SBBCharacter.objects.by_template_id()[0], frog_prince)
+
+        # Rebuilding the registry rebuilds them too.
+        SBBCharacter.objects.filter(template_id=0).update(name='Frog King')
+        load_registry()
+        self.assertEqual(
+            SBBCharacter.objects.by_template_id()[0].name, 'Frog King')
+
+    def test_refreshed_by_stamp(self):
+        """Another process changing the pieces is picked up by its stamp."""
+        registry = load_registry()
+        # No signals, as if done elsewhere.
+        SBBCharacter.objects.filter(template_id=0).update(name='Frog King')
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertIs(refresh_registry(), registry)
+        self.assertEqual(len(queries), 1)
+
+        VersionStamp.objects.bump(STAMP)
+        refreshed = refresh_registry()
+        self.assertEqual(refreshed.version, 1)
+        self.assertEqual(refreshed.get('CHARACTER', 0).name, 'Frog King')
+        self.assertIs(get_registry(), refreshed)
+
+    def test_pieces_added(self):
+        """Pieces bulk created elsewhere show up through the stamp."""
+        registry = load_registry()
+        SBBHero.objects.bulk_create([SBBHero(template_id=99999)])
+        self.assertIsNone(refresh_registry().get('HERO', 99999))
+        pieces_added()
+        self.assertIsNot(refresh_registry(), registry)
+        self.assertIsNotNone(refresh_registry().get('HERO', 99999))
+
+    def test_slug_type(self):
+        self.assertEqual(slug_type('SBB_CHARACTER_FROGPRINCE'), 'CHARACTER')
+        self.assertEqual(
+            slug_type('GOLDEN_SBB_CHARACTER_FROGPRINCE'), 'CHARACTER')
+        self.assertEqual(slug_type('SBB_TREASURE_X'), 'TREASURE')
+        self.assertIsNone(slug_type('SBB_WIDGET_X'))
+        self.assertIsNone(slug_type('XYZ_HERO_X'))
+
+    def test_empty(self):
+        registry = PieceRegistry()
+        self.assertEqual((len(registry), registry.version), (0, 0))
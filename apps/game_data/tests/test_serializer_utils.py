@@ -1,11 +1,32 @@
+from copy import deepcopy
+from uuid import uuid4
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework import serializers
 
+from apps.game_data.models.meta import (
+    SBBCharacter,
+    SBBSpell,
+    SBBTreasure,
+    clear_piece_cache
+)
+from apps.game_data.serializers.game import GameTarSerializer
 from apps.game_data.serializers.utils import (
     ContextDefaulter,
     IDKeyListField,
     IDKeyListSerializer,
-    JSONDashConvertMixin
+    JSONDashConvertMixin,
+    TemplateIDRelatedField,
+    nested_serializers
+)
+from apps.game_data.tests.helpers import (
+    clear_games,
+    game_rows,
+    load_pieces,
+    load_sample,
+    rename_players
 )
 
 
@@ -155,3 +176,114 @@ class TestIDKeyListField(TestCase):
             serializer.data,
             {'sample_field': ['A', 'B', 'C']}
         )
+
+
+class TestTemplateIDRelatedField(TestCase):
+
+    def setUp(self) -> None:
+        load_pieces()
+        self.field = TemplateIDRelatedField(
+            queryset=SBBCharacter.objects.all())
+
+    def test_lookup(self):
+        frog_prince = SBBCharacter.objects.get(template_id=0)
+        self.assertEqual(self.field.run_validation('0'), frog_prince)
+        self.assertEqual(self.field.to_representation(frog_prince), 0)
+
+    def test_bad_values(self):
+        with self.assertRaises(serializers.ValidationError):
+            self.field.run_validation('not-an-id')
+        with self.assertRaises(serializers.ValidationError):
+            self.field.run_validation('99999')
+
+    def test_cached(self):
+        """Only the first lookup should touch the database."""
+        clear_piece_cache()
+        with CaptureQueriesContext(connection) as context:
+            self.field.run_validation('0')
+        # Builds the piece registry.
+        self.assertGreater(len(context.captured_queries), 0)
+
+        with CaptureQueriesContext(connection) as context:
+            self.field.run_validation('14')
+        self.assertEqual(len(context.captured_queries), 0)
+
+    def test_invalidated_on_save(self):
+        self.field.run_validation('0')
+        new_piece = SBBCharacter.objects.create(
+            template_id=99999, name='New', slug='SBB_CHARACTER_NEW')
+        self.assertEqual(self.field.run_validation('99999'), new_piece)
+
+    def test_full_game_validation(self):
+        """A whole game should validate without any piece queries."""
+        for model_cls in (SBBCharacter, SBBSpell, SBBTreasure):
+            model_cls.objects.by_template_id()
+        json_data = load_sample('full_sample.json')
+        serializer = GameTarSerializer(data=json_data)
+        with CaptureQueriesContext(connection) as context:
+            self.assertTrue(serializer.is_valid())
+        self.assertEqual(len(context.captured_queries), 0)
+
+
+class TestReusableSerializer(TestCase):
+
+    def setUp(self) -> None:
+        load_pieces()
+        self.json_data = load_sample('full_sample.json')
+        self.other_game = rename_players(self.json_data, 'A')
+        self.other_game['match-id'] = str(uuid4())
+
+    def test_fields_built_once(self):
+        serializer = GameTarSerializer().reset(data=deepcopy(self.json_data))
+        self.assertTrue(serializer.is_valid())
+        nested = list(nested_serializers(serializer))
+        # Game, player, combat, then a board and its characters per side,
+        # and the combat's sim results.
+        self.assertEqual(len(nested), 8)
+
+        serializer.reset(data=deepcopy(self.other_game))
+        self.assertTrue(serializer.is_valid())
+        for before, after in zip(nested, nested_serializers(serializer)):
+            self.assertIs(before, after)
+            self.assertIs(before.fields, after.fields)
+
+    def test_context_isolated(self):
+        serializer = GameTarSerializer()
+        serializer.reset(data=deepcopy(self.json_data))
+        self.assertTrue(serializer.is_valid())
+        self.assertIn('round', serializer.context)
+
+        serializer.reset(data=deepcopy(self.other_game))
+        self.assertEqual(serializer.context, {})
+        context = {'players': {}}
+        serializer.reset(data=deepcopy(self.other_game), context=context)
+        self.assertIs(serializer.context, context)
+
+    def test_errors_not_carried_over(self):
+        bad_game = deepcopy(self.json_data)
+        bad_game['placement'] = 9
+        serializer = GameTarSerializer()
+
+        serializer.reset(data=bad_game)
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('placement', serializer.errors)
+        serializer.reset(data=deepcopy(self.json_data))
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.errors, {})
+
+    def test_same_rows_as_new_serializers(self):
+        docs = [self.json_data, self.other_game, self.json_data]
+        for json_data in docs:
+            serializer = GameTarSerializer(data=deepcopy(json_data))
+            self.assertTrue(serializer.is_valid())
+            serializer.save()
+        expected = game_rows()
+        clear_games()
+
+        serializer = GameTarSerializer()
+        for json_data in docs:
+            serializer.reset(data=deepcopy(json_data))
+            self.assertTrue(serializer.is_valid())
+            game = serializer.save()
+            self.assertEqual(str(game.uuid), json_data['match-id'])
+        self.assertEqual(game_rows(), expected)
@@ -0,0 +1,15 @@
+from django.urls import path
+
+from apps.game_data import views
+
+app_name = 'game_data'
+
+urlpatterns = [
+    path(
+        'export/<str:kind>.<str:file_format>',
+        views.ExportView.as_view(),
+        name='export'
+    ),
+    path('games/', views.GameListView.as_view(), name='game-list'),
+    path('games/<uuid:uuid>/', views.GameDetailView.as_view(), name='game-detail'),
+]
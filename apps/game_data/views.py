@@ -0,0 +1,96 @@
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
+from rest_framework import generics, permissions, views
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.throttling import UserRateThrottle
+
+from apps.game_data.export import EXPORTS, FORMATS, export
+from apps.game_data.filters import (
+    GameCursorPagination,
+    GameFilterBackend,
+    filter_games
+)
+from apps.game_data.models import game as game_models
+from apps.game_data.serializers.api import (
+    GameDetailSerializer,
+    GameFilterSerializer,
+    GameSummarySerializer
+)
+
+
+class GameListView(generics.ListAPIView):
+    """
+    Stored games, newest first, filterable by `player` account id and
+    `placement`, and by `hero` and `character` template ids.
+    """
+
+    queryset = game_models.SBBGame.objects.all()
+    serializer_class = GameSummarySerializer
+    filter_backends = (GameFilterBackend,)
+    pagination_class = GameCursorPagination
+
+
+class GameDetailView(generics.RetrieveAPIView):
+    """One stored game, with every player's turns and boards."""
+
+    queryset = game_models.SBBGame.objects.all()
+    serializer_class = GameDetailSerializer
+    lookup_field = 'uuid'
+
+
+class ExportRateThrottle(UserRateThrottle):
+    """SBB_EXPORT_RATE exports per user."""
+
+    scope = 'export'
+
+    def get_rate(self):
+        return settings.SBB_EXPORT_RATE
+
+
+class StreamNegotiation(BaseContentNegotiation):
+    """
+    Skips negotiating on the Accept header: an export is whatever format
+    its URL says, and anything else is an error rendered as JSON.
+    """
+
+    def select_parser(self, request, parsers):
+        return parsers[0] if parsers else None
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class ExportView(views.APIView):
+    """
+    Every turn or board row, streamed as NDJSON or CSV. Takes the same
+    filters as the game list.
+
+    Meant for analysis rather than the public API, and it can stream the
+    whole database, so it's for signed in users only and throttled.
+    """
+
+    permission_classes = (permissions.IsAuthenticated,)
+    throttle_classes = (ExportRateThrottle,)
+    renderer_classes = (JSONRenderer,)
+    content_negotiation_class = StreamNegotiation
+
+    def get(self, request, kind, file_format):
+        if kind not in EXPORTS or file_format not in FORMATS:
+            raise Http404
+        filters = GameFilterSerializer(data=request.GET)
+        if not filters.is_valid():
+            return Response(filters.errors, status=400)
+        games = None
+        if filters.validated_data:
+            games = filter_games(
+                game_models.SBBGame.objects.all(), **filters.validated_data)
+
+        response = StreamingHttpResponse(
+            export(kind, file_format, games),
+            content_type=FORMATS[file_format][1]
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{kind}.{file_format}"')
+        return response
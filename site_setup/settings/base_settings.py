@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/4.0/ref/settings/
 """
 
 from pathlib import Path
+import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -37,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'rest_framework',
     'apps.game_data'
 ]
 
@@ -122,3 +124,34 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Roll-up ingestion
+# Daily roll-ups are fetched from {SBB_ROLLUP_URL}/{date}.tar.gz and kept,
+# compressed, in SBB_ROLLUP_CACHE.
+
+SBB_ROLLUP_URL = os.environ.get(
+    'SBB_ROLLUP_URL',
+    'https://9n2ntsouxb.execute-api.us-east-1.amazonaws.com/prod/api/v1/data/daily-rollup'
+)
+
+SBB_ROLLUP_CACHE = os.environ.get(
+    'SBB_ROLLUP_CACHE', BASE_DIR.parent / 'rollup_cache')
+
+# Game piece metadata, synced by load_metadata.
+
+SBB_TEMPLATE_IDS_URL = os.environ.get(
+    'SBB_TEMPLATE_IDS_URL',
+    'https://raw.githubusercontent.com/SBBTracker/SBBTracker/main/assets/template-ids.json'
+)
+
+# Store each distinct board once and point turns at it, rather than
+# writing every turn's characters out again. Reads give the same boards
+# either way, and both kinds can be in one database.
+
+SBB_BOARD_SNAPSHOTS = os.environ.get('SBB_BOARD_SNAPSHOTS', '') == '1'
+
+# Exports stream whole tables, so they're for signed in users only, and
+# each user gets SBB_EXPORT_RATE of them, eg. '10/hour'.
+
+SBB_EXPORT_RATE = os.environ.get('SBB_EXPORT_RATE', '10/hour')